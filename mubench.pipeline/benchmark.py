@@ -1,31 +1,47 @@
 #!/usr/bin/env python3
 
+import argparse
 import logging.handlers
 import os
+import socket
 import sys
+import time
 from datetime import datetime
 from os import makedirs
 from os.path import join, exists, abspath, dirname
+from typing import List, Optional
 
+from data.dataset_index import DatasetIndex
 from data.detectors import find_detector, get_available_detector_ids
 from data.experiments import ProvidedPatternsExperiment, TopFindingsExperiment, BenchmarkExperiment
+from data.project_version import ProjectVersion
 from requirements import RequirementsCheck
 from tasks.implementations import stats
-from tasks.implementations.checkout import CheckoutTask
+from tasks.implementations.checkout import CheckoutTask, ParallelCheckoutTask
 from tasks.implementations.collect_misuses import CollectMisusesTask
 from tasks.implementations.collect_projects import CollectProjectsTask
 from tasks.implementations.collect_versions import CollectVersionsTask
 from tasks.implementations.compile import CompileTask
 from tasks.implementations.dataset_check import DatasetCheckTask
 from tasks.implementations.detect import DetectTask
+from tasks.implementations.export_bundles import ExportBundlesTask
 from tasks.implementations.info import ProjectInfoTask, VersionInfoTask, MisuseInfoTask
+from tasks.implementations.merge_findings import MergeFindingsTask
 from tasks.implementations.publish_findings import PublishFindingsTask
 from tasks.implementations.publish_metadata import PublishMetadataTask
+from tasks.async_task_runner import AsyncTaskRunner
+from tasks.journal import Journal
+from tasks.parallel_task_runner import ParallelTaskRunner
+from tasks.pipeline_task_runner import PipelineTaskRunner
 from tasks.task_runner import TaskRunner
-from utils import command_line_util
+from tasks.work_queue import WorkQueue, WorkQueueServer, WorkQueueClient
+from utils import command_line_util, tracing, profiling
 from utils.data_entity_lists import DataEntityLists
 from utils.dataset_util import get_available_datasets, get_available_dataset_ids, get_white_list
+from utils.io import get_number_of_yaml_parses
 from utils.logging import IndentFormatter
+from utils.scheduling import Schedule, get_estimated_runtime
+from utils.sharding import Shard, read_runtimes
 
 MUBENCH_ROOT_PATH = join(dirname(abspath(__file__)), os.pardir)
 
@@ -36,13 +52,15 @@ class Benchmark:
     COMPILES_PATH = CHECKOUTS_PATH
     DETECTORS_PATH = join(MUBENCH_ROOT_PATH, "detectors")
     FINDINGS_PATH = join(MUBENCH_ROOT_PATH, "findings")
+    JOURNALS_PATH = join(MUBENCH_ROOT_PATH, "journals")
+    DATASET_INDEX_PATH = join(MUBENCH_ROOT_PATH, "index", "dataset.sqlite")
     DATASETS_FILE_PATH = join(DATA_PATH, 'datasets.yml')
 
     EX1_SUBFOLDER = "detect-only"
     EX2_SUBFOLDER = "mine-and-detect"
     EX3_SUBFOLDER = "mine-and-detect"
 
-    def __init__(self, config):
+    def __init__(self, config, dataset_index: DatasetIndex = None):
         self.reviewed_eval_result_file = 'reviewed-result.csv'
         self.visualize_result_file = 'result.csv'
 
@@ -55,49 +73,139 @@ class Benchmark:
         if 'black_list' in config:
             self.black_list.extend(config.black_list)
 
-        self.data_entity_lists = DataEntityLists(self.white_list, self.black_list)
-
         if 'dataset' in config:
             self.white_list.extend(get_white_list(self.DATASETS_FILE_PATH, config.dataset))
 
+        self.where = config.where if 'where' in config else None
+        self.data_entity_lists = DataEntityLists(self.white_list, self.black_list, self.where)
+        if 'lease_item' in config:
+            # the leased version, with the misuses of the `--only` and `--dataset` white list
+            self.data_entity_lists = DataEntityLists([config.lease_item] + [
+                entity_id for entity_id in self.white_list if entity_id.rsplit('.', 1)[0] == config.lease_item],
+                self.black_list, self.where)
+
+        self.dataset_index = dataset_index
+        if self.dataset_index is None and config.task not in ['merge', 'worker']:
+            # merging reads no dataset and a worker builds the index once, for all its leases
+            self.dataset_index = self.__get_dataset_index()
+
+        self.is_empty_shard = False
+        if 'shard' in config and config.shard:
+            self.__apply_shard(config.shard)
+
+        self.schedule = None
+        if ('longest_first' in config and config.longest_first) or ('plan' in config and config.plan):
+            self.schedule = Schedule(self.__get_versions(), self.__get_estimated_runtime)
+
+    @staticmethod
+    def __get_dataset_index() -> DatasetIndex:
+        dataset_index = DatasetIndex(Benchmark.DATA_PATH, Benchmark.DATASET_INDEX_PATH)
+        dataset_index.update()
+        return dataset_index
+
+    def __get_versions(self) -> List[ProjectVersion]:
+        projects = CollectProjectsTask(self.DATA_PATH, self.data_entity_lists,
+                                       dataset_index=self.dataset_index).run()
+        collect_versions = CollectVersionsTask(self.data_entity_lists)
+        return [version for project in projects for version in collect_versions.run(project)]
+
+    def __get_collect_projects_task(self) -> CollectProjectsTask:
+        return CollectProjectsTask(self.DATA_PATH, self.data_entity_lists, self.schedule, self.dataset_index)
+
+    def __get_checkout_task(self) -> CheckoutTask:
+        migrate_checkouts = 'migrate_checkouts' in self.config and self.config.migrate_checkouts
+        checkout_jobs = self.config.checkout_jobs if 'checkout_jobs' in self.config else 1
+        checkout_jobs_per_host = self.config.checkout_jobs_per_host if 'checkout_jobs_per_host' in self.config else 0
+        sparse_checkout = 'sparse_checkout' in self.config and self.config.sparse_checkout
+        snapshot_cache_path = self.config.snapshot_cache_path if 'snapshot_cache_path' in self.config else None
+        svn_export = 'svn_export' in self.config and self.config.svn_export
+        bundles_path = self.config.bundles_path \
+            if 'checkout_task' in self.config and self.config.checkout_task == 'import-bundles' else None
+        verify_checkouts = 'verify_checkouts' in self.config and self.config.verify_checkouts
+        if checkout_jobs > 1:
+            return ParallelCheckoutTask(Benchmark.CHECKOUTS_PATH, self.config.force_checkout,
+                                        self.config.use_tmp_wrkdir, migrate_checkouts, checkout_jobs_per_host,
+                                        sparse_checkout, snapshot_cache_path, svn_export, bundles_path,
+                                        verify_checkouts, checkout_jobs)
+        return CheckoutTask(Benchmark.CHECKOUTS_PATH, self.config.force_checkout, self.config.use_tmp_wrkdir,
+                            migrate_checkouts, checkout_jobs_per_host, sparse_checkout, snapshot_cache_path,
+                            svn_export, bundles_path, verify_checkouts)
+
+    def __apply_shard(self, shard: Shard):
+        versions = self.__get_versions()
+
+        # every machine must compute the same partition, hence, we balance only by the shared runtimes file
+        runtimes = read_runtimes(self.config.shard_runtimes) \
+            if 'shard_runtimes' in self.config and self.config.shard_runtimes else None
+        shard_versions = shard.get_versions(versions, runtimes)
+        logger.info("Shard %s: %d of %d project version(s).", shard, len(shard_versions), len(versions))
+
+        shard_version_ids = [version.id for version in shard_versions]
+        # the misuses of the `--only` and `--dataset` white list
+        shard_misuse_ids = [entity_id for entity_id in self.white_list
+                            if len(entity_id.split('.')) > 2 and entity_id.rsplit('.', 1)[0] in shard_version_ids]
+        self.is_empty_shard = not shard_versions
+        self.data_entity_lists = DataEntityLists(shard_version_ids + shard_misuse_ids, self.black_list, self.where)
+
+    def __get_estimated_runtime(self, version: ProjectVersion) -> Optional[float]:
+        detector_id = self.config.detector if 'detector' in self.config else None
+        return get_estimated_runtime(version, self.FINDINGS_PATH, self.COMPILES_PATH, detector_id)
+
     def run(self) -> None:
         RequirementsCheck()
 
+        if self.config.task == 'worker':
+            self.__work()
+            return
+
+        if self.is_empty_shard:
+            logger.info("Nothing to do in this shard.")
+            return
+
+        if 'plan' in self.config and self.config.plan:
+            self.__print_plan()
+            return
+
+        if 'coordinate' in self.config and self.config.coordinate:
+            self.__coordinate(*self.config.coordinate)
+            return
+
         tasks = []
 
-        if config.task == 'info':
-            project_info = ProjectInfoTask(Benchmark.CHECKOUTS_PATH, benchmark.COMPILES_PATH)
-            version_info = VersionInfoTask(Benchmark.CHECKOUTS_PATH, benchmark.COMPILES_PATH)
-            misuse_info = MisuseInfoTask(Benchmark.CHECKOUTS_PATH, benchmark.COMPILES_PATH)
-            tasks.append(CollectProjectsTask(benchmark.DATA_PATH, self.data_entity_lists))
+        if self.config.task == 'info':
+            project_info = ProjectInfoTask(Benchmark.CHECKOUTS_PATH, Benchmark.COMPILES_PATH)
+            version_info = VersionInfoTask(Benchmark.CHECKOUTS_PATH, Benchmark.COMPILES_PATH)
+            misuse_info = MisuseInfoTask(Benchmark.CHECKOUTS_PATH, Benchmark.COMPILES_PATH)
+            tasks.append(self.__get_collect_projects_task())
             tasks.append(project_info)
-            tasks.append(CollectVersionsTask(self.data_entity_lists))
+            tasks.append(CollectVersionsTask(self.data_entity_lists, self.schedule))
             tasks.append(version_info)
             tasks.append(CollectMisusesTask(self.data_entity_lists))
             tasks.append(misuse_info)
-        elif config.task == 'checkout':
-            tasks.append(CollectProjectsTask(benchmark.DATA_PATH, self.data_entity_lists))
-            tasks.append(CollectVersionsTask(self.data_entity_lists))
-            tasks.append(CheckoutTask(Benchmark.CHECKOUTS_PATH, self.config.force_checkout, self.config.use_tmp_wrkdir))
-        elif config.task == 'compile':
-            tasks.append(CollectProjectsTask(benchmark.DATA_PATH, self.data_entity_lists))
-            tasks.append(CollectVersionsTask(self.data_entity_lists))
-            tasks.append(CheckoutTask(Benchmark.CHECKOUTS_PATH, self.config.force_checkout, self.config.use_tmp_wrkdir))
+        elif self.config.task == 'checkout':
+            tasks.append(self.__get_collect_projects_task())
+            tasks.append(CollectVersionsTask(self.data_entity_lists, self.schedule))
+            tasks.append(self.__get_checkout_task())
+            if self.config.checkout_task == 'export-bundles':
+                tasks.append(ExportBundlesTask(self.config.bundles_path))
+        elif self.config.task == 'compile':
+            tasks.append(self.__get_collect_projects_task())
+            tasks.append(CollectVersionsTask(self.data_entity_lists, self.schedule))
+            tasks.append(self.__get_checkout_task())
             tasks.append(CompileTask(Benchmark.COMPILES_PATH, self.config.force_compile, self.config.use_tmp_wrkdir))
-        elif config.task == 'detect':
-            tasks.append(CollectProjectsTask(benchmark.DATA_PATH, self.data_entity_lists))
-            tasks.append(CollectVersionsTask(self.data_entity_lists))
-            tasks.append(CheckoutTask(Benchmark.CHECKOUTS_PATH, self.config.force_checkout, self.config.use_tmp_wrkdir))
+        elif self.config.task == 'detect':
+            tasks.append(self.__get_collect_projects_task())
+            tasks.append(CollectVersionsTask(self.data_entity_lists, self.schedule))
+            tasks.append(self.__get_checkout_task())
             tasks.append(CompileTask(Benchmark.COMPILES_PATH, self.config.force_compile, self.config.use_tmp_wrkdir))
             tasks.append(
                 DetectTask(Benchmark.COMPILES_PATH, self.__get_experiment(), self.config.timeout,
                            self.config.force_detect))
-        elif config.task == 'publish':
-            if config.publish_task == 'findings':
-                tasks.append(CollectProjectsTask(benchmark.DATA_PATH, self.data_entity_lists))
-                tasks.append(CollectVersionsTask(self.data_entity_lists))
-                tasks.append(
-                    CheckoutTask(Benchmark.CHECKOUTS_PATH, self.config.force_checkout, self.config.use_tmp_wrkdir))
+        elif self.config.task == 'publish':
+            if self.config.publish_task == 'findings':
+                tasks.append(self.__get_collect_projects_task())
+                tasks.append(CollectVersionsTask(self.data_entity_lists, self.schedule))
+                tasks.append(self.__get_checkout_task())
                 tasks.append(
                     CompileTask(Benchmark.COMPILES_PATH, self.config.force_compile, self.config.use_tmp_wrkdir))
                 tasks.append(DetectTask(Benchmark.COMPILES_PATH, self.__get_experiment(), self.config.timeout,
@@ -105,30 +213,134 @@ class Benchmark:
                 tasks.append(PublishFindingsTask(self.__get_experiment(), self.config.dataset, Benchmark.COMPILES_PATH,
                                                  self.config.review_site_url, self.config.review_site_user,
                                                  self.config.review_site_password))
-            elif config.publish_task == 'metadata':
-                tasks.append(CollectProjectsTask(benchmark.DATA_PATH, self.data_entity_lists))
-                tasks.append(CollectVersionsTask(self.data_entity_lists))
-                tasks.append(
-                    CheckoutTask(Benchmark.CHECKOUTS_PATH, self.config.force_checkout, self.config.use_tmp_wrkdir))
+            elif self.config.publish_task == 'metadata':
+                tasks.append(self.__get_collect_projects_task())
+                tasks.append(CollectVersionsTask(self.data_entity_lists, self.schedule))
+                tasks.append(self.__get_checkout_task())
                 tasks.append(CollectMisusesTask(self.data_entity_lists))
                 tasks.append(
                     PublishMetadataTask(Benchmark.COMPILES_PATH, self.config.review_site_url,
                                         self.config.review_site_user,
                                         self.config.review_site_password))
-        elif config.task == 'stats':
-            tasks.append(CollectProjectsTask(benchmark.DATA_PATH, self.data_entity_lists))
-            tasks.append(CollectVersionsTask(self.data_entity_lists))
+        elif self.config.task == 'stats':
+            tasks.append(self.__get_collect_projects_task())
+            tasks.append(CollectVersionsTask(self.data_entity_lists, self.schedule))
             tasks.append(CollectMisusesTask(self.data_entity_lists))
             tasks.append(stats.get_calculator(self.config.script))
-        elif config.task == 'dataset-check':
-            tasks.append(CollectProjectsTask(benchmark.DATA_PATH, self.data_entity_lists))
-            tasks.append(CollectVersionsTask(self.data_entity_lists))
+        elif self.config.task == 'dataset-check':
+            tasks.append(self.__get_collect_projects_task())
+            tasks.append(CollectVersionsTask(self.data_entity_lists, self.schedule))
             tasks.append(CollectMisusesTask(self.data_entity_lists))
             tasks.append(
                 DatasetCheckTask(get_available_datasets(self.DATASETS_FILE_PATH), self.CHECKOUTS_PATH, self.DATA_PATH))
+        elif self.config.task == 'merge':
+            tasks.append(MergeFindingsTask(self.config.shard_findings_paths, Benchmark.FINDINGS_PATH))
+
+        runner = self.__get_task_runner(tasks)
+        trace_file = self.config.trace_file if 'trace_file' in self.config else None
+        profile_path = self.config.profile_path if 'profile_path' in self.config else None
+        if trace_file:
+            tracing.start()
+        if profile_path:
+            profiling.start()
+        try:
+            runner.run()
+        finally:
+            if trace_file:
+                tracing.stop(trace_file)
+                logger.info("Trace written to %s.", trace_file)
+            if profile_path:
+                profiling.stop(profile_path)
+                logger.info("Profiles written to %s.", profile_path)
+
+    def __print_plan(self):
+        workers = self.config.jobs
+        plan = self.schedule.plan(workers)
+        logger.info("Planned schedule of %d project version(s) on %d worker(s):", len(plan), workers)
+        for version, worker, start, end in plan:
+            logger.info("  %8.1fs - %8.1fs  worker %d  %s", start, end, worker + 1, version)
+        logger.info("Predicted total time: %.1fs", max([end for _, _, _, end in plan], default=0.0))
+
+    def __coordinate(self, host: str, port: int):
+        versions = self.schedule.versions if self.schedule else self.__get_versions()
+        queue = WorkQueue([version.id for version in versions], self.config.lease_timeout)
+        # workers that poll after the last item completed must still learn that we are done
+        with WorkQueueServer(queue, sys.argv[1:], host, port).serving(2 * WorkQueueClient.POLL_INTERVAL) as server:
+            logger.info("Coordinating %d project version(s) at %s...", len(versions), server.url)
+            while not queue.is_done():
+                time.sleep(1)
+        for version_id, reason in queue.failed.items():
+            logger.error("Project version %s failed: %s", version_id, reason)
+        logger.info("All project versions completed, %d failed.", len(queue.failed))
+
+    def __work(self):
+        client = WorkQueueClient(self.config.coordinator_url, "{}:{}".format(socket.gethostname(), os.getpid()))
+        worker_config = command_line_util.parse_args([sys.argv[0]] + client.get_arguments(), available_detectors,
+                                                     available_scripts, available_datasets)
+        worker_config.coordinate = None
+        worker_config.shard = None
+        worker_config.trace_file = None
+        worker_config.profile_path = None
+        # a lease runs only its item, which the coordinator ordered already
+        worker_config.longest_first = False
+        worker_config.plan = False
+        # the coordinator keeps track of the completed items
+        del worker_config.resume
+
+        dataset_index = None
+        while True:
+            lease = client.lease()
+            if not lease["lease"]:
+                if lease["done"]:
+                    break
+                time.sleep(WorkQueueClient.POLL_INTERVAL)
+                continue
+
+            item_config = argparse.Namespace(**vars(worker_config))
+            item_config.lease_item = lease["item"]
+            if dataset_index is None and item_config.task != 'merge':
+                dataset_index = self.__get_dataset_index()
+            try:
+                with client.keeping_alive(lease):
+                    Benchmark(item_config, dataset_index).run()
+            except Exception as e:
+                # an item that failed would fail again, on any worker
+                logger.exception("Failed to run %s.", lease["item"])
+                client.fail(lease["lease"], "{}: {}".format(type(e).__name__, e))
+                continue
+            client.complete(lease["lease"])
+
+        logger.info("All project versions completed.")
+
+    def __get_task_runner(self, tasks):
+        jobs = getattr(self.config, 'jobs', 1)
+        pipeline = getattr(self.config, 'pipeline', False)
+        stage_workers = dict(getattr(self.config, 'stage_workers', []))
+        use_async = getattr(self.config, 'use_async', False)
+        concurrency = getattr(self.config, 'concurrency', 1)
+        batch_size = getattr(self.config, 'batch_size', 1)
+
+        journal = self.__get_journal()
+        if use_async:
+            return AsyncTaskRunner(tasks, concurrency, journal=journal)
+        elif pipeline:
+            return PipelineTaskRunner(tasks, stage_workers, journal=journal)
+        elif jobs > 1:
+            return ParallelTaskRunner(tasks, jobs, journal=journal, batch_size=batch_size)
+        else:
+            return TaskRunner(tasks, journal, batch_size)
+
+    def __get_journal(self):
+        if 'resume' not in self.config:
+            return None
 
-        runner = TaskRunner(tasks)
-        runner.run()
+        # runs of different detectors or experiments must not start over each other's journal
+        experiment = getattr(self.config, 'experiment', None)
+        journal_name = "-".join(name for name in [self.config.task, getattr(self.config, 'publish_task', None),
+                                                  getattr(self.config, 'checkout_task', None),
+                                                  "ex{}".format(experiment) if experiment else None,
+                                                  getattr(self.config, 'detector', None)] if name)
+        return Journal(join(Benchmark.JOURNALS_PATH, journal_name + ".journal"), self.config.resume)
 
     def __get_experiment(self):
         if self.config.experiment == 1:
@@ -181,3 +393,4 @@ for key in config.__dict__:
 
 benchmark = Benchmark(config)
 benchmark.run()
+logger.debug("Parsed %d YAML file(s).", get_number_of_yaml_parses())
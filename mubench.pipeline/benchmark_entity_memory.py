@@ -0,0 +1,119 @@
+"""
+Measures the memory that the data entities of a synthetic dataset take, after the pipeline read the fields it uses
+from every project, version, and misuse, with and without the dataset index. The dataset mimics the misuses of the
+real dataset. Usage: `python benchmark_entity_memory.py [number of misuses]`.
+"""
+import gc
+import sys
+import tracemalloc
+from os.path import join
+from tempfile import mkdtemp
+
+from data import entity_registry
+from data.dataset_index import DatasetIndex
+from tasks.implementations.collect_projects import CollectProjectsTask
+from utils.data_entity_lists import DataEntityLists
+from utils.io import remove_tree, safe_write
+
+VERSIONS_PER_PROJECT = 10
+MISUSES_PER_VERSION = 10
+
+PROJECT_YML = """name: Project {project}
+repository:
+  type: git
+  url: https://example.org/{project}.git
+url: https://example.org/{project}/
+"""
+
+VERSION_YML = """build:
+  classes: $mvn.default.classes
+  commands:
+  - mvn compile
+  src: src/main/java/
+misuses:
+{misuses}
+revision: 1fe5439baf32af2114958e3cfc3512bd72c84{version:03d}~1
+"""
+
+MISUSE_YML = """api:
+- org.example.api.Type{misuse}
+characteristics:
+- missing/condition/null_check
+crash: true
+description: >
+  Type{misuse}.get() may return null, which the caller dereferences without a check.
+location:
+  file: org/example/project/Class{misuse}.java
+  method: "method{misuse}(Object, int, char)"
+fix:
+  commit: https://example.org/commits/1fe5439baf32af2114958e3cfc3512bd72c84{misuse:03d}
+  description: >
+    Check for null before using.
+  revision: 1fe5439baf32af2114958e3cfc3512bd72c84{misuse:03d}
+internal: false
+pattern:
+- single object
+report: https://issues.example.org/browse/PROJECT-{misuse}
+source:
+  name: Synthetic
+  url: https://example.org/synthetic
+"""
+
+
+def create_dataset(data_path: str, number_of_misuses: int):
+    number_of_projects = max(1, number_of_misuses // (VERSIONS_PER_PROJECT * MISUSES_PER_VERSION))
+    for project in range(number_of_projects):
+        project_path = join(data_path, "project{}".format(project))
+        safe_write(PROJECT_YML.format(project=project), join(project_path, "project.yml"), append=False)
+        for version in range(VERSIONS_PER_PROJECT):
+            misuse_ids = ["{}".format(version * MISUSES_PER_VERSION + misuse) for misuse in range(MISUSES_PER_VERSION)]
+            safe_write(VERSION_YML.format(version=version,
+                                          misuses="\n".join("- '{}'".format(misuse_id) for misuse_id in misuse_ids)),
+                       join(project_path, "versions", str(version), "version.yml"), append=False)
+            for misuse_id in misuse_ids:
+                safe_write(MISUSE_YML.format(misuse=int(misuse_id)),
+                           join(project_path, "misuses", misuse_id, "misuse.yml"), append=False)
+
+
+def load_entities(data_path: str, dataset_index: DatasetIndex = None):
+    projects = CollectProjectsTask(data_path, DataEntityLists([], []), dataset_index=dataset_index).run()
+    for project in projects:
+        project.repository
+        for version in project.versions:
+            version.source_dir, version.compile_commands, version.classes_dir, version.revision
+            for misuse in version.misuses:
+                misuse.location, misuse.description, misuse.fix, misuse.characteristics, misuse.apis
+                misuse.is_crash, misuse.source, misuse.patterns
+    return projects
+
+
+def measure(data_path: str, index_path: str = None) -> int:
+    """Returns the bytes that the entities, and the index, if any, take."""
+    entity_registry.invalidate()
+    gc.collect()
+    tracemalloc.start()
+    dataset_index = None
+    if index_path:
+        dataset_index = DatasetIndex(data_path, index_path)
+        dataset_index.update()
+    projects = load_entities(data_path, dataset_index)
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del projects
+    return size
+
+
+if __name__ == '__main__':
+    misuses = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    temp_path = mkdtemp(prefix="mubench-entity-memory_")
+    try:
+        create_dataset(join(temp_path, "data"), misuses)
+        index_file_path = join(temp_path, "index", "dataset.sqlite")
+        # the first update builds the index, the measured one reads it
+        DatasetIndex(join(temp_path, "data"), index_file_path).update()
+        for name, size in [("without index", measure(join(temp_path, "data"))),
+                           ("with index", measure(join(temp_path, "data"), index_file_path))]:
+            print("{}: {:.1f} MB, {:.0f} bytes per misuse".format(name, size / 1024 / 1024, size / misuses))
+    finally:
+        remove_tree(temp_path)
@@ -0,0 +1,78 @@
+"""
+Measures the TaskRunner's dispatch overhead per entity, on a chain shaped like the crossproject scripts' chains:
+projects, their versions, and their misuses, with a task that consumes all three. The tasks do no work, such that the
+measured time is the runner's own. Usage: `python benchmark_task_runner.py [number of misuses] [repetitions]`.
+"""
+import logging
+import sys
+import timeit
+from typing import List
+
+from tasks.task_runner import TaskRunner
+
+
+class Project:
+    def __init__(self, project_id: str):
+        self.id = project_id
+
+
+class Version:
+    def __init__(self, version_id: str):
+        self.id = version_id
+
+
+class Misuse:
+    def __init__(self, misuse_id: str):
+        self.id = misuse_id
+
+
+class CollectProjects:
+    def __init__(self, number_of_projects: int):
+        self.projects = [Project(str(index)) for index in range(number_of_projects)]
+
+    def run(self) -> List[Project]:
+        return self.projects
+
+
+class CollectVersions:
+    def __init__(self, versions_per_project: int):
+        self.versions = [Version(str(index)) for index in range(versions_per_project)]
+
+    def run(self, project: Project) -> List[Version]:
+        return self.versions
+
+
+class CollectMisuses:
+    def __init__(self, misuses_per_version: int):
+        self.misuses = [Misuse(str(index)) for index in range(misuses_per_version)]
+
+    def run(self, version: Version) -> List[Misuse]:
+        return self.misuses
+
+
+class ConsumeMisuse:
+    def __init__(self):
+        self.calls = 0
+
+    def run(self, project: Project, version: Version, misuse: Misuse):
+        self.calls += 1
+
+
+def measure(number_of_misuses: int, repetitions: int) -> float:
+    """Returns the best time per misuse, in microseconds."""
+    number_of_projects, versions_per_project = 100, 10
+    misuses_per_version = max(1, number_of_misuses // (number_of_projects * versions_per_project))
+    consume = ConsumeMisuse()
+    tasks = [CollectProjects(number_of_projects), CollectVersions(versions_per_project),
+             CollectMisuses(misuses_per_version), consume]
+
+    times = timeit.repeat(lambda: TaskRunner(tasks).run(), number=1, repeat=repetitions)
+    return min(times) / (consume.calls / repetitions) * 1000000
+
+
+if __name__ == '__main__':
+    # the runner logs every entity it runs a task on, which we do not want to measure
+    logging.disable(logging.INFO)
+    misuses = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    print("{:.2f} us per entity".format(measure(misuses, runs)))
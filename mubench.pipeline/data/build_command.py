@@ -54,6 +54,11 @@ class BuildCommand:
     def name() -> str:
         raise NotImplementedError
 
+    @staticmethod
+    def build_files() -> List[str]:
+        """The names of the files, in any directory of the project, that the command reads."""
+        return []
+
     def _get_command(self, args: List[str]) -> str:
         return ' '.join(shlex.quote(s) for s in [self._name] + self._prepare_args(args))
 
@@ -72,6 +77,10 @@ class MavenCommand(BuildCommand):
     def name() -> str:
         return "mvn"
 
+    @staticmethod
+    def build_files() -> List[str]:
+        return ["pom.xml"]
+
     def _prepare_args(self, args: List[str]) -> List[str]:
         return ["dependency:build-classpath", "-DincludeScope=compile"] + args
 
@@ -97,6 +106,10 @@ class GradleCommand(BuildCommand):
     def name() -> str:
         return "gradle"
 
+    @staticmethod
+    def build_files() -> List[str]:
+        return ["build.gradle", "settings.gradle"]
+
     def _prepare_args(self, args: List[str]) -> List[str]:
         return args + ["--debug"]
 
@@ -140,6 +153,10 @@ class AntCommand(BuildCommand):
     def name() -> str:
         return "ant"
 
+    @staticmethod
+    def build_files() -> List[str]:
+        return ["build.xml"]
+
     def _prepare_args(self, args: List[str]) -> List[str]:
         return ["-debug", "-verbose"] + args
 
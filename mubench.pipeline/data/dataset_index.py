@@ -0,0 +1,179 @@
+import logging
+import os
+import pickle
+import sqlite3
+from glob import glob
+from os import listdir, makedirs
+from os.path import join, exists, isdir, dirname, relpath
+from typing import Dict, List, Optional, Tuple, Set
+
+import yaml
+
+from utils.io import read_yaml
+
+
+class DatasetIndex:
+    """
+    A persistent index of the dataset's project, version, and misuse files and of the misuses' pattern files, such that
+    we parse the YAML files and search the pattern directories only when they change. The index is an SQLite database.
+    `update()` brings it up to date, re-reading only files whose modification time or size changed, and loads it into
+    memory, from where the data entities read. We keep the YAML files pickled in memory, which takes a fraction of the
+    memory of the parsed files, and unpickle them on read.
+    """
+    SCHEMA_VERSION = 1
+
+    def __init__(self, data_path: str, path: str):
+        self.data_path = data_path
+        self.path = path
+        self.__files = set()  # type: Set[str]
+        self.__yamls = {}  # type: Dict[str, bytes]
+        self.__patterns = {}  # type: Dict[str, List[str]]
+        self.__project_ids = []  # type: List[str]
+        self.__version_ids = {}  # type: Dict[str, List[str]]
+        self.__logger = logging.getLogger("dataset_index")
+
+    def update(self):
+        from data import entity_registry
+        from data.project import Project
+        from data.project_version import ProjectVersion
+        from data.misuse import Misuse
+
+        makedirs(dirname(self.path), exist_ok=True)
+        connection = sqlite3.connect(self.path)
+        try:
+            with connection:
+                self.__create_schema(connection)
+                synchronization = _Synchronization(self.data_path, connection, self.__logger)
+                self.__project_ids = []
+                self.__version_ids = {}
+                for project_id in sorted(listdir(self.data_path)) if exists(self.data_path) else []:
+                    if not synchronization.add_yaml(join(project_id, Project.PROJECT_FILE)):
+                        continue
+
+                    self.__project_ids.append(project_id)
+                    versions_path = join(project_id, Project.VERSIONS_DIR)
+                    self.__version_ids[project_id] = [
+                        version_id for version_id in self.__list_dir(versions_path)
+                        if synchronization.add_yaml(join(versions_path, version_id, ProjectVersion.VERSION_FILE))]
+
+                    misuses_path = join(project_id, Project.MISUSES_DIR)
+                    for misuse_id in self.__list_dir(misuses_path):
+                        if synchronization.add_yaml(join(misuses_path, misuse_id, Misuse.MISUSE_FILE)):
+                            synchronization.add_patterns(join(misuses_path, misuse_id, Misuse.PATTERNS_DIR))
+                synchronization.remove_others()
+        finally:
+            connection.close()
+
+        self.__files = synchronization.files
+        self.__yamls = synchronization.yamls
+        self.__patterns = synchronization.patterns
+        # entities built before may hold outdated files
+        entity_registry.invalidate(self.data_path)
+        self.__logger.debug("Read %d of %d dataset file(s), the others were indexed.",
+                            synchronization.number_of_reads, len(self.__files) + len(self.__patterns))
+
+    def __create_schema(self, connection: sqlite3.Connection):
+        schema_version = connection.execute("PRAGMA user_version").fetchone()[0]
+        if schema_version != DatasetIndex.SCHEMA_VERSION:
+            connection.execute("DROP TABLE IF EXISTS files")
+            connection.execute("PRAGMA user_version = {}".format(DatasetIndex.SCHEMA_VERSION))
+        connection.execute("CREATE TABLE IF NOT EXISTS files "
+                           "(path TEXT PRIMARY KEY, modified INTEGER, size INTEGER, content BLOB)")
+
+    def __list_dir(self, path: str) -> List[str]:
+        path = join(self.data_path, path)
+        return sorted(listdir(path)) if isdir(path) else []
+
+    def get_project_ids(self) -> List[str]:
+        return self.__project_ids
+
+    def get_version_ids(self, project_id: str) -> List[str]:
+        return self.__version_ids.get(project_id, [])
+
+    def exists(self, file_path: str) -> bool:
+        return self.__get_key(file_path) in self.__files
+
+    def read_yaml(self, file_path: str):
+        key = self.__get_key(file_path)
+        if key in self.__yamls:
+            return pickle.loads(self.__yamls[key])
+        return read_yaml(file_path)
+
+    def get_patterns(self, patterns_path: str) -> List[str]:
+        """Returns the paths of the pattern files, relative to the patterns directory."""
+        return self.__patterns.get(self.__get_key(patterns_path), [])
+
+    def __get_key(self, path: str) -> str:
+        return relpath(path, self.data_path)
+
+
+class _Synchronization:
+    # Pattern directories are indexed by the modification times of all their subdirectories, which change, when a
+    # pattern file is added, removed, or renamed.
+
+    def __init__(self, data_path: str, connection: sqlite3.Connection, logger: logging.Logger):
+        self.data_path = data_path
+        self.connection = connection
+        self.logger = logger
+        self.files = set()  # type: Set[str]
+        self.yamls = {}  # type: Dict[str, bytes]
+        self.patterns = {}  # type: Dict[str, List[str]]
+        self.number_of_reads = 0
+        self.__indexed = {path: (modified, size, content) for path, modified, size, content in
+                          connection.execute("SELECT path, modified, size, content FROM files")}
+
+    def add_yaml(self, key: str) -> bool:
+        stamp = self.__get_stamp(key)
+        if stamp is None:
+            return False
+
+        self.files.add(key)
+        indexed = self.__indexed.pop(key, None)
+        if indexed and indexed[:2] == stamp:
+            self.yamls[key] = indexed[2]
+        else:
+            try:
+                self.yamls[key] = self.__store(key, stamp, read_yaml(join(self.data_path, key)))
+            except yaml.YAMLError as error:
+                # we leave the file out of the index, such that reading it reports the error, as without the index
+                self.logger.debug("Not indexing %s: %s", key, error)
+        return True
+
+    def add_patterns(self, key: str):
+        path = join(self.data_path, key)
+        indexed = self.__indexed.pop(key, None)
+        if indexed:
+            directories, patterns = pickle.loads(indexed[2])
+            if all(self.__get_stamp(directory) == stamp for directory, stamp in directories.items()):
+                self.patterns[key] = patterns
+                return
+
+        if not isdir(path):
+            # we index the absence of the directory by the misuse directory's modification time
+            directories, patterns = {dirname(key): self.__get_stamp(dirname(key)), key: None}, []
+        else:
+            directories = {}
+            patterns = []
+            for directory, _, _ in os.walk(path):
+                directories[relpath(directory, self.data_path)] = self.__get_stamp(relpath(directory, self.data_path))
+                patterns.extend(relpath(pattern, path) for pattern in glob(join(directory, '*.java')))
+            patterns.sort()
+        self.patterns[key] = patterns
+        self.__store(key, (0, 0), (directories, patterns))
+
+    def remove_others(self):
+        self.connection.executemany("DELETE FROM files WHERE path = ?", [(key,) for key in self.__indexed])
+
+    def __store(self, key: str, stamp: Tuple[int, int], content) -> bytes:
+        self.number_of_reads += 1
+        pickled_content = pickle.dumps(content)
+        self.connection.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                                (key, stamp[0], stamp[1], pickled_content))
+        return pickled_content
+
+    def __get_stamp(self, key: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(join(self.data_path, key))
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
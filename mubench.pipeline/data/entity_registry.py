@@ -0,0 +1,51 @@
+"""
+An identity map of the process's projects, project versions, and misuses. Every entity is built once, such that all
+users share it and, with it, its parsed YAML file. The map holds the entities weakly, such that it keeps no entity alive
+that nobody uses anymore. `invalidate()` drops entities, e.g., after their files changed, such that they are built anew
+on the next request.
+"""
+from threading import RLock
+from typing import Tuple, Callable
+from weakref import WeakValueDictionary
+
+from data.dataset_index import DatasetIndex
+
+_ENTITIES = WeakValueDictionary()  # type: WeakValueDictionary
+# building a version builds its project, hence, the lock is reentrant
+_LOCK = RLock()
+
+
+def get_project(base_path: str, project_id: str, dataset_index: DatasetIndex = None):
+    from data.project import Project
+    return _get(("project", base_path, project_id), lambda: Project(base_path, project_id, dataset_index))
+
+
+def get_version(base_path: str, project_id: str, version_id: str, dataset_index: DatasetIndex = None):
+    from data.project_version import ProjectVersion
+    return _get(("version", base_path, project_id, version_id),
+                lambda: ProjectVersion(base_path, project_id, version_id, dataset_index))
+
+
+def get_misuse(base_path: str, project_id: str, version_id: str, misuse_id: str, dataset_index: DatasetIndex = None):
+    from data.misuse import Misuse
+    return _get(("misuse", base_path, project_id, version_id, misuse_id),
+                lambda: Misuse(base_path, project_id, version_id, misuse_id, dataset_index))
+
+
+def invalidate(base_path: str = None, project_id: str = None):
+    """
+    Drops the entities of the project, of all projects in the base path, if no project is given, or all entities, if
+    neither is given.
+    """
+    with _LOCK:
+        for key in list(_ENTITIES.keys()):
+            if (base_path is None or key[1] == base_path) and (project_id is None or key[2] == project_id):
+                _ENTITIES.pop(key, None)
+
+
+def _get(key: Tuple[str, ...], create: Callable[[], object]):
+    with _LOCK:
+        entity = _ENTITIES.get(key)
+        if entity is None:
+            entity = _ENTITIES[key] = create()
+        return entity
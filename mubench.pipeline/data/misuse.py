@@ -1,12 +1,14 @@
 import os
 from glob import glob
+from sys import intern
 from os.path import isdir, isfile, join
 from typing import Set, List
 
-import yaml
-
+from data import entity_registry
+from data.dataset_index import DatasetIndex
 from data.pattern import Pattern
 from data.snippets import get_snippets, Snippet
+from utils.io import read_yaml
 
 
 class Location:
@@ -29,97 +31,125 @@ class Fix:
 
 
 class Misuse:
+    """
+    A misuse of the dataset. We keep only the fields that the pipeline reads and read them all at once, on first
+    access, such that large datasets take little memory. We keep the entire misuse file only once someone asks for it.
+    """
     MISUSE_FILE = "misuse.yml"
+    PATTERNS_DIR = "patterns"
 
     @staticmethod
     def is_misuse(path: str) -> bool:
         return isfile(join(path, Misuse.MISUSE_FILE))
 
-    def __init__(self, base_path: str, project_id: str, version_id: str, misuse_id: str):
+    def __init__(self, base_path: str, project_id: str, version_id: str, misuse_id: str,
+                 dataset_index: DatasetIndex = None):
         self._base_path = base_path
-        self.project_id = project_id
-        self.version_id = version_id
-        self.misuse_id = misuse_id
-        self.id = "{}.{}.{}".format(project_id, version_id, misuse_id)
+        self._dataset_index = dataset_index
+        self.project_id = intern(project_id)
+        self.version_id = intern(version_id)
+        self.misuse_id = intern(misuse_id)
+        self.id = intern("{}.{}.{}".format(project_id, version_id, misuse_id))
 
         from data.project import Project
-        self.__project = Project(base_path, project_id)
+        self.__project = entity_registry.get_project(base_path, project_id, dataset_index)  # type: Project
 
         self.path = join(self.__project.path, Project.MISUSES_DIR, misuse_id)
-        self.misuse_file = join(self.path, Misuse.MISUSE_FILE)
-
-        self.__location = None
-        self.__fix = None
 
+        self.__is_loaded = False
         self._YAML = None
-        self._PATTERNS = []
+        self._PATTERNS = None
+
+    @property
+    def misuse_file(self) -> str:
+        return join(self.path, Misuse.MISUSE_FILE)
 
     @property
     def _yaml(self):
-        if not self._YAML:
-            with open(self.misuse_file, 'r') as stream:
-                self._YAML = yaml.load(stream)
+        if self._YAML is None:
+            self._YAML = self.__read_yaml()
         return self._YAML
 
+    def __read_yaml(self):
+        if self._YAML is not None:
+            return self._YAML
+        elif self._dataset_index:
+            return self._dataset_index.read_yaml(self.misuse_file)
+        else:
+            return read_yaml(self.misuse_file)
+
+    def __load(self):
+        if self.__is_loaded:
+            return
+
+        misuse_yml = self.__read_yaml()
+        location = misuse_yml.get("location")
+        self.__location = None if location is None else Location(location.get("file", ""), location.get("method", ""))
+        self.__description = misuse_yml.get("description", "")
+        fix = misuse_yml.get("fix", {})
+        self.__fix = Fix(fix.get("description", ""), fix.get("commit", ""), str(fix.get("revision", "")))
+        self.__crash = misuse_yml.get("crash")
+        source = misuse_yml.get("source")
+        self.__source = None if source is None else source.get("name")
+        self.__apis = misuse_yml.get("api", [])
+        self.__characteristics = misuse_yml.get("characteristics", [])
+        self.__is_loaded = True
+
     @property
     def patterns(self) -> Set[Pattern]:
-        if not self._PATTERNS:
-            pattern_path = join(self.path, "patterns")
-            if isdir(pattern_path):
-                self._PATTERNS = set(
+        if self._PATTERNS is None:
+            pattern_path = join(self.path, Misuse.PATTERNS_DIR)
+            if self._dataset_index:
+                patterns = set(Pattern(pattern_path, pattern)
+                               for pattern in self._dataset_index.get_patterns(pattern_path))
+            elif isdir(pattern_path):
+                patterns = set(
                     [Pattern(pattern_path, y[len(pattern_path) + 1:]) for x in os.walk(pattern_path) for y in
                      glob(os.path.join(x[0], '*.java'))])
             else:
-                self._PATTERNS = set()
+                patterns = set()
+            self._PATTERNS = patterns
 
         return self._PATTERNS
 
     @property
     def location(self) -> Location:
-        if not self.__location:
-            location = self._yaml["location"]
-            self.__location = Location(location.get("file", ""), location.get("method", ""))
+        self.__load()
+        if self.__location is None:
+            raise KeyError("location")
         return self.__location
 
     @property
     def description(self) -> str:
-        if getattr(self, '_DESCRIPTION', None) is None:
-            description = self._yaml.get("description", "")
-            self._DESCRIPTION = description
-        return self._DESCRIPTION
+        self.__load()
+        return self.__description
 
     @property
     def fix(self) -> Fix:
-        if not self.__fix:
-            fix = self._yaml.get("fix", {})
-            self.__fix = Fix(fix.get("description", ""), fix.get("commit", ""), str(fix.get("revision", "")))
+        self.__load()
         return self.__fix
 
     @property
     def is_crash(self) -> bool:
-        if getattr(self, '_IS_CRASH', None) is None:
-            self._IS_CRASH = self._yaml["crash"]
-        return self._IS_CRASH
+        self.__load()
+        if self.__crash is None:
+            raise KeyError("crash")
+        return self.__crash
 
     @property
     def source(self):
-        if getattr(self, '_source', None) is None:
-            source_key = self._yaml.get('source', None)
-            if source_key is not None:
-                self._source = source_key.get('name', None)
-        return self._source
+        self.__load()
+        return self.__source
 
     @property
     def apis(self):
-        if getattr(self, '_apis', None) is None:
-            self._apis = self._yaml.get('api', [])
-        return self._apis
+        self.__load()
+        return self.__apis
 
     @property
     def characteristics(self):
-        if getattr(self, '_characteristics', None) is None:
-            self._characteristics = self._yaml.get('characteristics', [])
-        return self._characteristics
+        self.__load()
+        return self.__characteristics
 
     def get_snippets(self, source_base_path: str) -> List[Snippet]:
         return get_snippets(source_base_path, self.location.file, self.location.method)
@@ -4,12 +4,20 @@ from os.path import join, dirname, basename, splitext
 
 
 class Pattern:
+    __slots__ = ["basepath", "__relative_pattern_path", "path"]
+
     def __init__(self, basepath: str, relative_pattern_path: str):
         self.basepath = basepath
         self.__relative_pattern_path = relative_pattern_path
         self.path = join(basepath, relative_pattern_path)
-        self.orig_dir = dirname(self.path)
-        self.name = splitext(basename(self.__relative_pattern_path))[0]
+
+    @property
+    def orig_dir(self) -> str:
+        return dirname(self.path)
+
+    @property
+    def name(self) -> str:
+        return splitext(basename(self.__relative_pattern_path))[0]
 
     def __hash__(self):
         return hash(self.path)
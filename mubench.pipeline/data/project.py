@@ -2,10 +2,11 @@ from os import listdir
 from os.path import join, exists
 from typing import List, Dict, Any, Optional
 
-import yaml
-
+from data import entity_registry
+from data.dataset_index import DatasetIndex
 from data.project_version import ProjectVersion
 from data.repository import Repository
+from utils.io import read_yaml
 
 
 class Project:
@@ -13,8 +14,9 @@ class Project:
     VERSIONS_DIR = "versions"
     MISUSES_DIR = "misuses"
 
-    def __init__(self, base_path: str, id: str):
+    def __init__(self, base_path: str, id: str, dataset_index: DatasetIndex = None):
         self._base_path = base_path
+        self._dataset_index = dataset_index
         self.id = id
         self.path = join(base_path, id)
         self._versions_path = join(self.path, Project.VERSIONS_DIR)  # type: str
@@ -30,8 +32,10 @@ class Project:
     @property
     def _yaml(self) -> Dict[str, Any]:
         if not self._YAML:
-            with open(self._project_file) as project_file:
-                project_yml = yaml.load(project_file)
+            if self._dataset_index:
+                project_yml = self._dataset_index.read_yaml(self._project_file)
+            else:
+                project_yml = read_yaml(self._project_file)
             self._YAML = project_yml
         return self._YAML
 
@@ -53,8 +57,11 @@ class Project:
     @property
     def versions(self) -> List[ProjectVersion]:
         if not self._VERSIONS:
-            if exists(self._versions_path):
-                self._VERSIONS = [ProjectVersion(self._base_path, self.id, subdir) for subdir in
+            if self._dataset_index:
+                self._VERSIONS = [entity_registry.get_version(self._base_path, self.id, version_id, self._dataset_index)
+                                  for version_id in self._dataset_index.get_version_ids(self.id)]
+            elif exists(self._versions_path):
+                self._VERSIONS = [entity_registry.get_version(self._base_path, self.id, subdir) for subdir in
                                   listdir(self._versions_path) if
                                   ProjectVersion.is_project_version(join(self._versions_path, subdir))]
         return self._VERSIONS
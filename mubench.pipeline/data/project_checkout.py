@@ -1,36 +1,171 @@
+import asyncio
+import hashlib
 import logging
-from os import listdir, makedirs
-from os.path import join, exists
-from zipfile import ZipFile
-
-from utils.io import copy_tree, remove_tree
+import os
+import re
+import shutil
+from os import listdir, makedirs, rename, remove
+from os.path import join, exists, relpath, dirname, abspath
+from tempfile import mkdtemp, mkstemp
+from typing import Tuple, List, Optional, Dict
+
+import yaml
+
+from data.snapshot_cache import SnapshotCache
+from utils.io import copy_tree, remove_tree, lock_file, extract_zip, read_yaml, write_yaml
 from utils.shell import Shell
 from utils.web_util import download_file
 
 
 class ProjectCheckout:
+    """
+    A manifest next to the checkout directory, `<checkout>.manifest`, records what the checkout holds, i.e., the URL,
+    the revision, and the hash of the checked-out tree, if the VCS has one. We write the manifest before we create the
+    checkout and mark it complete after, such that `exists()` needs to read only the manifest, instead of asking the
+    VCS, and an interrupted creation does not pass for a checkout. `verify()` asks the VCS, too. Checkouts created by
+    former versions of MUBench have no manifest, until we migrate them.
+
+    If there is a `snapshot_cache`, a checkout restores its files from a snapshot there, if any, instead of fetching
+    them, and stores a snapshot of its files there, after fetching them. A restored checkout has no version-control
+    metadata, which its manifest records.
+    """
+    SNAPSHOT_EXCLUDES = [".git", ".svn"]
+    MANIFEST_EXTENSION = ".manifest"
+
     def __init__(self, url: str, base_path: str, name: str):
         self._logger = logging.getLogger("checkout.project")
         self.url = url
         self.base_path = base_path
         self.name = name
         self.checkout_dir = join(self.base_path, name, "checkout")
+        self.snapshot_cache = None  # type: Optional[SnapshotCache]
 
     def exists(self) -> bool:
-        raise NotImplementedError
+        manifest = self.__read_manifest()
+        if manifest is None:
+            return self._exists()
+        return self.__is_complete(manifest) and exists(self.checkout_dir)
+
+    def verify(self) -> bool:
+        """Whether the checkout exists and the VCS confirms that it holds the manifest's tree, which takes longer."""
+        manifest = self.__read_manifest()
+        if manifest is None:
+            return self._exists()
+        if not self.__is_complete(manifest) or not exists(self.checkout_dir):
+            return False
+        if manifest.get("snapshot"):
+            return bool(listdir(self.checkout_dir))
+        return self._verify() and manifest.get("tree") == self._get_tree_hash()
 
     def create(self) -> None:
-        raise NotImplementedError
+        self.__start_manifest()
+        is_restored = self.__restore()
+        if not is_restored:
+            self._create()
+            self.__store()
+        self.__complete_manifest(is_restored)
+
+    async def create_async(self) -> None:
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self.__start_manifest)
+        is_restored = await loop.run_in_executor(None, self.__restore)
+        if not is_restored:
+            await self._create_async()
+            await loop.run_in_executor(None, self.__store)
+        await loop.run_in_executor(None, self.__complete_manifest, is_restored)
 
     def delete(self) -> None:
+        remove_tree(self.__get_manifest_file())
+        self._delete()
+
+    def migrate(self) -> None:
+        """Brings an existing checkout, created by an earlier version of MUBench, to the current layout."""
+        self._migrate()
+        if self.__read_manifest() is None and self._exists():
+            self._logger.debug("Write manifest of %s", self.checkout_dir)
+            self.__complete_manifest(is_restored=False)
+
+    def _get_manifest(self) -> Dict[str, str]:
+        """Identifies what the checkout holds, such that a checkout of something else does not pass for it."""
+        return {"url": self.url}
+
+    def _get_tree_hash(self) -> Optional[str]:
+        return None
+
+    def _get_snapshot_identity(self) -> Optional[str]:
+        """Identifies the files of the checkout, for the snapshot cache, or returns None, if they may change."""
+        return None
+
+    def _exists(self) -> bool:
+        """Whether a checkout without a manifest exists, by asking the VCS."""
+        raise NotImplementedError
+
+    def _verify(self) -> bool:
+        return self._exists()
+
+    def _create(self) -> None:
+        raise NotImplementedError
+
+    async def _create_async(self) -> None:
+        await asyncio.get_event_loop().run_in_executor(None, self._create)
+
+    def _delete(self) -> None:
         raise NotImplementedError
 
+    def _migrate(self) -> None:
+        pass
+
+    def __get_manifest_file(self) -> str:
+        return self.checkout_dir + ProjectCheckout.MANIFEST_EXTENSION
+
+    def __read_manifest(self) -> Optional[Dict]:
+        manifest_file = self.__get_manifest_file()
+        if not exists(manifest_file):
+            return None
+        try:
+            manifest = read_yaml(manifest_file)
+        except yaml.YAMLError:
+            # a manifest that we did not finish writing
+            return {}
+        return manifest if isinstance(manifest, dict) else {}
+
+    def __is_complete(self, manifest: Dict) -> bool:
+        return bool(manifest.get("complete")) and \
+               all(manifest.get(key) == value for key, value in self._get_manifest().items())
+
+    def __start_manifest(self):
+        if exists(self.__get_manifest_file()):
+            # the checkout is incomplete or holds something else
+            self._logger.debug("Delete outdated checkout %s", self.checkout_dir)
+            remove_tree(self.checkout_dir)
+        write_yaml(self._get_manifest(), self.__get_manifest_file())
+
+    def __complete_manifest(self, is_restored: bool):
+        manifest = self._get_manifest()
+        if is_restored:
+            manifest["snapshot"] = True
+        else:
+            manifest["tree"] = self._get_tree_hash()
+        manifest["complete"] = True
+        write_yaml(manifest, self.__get_manifest_file())
+
+    def __restore(self) -> bool:
+        identity = self._get_snapshot_identity()
+        if self.snapshot_cache is None or identity is None:
+            return False
+        return self.snapshot_cache.restore(identity, self.checkout_dir)
+
+    def __store(self):
+        identity = self._get_snapshot_identity()
+        if self.snapshot_cache is not None and identity is not None:
+            self.snapshot_cache.store(identity, self.checkout_dir, self.SNAPSHOT_EXCLUDES)
+
 
 class LocalProjectCheckout(ProjectCheckout):
-    def exists(self):
+    def _exists(self):
         return exists(self.checkout_dir) and listdir(self.checkout_dir)
 
-    def create(self):
+    def _create(self):
         if not exists(self.checkout_dir):
             self._logger.debug("Create checkout directory %s", self.checkout_dir)
             makedirs(self.checkout_dir)
@@ -38,7 +173,7 @@ class LocalProjectCheckout(ProjectCheckout):
             self._logger.debug("Copy from %s", self.url)
             copy_tree(self.url, self.checkout_dir)
 
-    def delete(self):
+    def _delete(self):
         self._logger.debug("Delete %s", self.checkout_dir)
         remove_tree(self.checkout_dir)
 
@@ -52,14 +187,14 @@ class SyntheticProjectCheckout(ProjectCheckout):
         self.name = name
         self.version = version
 
-    def exists(self) -> bool:
+    def _exists(self) -> bool:
         return exists(self.checkout_dir)
 
-    def delete(self) -> None:
+    def _delete(self) -> None:
         self._logger.debug("Delete %s", self.checkout_dir)
         remove_tree(self.checkout_dir)
 
-    def create(self) -> None:
+    def _create(self) -> None:
         if not exists(self.checkout_dir):
             self._logger.debug("Create checkout directory %s", self.checkout_dir)
             makedirs(self.checkout_dir)
@@ -69,6 +204,11 @@ class SyntheticProjectCheckout(ProjectCheckout):
 
 
 class ZipProjectCheckout(ProjectCheckout):
+    """
+    Downloads the bundle once and keeps its extracted files in `<version>/bundle/<checksum>`, from where we copy them
+    to the checkout, also when we re-create an incomplete checkout. Deleting the checkout deletes the bundle, too.
+    """
+
     def __init__(self, revision_url: str, md5_checksum: str, base_path: str, name: str, version: str):
         super().__init__(revision_url, base_path, name)
         self.md5_checksum = md5_checksum
@@ -77,18 +217,43 @@ class ZipProjectCheckout(ProjectCheckout):
         self.__child = LocalProjectCheckout(self.checkout_dir, join(self.base_path, self.name), self.version)
         self.checkout_dir = self.__child.checkout_dir
 
-    def delete(self) -> None:
+    def _delete(self) -> None:
+        bundle_dir = self.__get_bundle_dir()
+        self._logger.debug("Delete %s and %s", self.checkout_dir, bundle_dir)
         remove_tree(self.checkout_dir)
-
-    def create(self) -> None:
-        makedirs(self.checkout_dir, exist_ok=True)
-        bundle_file = join(self.checkout_dir, "bundle.zip")
-        download_file(self.url, bundle_file, self.md5_checksum)
-        with ZipFile(bundle_file) as zip_file:
-            zip_file.extractall(self.checkout_dir)
-
-    def exists(self) -> bool:
-        return exists(self.checkout_dir) and len(listdir(self.checkout_dir)) > 1
+        remove_tree(bundle_dir)
+
+    def _create(self) -> None:
+        bundle_dir = self.__get_bundle_dir()
+        if not exists(bundle_dir):
+            makedirs(dirname(bundle_dir), exist_ok=True)
+            bundle_file = bundle_dir + ".zip"
+            self._logger.debug("Download %s", self.url)
+            download_file(self.url, bundle_file, self.md5_checksum)
+            # we extract next to the bundle directory and rename, such that it never holds a partial extraction
+            temp_dir = mkdtemp(prefix=".bundle-", dir=dirname(bundle_dir))
+            try:
+                extract_zip(bundle_file, temp_dir)
+                rename(temp_dir, bundle_dir)
+            finally:
+                remove_tree(temp_dir)
+            remove(bundle_file)
+
+        self._logger.debug("Copy from %s", bundle_dir)
+        copy_tree(bundle_dir, self.checkout_dir)
+
+    def _exists(self) -> bool:
+        return exists(self.checkout_dir) and bool(listdir(self.checkout_dir))
+
+    def __get_bundle_dir(self) -> str:
+        key = self.md5_checksum or hashlib.sha256(self.url.encode("utf-8")).hexdigest()
+        return join(self.base_path, self.name, self.version, "bundle", key)
+
+    def _get_manifest(self) -> Dict[str, str]:
+        return {"url": self.url, "md5": self.md5_checksum}
+
+    def _get_snapshot_identity(self) -> Optional[str]:
+        return "zip:{}:{}".format(self.url, self.md5_checksum) if self.md5_checksum else None
 
     def __str__(self):
         return "zip:{}:{}".format(self.name, self.url)
@@ -99,78 +264,441 @@ class RepoProjectCheckout(ProjectCheckout):
         super(RepoProjectCheckout, self).__init__(url, base_path, name)
         self.version = version
         self.revision = revision
-        self.__base_checkout_dir = self.checkout_dir
+        self._base_checkout_dir = self.checkout_dir
         self.__child = LocalProjectCheckout(self.checkout_dir, join(self.base_path, self.name), self.version)
         self.checkout_dir = self.__child.checkout_dir
 
-    def exists(self):
-        return self.__child.exists() and self._is_repo(self.checkout_dir)
+    def _get_manifest(self) -> Dict[str, str]:
+        return {"url": self.url, "revision": str(self.revision)}
 
-    def create(self):
-        if not self._is_repo(self.__base_checkout_dir):
-            self._logger.debug("Create base checkout directory %s", self.__base_checkout_dir)
-            makedirs(self.__base_checkout_dir, exist_ok=True)
-            self._logger.debug("Clone from %s", self)
-            self._clone(self.url, self.revision, self.__base_checkout_dir)
+    def _exists(self):
+        return self.__child._exists() and self._is_repo(self.checkout_dir)
+
+    def _create(self):
+        self.__create_base()
 
         if not self._is_repo(self.__child.checkout_dir):
-            self.__child.create()
+            self._create_from_base(self._base_checkout_dir, self.__child.checkout_dir)
             self._logger.debug("Update to revision %s", self.revision)
             self._update(self.url, self.revision, self.__child.checkout_dir)
 
-    def delete(self):
-        self._logger.debug("Delete %s", self.__base_checkout_dir)
-        remove_tree(self.__base_checkout_dir)
-        self.__child.delete()
+    async def _create_async(self):
+        # waiting for the lock blocks, hence, we wait on another thread
+        await asyncio.get_event_loop().run_in_executor(None, self.__create_base)
+
+        if not await self._is_repo_async(self.__child.checkout_dir):
+            await self._create_from_base_async(self._base_checkout_dir, self.__child.checkout_dir)
+            self._logger.debug("Update to revision %s", self.revision)
+            await self._update_async(self.url, self.revision, self.__child.checkout_dir)
+
+    def _delete(self):
+        # the checkouts of the other versions borrow from the base checkout, hence, we keep it
+        self.__child._delete()
+
+    def __create_base(self):
+        # all versions of the project share the base checkout, which concurrent checkouts of versions, in this or other
+        # processes, must create only once
+        with lock_file(self._base_checkout_dir + ".lock"):
+            if not self._is_base_repo(self._base_checkout_dir):
+                # a corrupt base checkout is re-initialized in place, since other checkouts may borrow from it
+                self._logger.debug("Create base checkout directory %s", self._base_checkout_dir)
+                makedirs(self._base_checkout_dir, exist_ok=True)
+                self._logger.debug("Clone from %s", self)
+                self._clone(self.url, self.revision, self._base_checkout_dir)
+            self._fetch(self.url, self.revision, self._base_checkout_dir)
 
     def _clone(self, url: str, revision: str, path: str):
         raise NotImplementedError
 
+    def _fetch(self, url: str, revision: str, path: str):
+        pass
+
+    def _create_from_base(self, base_path: str, path: str):
+        self.__child._create()
+
     def _update(self, url: str, revision: str, path: str):
         raise NotImplementedError
 
+    def _is_base_repo(self, path: str) -> bool:
+        return self._is_repo(path)
+
     def _is_repo(self, path: str) -> bool:
         raise NotImplementedError
 
+    async def _create_from_base_async(self, base_path: str, path: str):
+        self._create_from_base(base_path, path)
+
+    async def _update_async(self, url: str, revision: str, path: str):
+        raise NotImplementedError
+
+    async def _is_repo_async(self, path: str) -> bool:
+        raise NotImplementedError
+
     def __str__(self):
         raise NotImplementedError
 
 
 class GitProjectCheckout(RepoProjectCheckout):
+    """
+    All versions of a project share one bare repository, `<project>/repository.git`. We fetch into it only the commit
+    of each version's revision, with the history that the revision needs, e.g., two commits for `<sha>~1`, and keep
+    it under `refs/revisions/`. If the remote refuses to serve a commit by its id, we fetch the remote's entire history
+    instead. Each version's checkout is a repository that borrows its objects from the shared one, via a relative path
+    in `.git/objects/info/alternates`, such that we may move or copy the entire checkouts directory.
+
+    A sparse checkout contains only the files that match the `sparse_paths` patterns, which follow the `.gitignore`
+    syntax. The shared repository then fetches no file contents (`--filter=blob:none`), but each checkout fetches the
+    contents of its files, on checkout.
+
+    With a `bundles_path`, we fetch a revision that the shared repository lacks from the project's bundle in that
+    directory, `<project>.bundle`, if it has the revision, instead of from the remote. `export_bundle()` writes such
+    bundles, with a list of the shallow history's boundary commits next to them, `<project>.shallow`, which the shared
+    repository needs to accept a bundle of shallow history.
+    """
+    REPOSITORY_DIR = "repository.git"
+    BUNDLE_EXTENSION = ".bundle"
+    SHALLOW_EXTENSION = ".shallow"
+    REVISION = re.compile(r"^(?P<name>.+?)(?P<ancestor>~(?P<generations>\d*))?$")
+    COMMIT_ID = re.compile(r"^[0-9a-fA-F]{7,40}$")
+
+    def __init__(self, url: str, base_path: str, name: str, version: str, revision: str,
+                 sparse_paths: List[str] = None, bundles_path: str = None):
+        super().__init__(url, base_path, name, version, revision)
+        self.sparse_paths = sparse_paths
+        self.bundles_path = bundles_path
+        self._base_checkout_dir = join(self.base_path, self.name, GitProjectCheckout.REPOSITORY_DIR)
+
+    def _migrate(self):
+        """
+        Migrates from the former layout, with a full clone of the project in `<project>/checkout` and a full copy of it
+        for each version, to the shared repository. The clone becomes the shared repository and the copies drop all
+        objects that the shared repository has.
+        """
+        former_base_checkout_dir = join(self.base_path, self.name, "checkout")
+        if not self._is_base_repo(self._base_checkout_dir) and self._is_repo(former_base_checkout_dir):
+            self._logger.debug("Migrate %s to shared repository %s", former_base_checkout_dir, self._base_checkout_dir)
+            rename(join(former_base_checkout_dir, ".git"), self._base_checkout_dir)
+            Shell.exec("git config core.bare true", cwd=self._base_checkout_dir, logger=self._logger)
+            # the copies drop loose objects only if the shared repository has them packed
+            Shell.exec("git repack -a -d -q", cwd=self._base_checkout_dir, logger=self._logger)
+            remove_tree(former_base_checkout_dir)
+
+        if self._is_base_repo(self._base_checkout_dir) and self._is_repo(self.checkout_dir) and \
+                not exists(self.__get_alternates_file(self.checkout_dir)):
+            self._logger.debug("Migrate %s to borrow from shared repository", self.checkout_dir)
+            self.__write_alternates(self._base_checkout_dir, self.checkout_dir)
+            Shell.exec("git repack -a -d -l -q", cwd=self.checkout_dir, logger=self._logger)
+            Shell.exec("git prune-packed", cwd=self.checkout_dir, logger=self._logger)
+
+    def _get_manifest(self) -> Dict:
+        # a sparse checkout lacks files that a full one has, hence, the checkouts must not take each other's place
+        manifest = super()._get_manifest()
+        manifest["sparse_paths"] = list(self.sparse_paths) if self.sparse_paths else None
+        return manifest
+
+    def _get_tree_hash(self) -> Optional[str]:
+        return Shell.exec("git rev-parse \"HEAD^{tree}\"", cwd=self.checkout_dir, logger=self._logger).strip()
+
+    def _get_snapshot_identity(self) -> Optional[str]:
+        # branches and `HEAD` move, commit ids do not
+        name, _ = self.__parse_revision(self.revision)
+        if not GitProjectCheckout.COMMIT_ID.match(name):
+            return None
+        return "git:{}#{}:{}".format(self.url, self.revision, ",".join(self.sparse_paths or []))
+
     def _clone(self, url: str, revision: str, path: str):
-        Shell.exec("git clone {} . --quiet".format(url), cwd=path, logger=self._logger)
+        # re-initializing an existing repository keeps its objects and refs
+        Shell.exec("git init --bare --quiet", cwd=path, logger=self._logger)
+        if Shell.try_exec("git config --get remote.origin.url", cwd=path, logger=self._logger):
+            Shell.exec("git config remote.origin.url {}".format(url), cwd=path, logger=self._logger)
+        else:
+            Shell.exec("git remote add origin {}".format(url), cwd=path, logger=self._logger)
+
+    def _fetch(self, url: str, revision: str, path: str):
+        name, depth = self.__parse_revision(revision)
+        ref = self.__get_ref(name)
+        if self.__is_available(revision, path):
+            self._logger.debug("Revision %s is available", revision)
+            Shell.exec("git update-ref {} \"{}^{{commit}}\"".format(ref, name), cwd=path, logger=self._logger)
+            return
+
+        # the bundle has the revision under its ref, also if the revision is a branch or `HEAD`
+        if self.bundles_path and self.__fetch_bundle(path) and self.__is_available(ref + revision[len(name):], path):
+            self._logger.debug("Revision %s is available from bundle", revision)
+            return
+
+        is_shallow = exists(join(path, "shallow"))
+        is_empty = not Shell.exec("git for-each-ref --count=1", cwd=path, logger=self._logger).strip()
+        # deepening a complete history would make the repository shallow
+        depth_option = "--depth {} ".format(depth) if is_shallow or is_empty else ""
+        # filtering requires a named remote, which becomes the promisor of the missing file contents
+        filter_option = "--filter=blob:none " if self.sparse_paths else ""
+        Shell.exec("git config remote.origin.url {}".format(url), cwd=path, logger=self._logger)
+        self._logger.debug("Fetch revision %s from %s", revision, url)
+        if not Shell.try_exec("git fetch {}{}--quiet origin \"+{}:{}\"".format(depth_option, filter_option, name, ref),
+                              cwd=path, logger=self._logger):
+            self._logger.debug("Fetch entire history from %s", url)
+            unshallow_option = "--unshallow " if is_shallow else ""
+            Shell.exec("git fetch {}{}--quiet origin \"+refs/heads/*:refs/heads/*\" \"+refs/tags/*:refs/tags/*\""
+                       .format(unshallow_option, filter_option), cwd=path, logger=self._logger)
+            Shell.exec("git update-ref {} \"{}^{{commit}}\"".format(ref, name), cwd=path, logger=self._logger)
+
+    def export_bundle(self, revisions: List[str], bundles_path: str):
+        """
+        Writes the commits of the revisions, e.g., of all versions of the project, with the history they need, from the
+        shared repository to the project's bundle in the directory, replacing any former bundle of the project.
+        Revisions that the shared repository lacks are left out.
+        """
+        path = self._base_checkout_dir
+        if not self._is_base_repo(path):
+            self._logger.warning("Not bundling %s, which is not checked out.", self.name)
+            return
+
+        refs = set()
+        for revision in revisions:
+            name, _ = self.__parse_revision(revision)
+            ref = self.__get_ref(name)
+            if not self.__is_available(ref + revision[len(name):], path):
+                if not self.__is_available(revision, path):
+                    self._logger.warning("Not bundling revision %s of %s, which is not checked out.", revision,
+                                         self.name)
+                    continue
+                # checkouts by former versions of MUBench have no refs for their revisions
+                Shell.exec("git update-ref {} \"{}^{{commit}}\"".format(ref, name), cwd=path, logger=self._logger)
+            refs.add(ref)
+        if not refs:
+            return
+
+        makedirs(bundles_path, exist_ok=True)
+        bundle_file = self.__get_bundle_file(bundles_path)
+        self._logger.debug("Bundle %d revision(s) to %s", len(refs), bundle_file)
+        # we write the bundle next to its file and rename, such that the file never holds a partial bundle
+        file_descriptor, temp_file = mkstemp(prefix=".", suffix=".tmp", dir=bundles_path)
+        os.close(file_descriptor)
+        try:
+            Shell.exec("git bundle create --quiet \"{}\" {}".format(abspath(temp_file), " ".join(sorted(refs))),
+                       cwd=path, logger=self._logger)
+            os.replace(temp_file, bundle_file)
+        finally:
+            remove_tree(temp_file)
+
+        shallow_file = self.__get_shallow_file(bundles_path)
+        shallow_commits = self.__get_shallow_commits(path)
+        if shallow_commits:
+            bundled_commits = set(Shell.exec("git rev-list {}".format(" ".join(sorted(refs))), cwd=path,
+                                             logger=self._logger).split())
+            shallow_commits = [commit for commit in shallow_commits if commit in bundled_commits]
+        if shallow_commits:
+            with open(shallow_file, "w") as file:
+                file.write("\n".join(shallow_commits) + "\n")
+        else:
+            remove_tree(shallow_file)
+
+    def _create_from_base(self, base_path: str, path: str):
+        makedirs(path, exist_ok=True)
+        Shell.exec("git init --quiet", cwd=path, logger=self._logger)
+        self.__write_alternates(base_path, path)
+        self.__configure(base_path, path)
 
     def _update(self, url: str, revision: str, path: str):
-        Shell.exec("git checkout {} --quiet".format(revision), cwd=path, logger=self._logger)
+        commit = self.__resolve(revision)
+        Shell.exec("git checkout {} --quiet".format(commit), cwd=path, logger=self._logger)
+
+    def _is_base_repo(self, path: str):
+        return exists(path) and Shell.try_exec("git --git-dir=. rev-parse", cwd=path, logger=self._logger)
 
     def _is_repo(self, path: str):
         return exists(path) and Shell.try_exec("git status", cwd=path, logger=self._logger)
 
+    async def _create_from_base_async(self, base_path: str, path: str):
+        makedirs(path, exist_ok=True)
+        await Shell.exec_async("git init --quiet", cwd=path, logger=self._logger)
+        self.__write_alternates(base_path, path)
+        self.__configure(base_path, path)
+
+    async def _update_async(self, url: str, revision: str, path: str):
+        commit = self.__resolve(revision)
+        await Shell.exec_async("git checkout {} --quiet".format(commit), cwd=path, logger=self._logger)
+
+    async def _is_repo_async(self, path: str):
+        return exists(path) and await Shell.try_exec_async("git status", cwd=path, logger=self._logger)
+
+    @staticmethod
+    def __parse_revision(revision: str) -> Tuple[str, int]:
+        """Returns the name of the revision's commit, e.g., `<sha>` for `<sha>~1`, and the depth of history it needs."""
+        match = GitProjectCheckout.REVISION.match(revision)
+        generations = match.group("generations")
+        if match.group("ancestor") is None:
+            return revision, 1
+        return match.group("name"), (int(generations) if generations else 1) + 1
+
+    @staticmethod
+    def __get_ref(name: str) -> str:
+        return "refs/revisions/{}".format(name)
+
+    def __is_available(self, revision: str, path: str) -> bool:
+        return Shell.try_exec("git rev-parse --verify --quiet \"{}^{{commit}}\"".format(revision), cwd=path,
+                              logger=self._logger)
+
+    def __resolve(self, revision: str) -> str:
+        name, _ = self.__parse_revision(revision)
+        return Shell.exec("git rev-parse --verify \"{}{}^{{commit}}\"".format(
+            self.__get_ref(name), revision[len(name):]), cwd=self._base_checkout_dir, logger=self._logger).strip()
+
+    def __get_bundle_file(self, bundles_path: str) -> str:
+        return join(bundles_path, self.name + GitProjectCheckout.BUNDLE_EXTENSION)
+
+    def __get_shallow_file(self, bundles_path: str) -> str:
+        return join(bundles_path, self.name + GitProjectCheckout.SHALLOW_EXTENSION)
+
+    @staticmethod
+    def __get_shallow_commits(path: str) -> List[str]:
+        shallow_file = join(path, "shallow")
+        if not exists(shallow_file):
+            return []
+        with open(shallow_file) as file:
+            return file.read().split()
+
+    def __fetch_bundle(self, path: str) -> bool:
+        bundle_file = abspath(self.__get_bundle_file(self.bundles_path))
+        if not exists(bundle_file):
+            return False
+
+        shallow_file = self.__get_shallow_file(self.bundles_path)
+        if exists(shallow_file):
+            # the repository must know where the bundled history ends, before it accepts the bundle, except where it
+            # has the history already
+            with open(shallow_file) as file:
+                bundle_shallow_commits = [commit for commit in file.read().split() if not Shell.try_exec(
+                    "git cat-file -e {}^{{commit}}".format(commit), cwd=path, logger=self._logger)]
+            shallow_commits = self.__get_shallow_commits(path)
+            shallow_commits += [commit for commit in bundle_shallow_commits if commit not in shallow_commits]
+            if shallow_commits:
+                with open(join(path, "shallow"), "w") as file:
+                    file.write("\n".join(shallow_commits) + "\n")
+
+        self._logger.debug("Fetch from bundle %s", bundle_file)
+        return Shell.try_exec("git fetch --quiet \"{}\" \"+refs/revisions/*:refs/revisions/*\"".format(bundle_file),
+                              cwd=path, logger=self._logger)
+
+    def __configure(self, base_path: str, path: str):
+        if Shell.try_exec("git config --get remote.origin.promisor", cwd=base_path, logger=self._logger):
+            # the checkout fetches the file contents that the shared repository lacks
+            for key, value in [("core.repositoryformatversion", "1"), ("remote.origin.url", self.url),
+                               ("remote.origin.promisor", "true"), ("extensions.partialClone", "origin")]:
+                Shell.exec("git config {} {}".format(key, value), cwd=path, logger=self._logger)
+        if self.sparse_paths:
+            Shell.exec("git config core.sparseCheckout true", cwd=path, logger=self._logger)
+            with open(join(path, ".git", "info", "sparse-checkout"), "w") as file:
+                file.write("\n".join(self.sparse_paths) + "\n")
+
+    @staticmethod
+    def __get_alternates_file(path: str) -> str:
+        return join(path, ".git", "objects", "info", "alternates")
+
+    @staticmethod
+    def __write_alternates(base_path: str, path: str):
+        # git resolves relative alternates against the objects directory
+        alternates_file = GitProjectCheckout.__get_alternates_file(path)
+        makedirs(join(path, ".git", "objects", "info"), exist_ok=True)
+        with open(alternates_file, "w") as file:
+            file.write(relpath(join(base_path, "objects"), join(path, ".git", "objects")) + "\n")
+        # the checkout must know where the borrowed history ends
+        if exists(join(base_path, "shallow")):
+            shutil.copyfile(join(base_path, "shallow"), join(path, ".git", "shallow"))
+
     def __str__(self):
         return "git:{}#{}".format(self.url, self.revision[:8])
 
 
 class SVNProjectCheckout(ProjectCheckout):
-    def __init__(self, url: str, base_path: str, name: str, version: str, revision: str):
+    """
+    Checks out with `svn checkout` or, in export mode, exports the files only, with `svn export`. We keep the exports
+    of fixed revisions in `<project>/exports/<revision>`, such that the checkouts of all versions at the same revision
+    export only once. Deleting a checkout deletes the export of its revision, too.
+    """
+
+    def __init__(self, url: str, base_path: str, name: str, version: str, revision: str, export: bool = False):
         super().__init__(url, base_path, name)
         self.version = version
         self.revision = revision
-        self.__base_checkout_dir = self.checkout_dir
+        self.export = export
         self.checkout_dir = join(self.base_path, name, version, "checkout")
 
-    def create(self) -> None:
-        self._logger.debug("Create checkout directory %s", self.checkout_dir)
-        makedirs(self.checkout_dir, exist_ok=True)
-        self._logger.debug("Checkout from %s", self.url)
-        Shell.exec("svn checkout \"{}@{}\" .".format(self.url, self.revision), cwd=self.checkout_dir)
-        Shell.exec("svn upgrade", cwd=self.checkout_dir)
+    def _create(self) -> None:
+        if self.export:
+            self.__export()
+        else:
+            self._logger.debug("Create checkout directory %s", self.checkout_dir)
+            makedirs(self.checkout_dir, exist_ok=True)
+            self._logger.debug("Checkout from %s", self.url)
+            Shell.exec("svn checkout \"{}@{}\" .".format(self.url, self.revision), cwd=self.checkout_dir)
+            Shell.exec("svn upgrade", cwd=self.checkout_dir)
+
+    async def _create_async(self) -> None:
+        if self.export:
+            await asyncio.get_event_loop().run_in_executor(None, self.__export)
+        else:
+            self._logger.debug("Create checkout directory %s", self.checkout_dir)
+            makedirs(self.checkout_dir, exist_ok=True)
+            self._logger.debug("Checkout from %s", self.url)
+            await Shell.exec_async("svn checkout \"{}@{}\" .".format(self.url, self.revision), cwd=self.checkout_dir)
+            await Shell.exec_async("svn upgrade", cwd=self.checkout_dir)
 
-    def exists(self) -> bool:
-        return exists(self.checkout_dir) and Shell.try_exec("svn info", cwd=self.checkout_dir)
+    def _get_manifest(self) -> Dict[str, str]:
+        return {"url": self.url, "revision": str(self.revision)}
 
-    def delete(self) -> None:
-        self._logger.debug("Delete %s", self.__base_checkout_dir)
+    def _exists(self) -> bool:
+        return exists(join(self.checkout_dir, ".svn")) and Shell.try_exec("svn info", cwd=self.checkout_dir)
+
+    def _verify(self) -> bool:
+        # exports have no version-control metadata to ask
+        return self._exists() if exists(join(self.checkout_dir, ".svn")) else bool(listdir(self.checkout_dir))
+
+    def _delete(self) -> None:
+        self._logger.debug("Delete %s", self.checkout_dir)
         remove_tree(self.checkout_dir)
+        export_dir = self.__get_export_dir()
+        if self.__is_fixed_revision() and exists(export_dir):
+            # we export the revision anew, in case its export is corrupt
+            with lock_file(export_dir + ".lock"):
+                self._logger.debug("Delete %s", export_dir)
+                remove_tree(export_dir)
+
+    def _get_snapshot_identity(self) -> Optional[str]:
+        # revision numbers are immutable, other revisions, like `HEAD`, are not
+        return "svn:{}@{}".format(self.url, self.revision) if self.__is_fixed_revision() else None
+
+    def __export(self):
+        if not self.__is_fixed_revision():
+            self.__export_to(self.checkout_dir)
+            return
+
+        export_dir = self.__get_export_dir()
+        with lock_file(export_dir + ".lock"):
+            if not exists(export_dir):
+                self.__export_to(export_dir)
+        self._logger.debug("Copy from %s", export_dir)
+        copy_tree(export_dir, self.checkout_dir)
+
+    def __export_to(self, path: str):
+        self._logger.debug("Export from %s", self.url)
+        makedirs(dirname(path), exist_ok=True)
+        # we export next to the path and rename, such that the path never holds a partial export
+        temp_dir = mkdtemp(prefix=".export-", dir=dirname(path))
+        try:
+            Shell.exec("svn export --quiet --force \"{}@{}\" .".format(self.url, self.revision), cwd=temp_dir,
+                       logger=self._logger)
+            remove_tree(path)
+            rename(temp_dir, path)
+        finally:
+            remove_tree(temp_dir)
+
+    def __get_export_dir(self) -> str:
+        return join(self.base_path, self.name, "exports", str(self.revision))
+
+    def __is_fixed_revision(self) -> bool:
+        return str(self.revision).isdigit()
 
     def __str__(self):
         return "svn:{}@{}".format(self.url, self.revision)
@@ -1,9 +1,9 @@
 import os
-from os.path import join, isdir
-from typing import List
+from os.path import join, isdir, exists
+from typing import List, Optional
 
 from data.misuse import Misuse
-from utils.io import remove_tree
+from utils.io import remove_tree, read_yaml_if_exists, write_yaml
 
 
 class ProjectCompile:
@@ -14,6 +14,7 @@ class ProjectCompile:
     PATTERN_SOURCE_DIR = "patterns-src"
     PATTERN_CLASSES_DIR = "patterns-classes"
     DEPENDENCY_DIR = "dependencies"
+    COMPILE_FILE = "compile.yml"
     __BUILD_DIR = "build"
 
     def __init__(self, base_path: str, misuses: List[Misuse]):
@@ -29,6 +30,7 @@ class ProjectCompile:
         self.pattern_classes_base_path = join(self.base_path, ProjectCompile.PATTERN_CLASSES_DIR)
         self.dependencies_path = join(self.base_path, ProjectCompile.DEPENDENCY_DIR)
         self.build_dir = join(self.base_path, ProjectCompile.__BUILD_DIR)
+        self.compile_file_path = join(self.base_path, ProjectCompile.COMPILE_FILE)
 
     def needs_copy_sources(self):
         if not isdir(self.original_sources_path):
@@ -75,6 +77,13 @@ class ProjectCompile:
         else:
             return self.original_classpath
 
+    @property
+    def runtime(self) -> Optional[float]:
+        return read_yaml_if_exists(self.compile_file_path).get("runtime")
+
+    def save_runtime(self, runtime: float):
+        write_yaml({"runtime": runtime}, file=self.compile_file_path)
+
     def delete(self):
         remove_tree(self.original_sources_path)
         remove_tree(self.misuse_source_path)
@@ -83,3 +92,5 @@ class ProjectCompile:
         remove_tree(self.misuse_classes_path)
         remove_tree(self.pattern_classes_base_path)
         remove_tree(self.build_dir)
+        if exists(self.compile_file_path):
+            os.remove(self.compile_file_path)
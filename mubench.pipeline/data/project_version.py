@@ -1,13 +1,16 @@
 from os.path import exists
 from os.path import join
+from sys import intern
 from typing import List, Optional, Any, Dict, Set
 
-import yaml
-
+from data import entity_registry
+from data.build_command import BuildCommand
+from data.dataset_index import DatasetIndex
 from data.misuse import Misuse, Pattern
 from data.project_checkout import ProjectCheckout, GitProjectCheckout, SVNProjectCheckout, \
     SyntheticProjectCheckout, ZipProjectCheckout
 from data.project_compile import ProjectCompile
+from utils.io import read_yaml
 
 
 class ProjectVersion:
@@ -18,46 +21,72 @@ class ProjectVersion:
                 '$mvn.default.classes': "target/classes/"
             }
 
-    def __init__(self, base_path: str, project_id: str, version_id: str):
+    def __init__(self, base_path: str, project_id: str, version_id: str,
+                 dataset_index: DatasetIndex = None):
         self._base_path = base_path
-        self.version_id = version_id
-        self.project_id = project_id
-        self.id = "{}.{}".format(project_id, version_id)
+        self._dataset_index = dataset_index
+        self.version_id = intern(version_id)
+        self.project_id = intern(project_id)
+        self.id = intern("{}.{}".format(project_id, version_id))
 
         from data.project import Project
-        self.__project = Project(base_path, project_id)
+        self.__project = entity_registry.get_project(base_path, project_id, dataset_index)  # type: Project
 
         self.path = join(self.__project.path, Project.VERSIONS_DIR, version_id)
-        self._version_file = join(self.path, ProjectVersion.VERSION_FILE)  # type: str
-        self._misuses_dir = join(self.__project.path, Project.MISUSES_DIR)  # type: str
-        self._YAML = {}
+        self._YAML = None
         self._MISUSES = None
         self._PATTERNS = None
+        self.__compile = None
+        self.__revision = None
 
     @staticmethod
     def is_project_version(path: str) -> bool:
         return exists(join(path, ProjectVersion.VERSION_FILE))
 
+    @property
+    def _version_file(self) -> str:
+        return join(self.path, ProjectVersion.VERSION_FILE)
+
+    @property
+    def _misuses_dir(self) -> str:
+        from data.project import Project
+        return join(self.__project.path, Project.MISUSES_DIR)
+
     @property
     def _yaml(self) -> Dict[str, Any]:
-        if not self._YAML:
-            with open(self._version_file) as stream:
-                version_yml = yaml.load(stream)
-            self._YAML = version_yml
+        if self._YAML is None:
+            self._YAML = self.__read_yaml()
         return self._YAML
 
-    def get_checkout(self, base_path: str) -> ProjectCheckout:
+    def __read_yaml(self) -> Dict[str, Any]:
+        # we keep only the fields we use, hence, we keep the entire file only once someone asks for it
+        if self._YAML is not None:
+            return self._YAML
+        elif self._dataset_index:
+            return self._dataset_index.read_yaml(self._version_file)
+        else:
+            return read_yaml(self._version_file)
+
+    def get_checkout(self, base_path: str, sparse: bool = False, svn_export: bool = False,
+                     bundles_path: str = None) -> ProjectCheckout:
+        """
+        With `sparse`, git checkouts contain only the files that the compilation needs, see `sparse_checkout_paths`.
+        With `svn_export`, SVN checkouts export the files only. With `bundles_path`, git checkouts fetch from the
+        project's bundle in that directory, if any.
+        """
         repository = self.__project.repository
         if repository.vcstype == "git":
             url = repository.url
-            return GitProjectCheckout(url, base_path, self.__project.id, self.version_id, self.revision)
+            sparse_paths = self.sparse_checkout_paths if sparse else None
+            return GitProjectCheckout(url, base_path, self.__project.id, self.version_id, self.revision, sparse_paths,
+                                      bundles_path)
         elif repository.vcstype == "svn":
             url = repository.url
-            return SVNProjectCheckout(url, base_path, self.__project.id, self.version_id, self.revision)
+            return SVNProjectCheckout(url, base_path, self.__project.id, self.version_id, self.revision, svn_export)
         elif repository.vcstype == "synthetic":
             return SyntheticProjectCheckout(base_path, self.__project.id, self.version_id)
         elif repository.vcstype == "zip":
-            return ZipProjectCheckout(self.revision, self._yaml["md5"], base_path, self.__project.id, self.version_id)
+            return ZipProjectCheckout(self.revision, self.__read_yaml()["md5"], base_path, self.__project.id, self.version_id)
         else:
             raise ValueError("unknown repository type: {}".format(repository.vcstype))
 
@@ -66,8 +95,15 @@ class ProjectVersion:
 
     @property
     def __compile_config(self):
-        compile = {"src": "", "commands": [], "classes": ""}
-        compile.update(self._yaml.get("build", {}))
+        if self._YAML is not None:
+            return self.__get_compile_config()
+        if self.__compile is None:
+            self.__compile = self.__get_compile_config()
+        return self.__compile
+
+    def __get_compile_config(self):
+        compile = {"src": "", "commands": [], "classes": "", "sparse_checkout": []}
+        compile.update(self.__read_yaml().get("build", {}))
 
         for key, value in self.VARS_CLASSES.items():
             compile["classes"] = compile["classes"].replace(key, value)
@@ -86,16 +122,40 @@ class ProjectVersion:
     def classes_dir(self):
         return self.__compile_config["classes"]
 
+    @property
+    def sparse_checkout_paths(self) -> Optional[List[str]]:
+        """
+        The paths that the compilation needs, as sparse-checkout patterns: the source directory, the files of the
+        build commands, e.g., `pom.xml`, in any directory, and the paths listed in the version's
+        `build: sparse_checkout:`, e.g., other modules the sources depend on. None, if the sources are at the root, such
+        that the compilation needs the entire checkout.
+        """
+        source_dir = self.source_dir.strip("/")
+        if not source_dir or source_dir == ".":
+            return None
+
+        paths = ["/{}/".format(source_dir)]
+        for command in self.compile_commands:
+            paths.extend(file for file in BuildCommand.create(command).build_files() if file not in paths)
+        paths.extend("/" + path.lstrip("/") for path in self.__compile_config["sparse_checkout"] or [])
+        return paths
+
     @property
     def misuses(self) -> List[Misuse]:
         if not self._MISUSES:
-            misuse_ids = self._yaml.get("misuses", []) or []
-            self._MISUSES = [Misuse(self._base_path, self.__project.id, self.version_id, misuse_id)
+            misuse_ids = self.__read_yaml().get("misuses", []) or []
+            self._MISUSES = [entity_registry.get_misuse(self._base_path, self.__project.id, self.version_id, misuse_id,
+                                                        self._dataset_index)
                              for misuse_id in misuse_ids
-                             if Misuse.is_misuse(join(self._misuses_dir, misuse_id))]
+                             if self.__is_misuse(join(self._misuses_dir, misuse_id))]
 
         return self._MISUSES
 
+    def __is_misuse(self, path: str) -> bool:
+        if self._dataset_index:
+            return self._dataset_index.exists(join(path, Misuse.MISUSE_FILE))
+        return Misuse.is_misuse(path)
+
     @property
     def patterns(self) -> Set[Pattern]:
         if not self._PATTERNS:
@@ -107,9 +167,9 @@ class ProjectVersion:
 
     @property
     def revision(self) -> Optional[str]:
-        if getattr(self, '_REVISION', None) is None:
-            self._REVISION = self._yaml.get('revision')
-        return self._REVISION
+        if self.__revision is None:
+            self.__revision = self.__read_yaml().get('revision')
+        return self.__revision
 
     @property
     def additional_compile_sources(self) -> str:
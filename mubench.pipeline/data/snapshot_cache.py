@@ -0,0 +1,79 @@
+import hashlib
+import logging
+import os
+import tarfile
+from os import makedirs
+from os.path import join, exists, dirname, basename, normpath, isabs
+from tempfile import mkdtemp, mkstemp
+from typing import List
+
+from utils.io import remove_tree
+
+
+class SnapshotCache:
+    """
+    A content-addressed cache of checkout snapshots, i.e., compressed tarballs of the files of checkouts, without
+    version-control metadata. A snapshot's key is the hash of the identity of the checked-out files, e.g., the
+    repository URL, the revision, and the sparse-checkout paths. Snapshots are written to a temporary file and renamed,
+    such that several machines may share the cache, e.g., on a network file system.
+    """
+    SNAPSHOT_EXTENSION = ".tar.gz"
+
+    def __init__(self, path: str):
+        self.path = path
+        self.__logger = logging.getLogger("snapshot_cache")
+
+    @staticmethod
+    def get_key(identity: str) -> str:
+        return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+    def get_snapshot_file(self, identity: str) -> str:
+        key = SnapshotCache.get_key(identity)
+        return join(self.path, key[:2], key + SnapshotCache.SNAPSHOT_EXTENSION)
+
+    def contains(self, identity: str) -> bool:
+        return exists(self.get_snapshot_file(identity))
+
+    def restore(self, identity: str, path: str) -> bool:
+        """Restores the snapshot to the path, replacing anything there. Returns False, if there is no snapshot."""
+        snapshot_file = self.get_snapshot_file(identity)
+        if not exists(snapshot_file):
+            return False
+
+        self.__logger.debug("Restore %s from %s", path, snapshot_file)
+        makedirs(dirname(path), exist_ok=True)
+        # we extract next to the path and rename, such that the path never holds a partial snapshot
+        temp_path = mkdtemp(prefix=".snapshot-", dir=dirname(path))
+        try:
+            with tarfile.open(snapshot_file, "r:gz") as snapshot:
+                members = snapshot.getmembers()
+                for member in members:
+                    if isabs(member.name) or normpath(member.name).split(os.sep)[0] == "..":
+                        raise ValueError("invalid snapshot {}: contains {}".format(snapshot_file, member.name))
+                snapshot.extractall(temp_path, members)
+            remove_tree(path)
+            os.rename(temp_path, path)
+        finally:
+            remove_tree(temp_path)
+        return True
+
+    def store(self, identity: str, path: str, excludes: List[str]):
+        """Stores a snapshot of the files in the path, except for those with one of the excluded names."""
+        snapshot_file = self.get_snapshot_file(identity)
+        if exists(snapshot_file):
+            return
+
+        self.__logger.debug("Store %s to %s", path, snapshot_file)
+        makedirs(dirname(snapshot_file), exist_ok=True)
+        file_descriptor, temp_file = mkstemp(prefix=".", suffix=".tmp", dir=dirname(snapshot_file))
+        try:
+            with os.fdopen(file_descriptor, "wb") as file, \
+                    tarfile.open(fileobj=file, mode="w:gz", compresslevel=6) as snapshot:
+                for name in sorted(os.listdir(path)):
+                    if name not in excludes:
+                        snapshot.add(join(path, name), name,
+                                     filter=lambda member: None if basename(member.name) in excludes else member)
+            os.replace(temp_file, snapshot_file)
+        finally:
+            if exists(temp_file):
+                os.remove(temp_file)
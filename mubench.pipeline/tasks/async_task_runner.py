@@ -0,0 +1,78 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from tasks.journal import Journal
+from tasks.task_runner import TaskRunner
+from utils import tracing, profiling
+
+
+class AsyncTaskRunner(TaskRunner):
+    """
+    Runs the task chain on an asyncio event loop. Tasks that provide a run_async() coroutine, like the CheckoutTask and
+    the PublishFindingsTask, run on up to `concurrency` results at a time, such that network-bound work, like clones
+    and uploads, overlaps. All other tasks run on the loop's thread, one at a time, like in the TaskRunner. Likewise,
+    the tasks' end_async() hooks are preferred over their end() hooks. Blocking work that the tasks hand to the loop's
+    default executor, like uploads, runs on up to `concurrency` threads, too.
+    """
+
+    def __init__(self, tasks: List, concurrency: int, journal: Journal = None):
+        super().__init__(tasks, journal)
+        self.concurrency = concurrency
+        self.__semaphore = None  # type: asyncio.Semaphore
+
+    def run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        executor = ThreadPoolExecutor(self.concurrency)
+        loop.set_default_executor(executor)
+        try:
+            self.__semaphore = asyncio.Semaphore(self.concurrency)
+            loop.run_until_complete(self.__run_async(0, []))
+            loop.run_until_complete(self.__end_async())
+        finally:
+            self.__semaphore = None
+            asyncio.set_event_loop(None)
+            loop.close()
+            executor.shutdown()
+
+    async def __run_async(self, current_task_index: int, previous_results: List) -> bool:
+        task = self.tasks[current_task_index]
+        if self._is_completed(current_task_index, previous_results):
+            return True
+
+        parameter_values = self._get_parameter_values(current_task_index, previous_results)
+
+        try:
+            entity = self._get_entity(previous_results)
+            if callable(getattr(task, 'run_async', None)):
+                async with self.__semaphore:
+                    # concurrent coroutines share the thread, hence, we put each on a track of its own
+                    with tracing.span(type(task).__name__, "task", tid=tracing.get_task_track(), entity=entity):
+                        results = await task.run_async(*parameter_values)
+            else:
+                with tracing.span(type(task).__name__, "task", entity=entity), profiling.profile(type(task).__name__):
+                    results = task.run(*parameter_values)
+        except Exception as exception:
+            self._report_failure(task, exception)
+            return False
+
+        next_runs = [self.__run_next_async(current_task_index + 1, next_results, result)
+                     for result, next_results in self._get_next_results(current_task_index, previous_results, results)]
+        completed = all(await asyncio.gather(*next_runs)) if next_runs else True
+
+        if completed:
+            self._record_completed(current_task_index, previous_results)
+        return completed
+
+    async def __run_next_async(self, next_task_index: int, previous_results: List, result) -> bool:
+        next_task = type(self.tasks[next_task_index]).__name__
+        self.logger.info("Running %s on %s", next_task, result)
+        return await self.__run_async(next_task_index, previous_results)
+
+    async def __end_async(self):
+        for task in self.tasks:
+            if callable(getattr(task, 'end_async', None)):
+                await task.end_async()
+            elif callable(getattr(task, 'end', None)):
+                task.end()
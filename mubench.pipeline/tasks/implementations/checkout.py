@@ -1,43 +1,169 @@
+import asyncio
 import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from tempfile import mkdtemp
-from typing import List
+from typing import List, Dict, Tuple
+from urllib.parse import urlparse
 
 from data.project_checkout import ProjectCheckout
 from data.project_version import ProjectVersion
+from data.snapshot_cache import SnapshotCache
 from utils.io import copy_tree, remove_tree
 
 
+SCP_LIKE_URL = re.compile(r"^(?:[^@/]+@)?(?P<host>[^:/]+):")
+
+
+def get_host(url: str) -> str:
+    """Returns the host of a remote URL, including scp-like URLs, e.g., `git@github.com:user/repo.git`, or an empty
+    string, for local paths."""
+    host = urlparse(url).hostname
+    if host:
+        return host
+    match = SCP_LIKE_URL.match(url)
+    return match.group("host") if match and "://" not in url else ""
+
+
 class CheckoutTask:
-    def __init__(self, checkouts_path: str, force_checkout: bool, use_temp_dir: bool):
+    def __init__(self, checkouts_path: str, force_checkout: bool, use_temp_dir: bool, migrate_checkouts: bool = False,
+                 jobs_per_host: int = 0, sparse_checkout: bool = False, snapshot_cache_path: str = None,
+                 svn_export: bool = False, bundles_path: str = None, verify_checkouts: bool = False):
         super().__init__()
         self.checkouts_path = checkouts_path
         self.force_checkout = force_checkout
         self.use_temp_dir = use_temp_dir
+        self.migrate_checkouts = migrate_checkouts
+        self.jobs_per_host = jobs_per_host
+        self.sparse_checkout = sparse_checkout
+        self.snapshot_cache_path = snapshot_cache_path
+        self.svn_export = svn_export
+        self.bundles_path = bundles_path
+        self.verify_checkouts = verify_checkouts
+        self.__snapshot_cache = SnapshotCache(snapshot_cache_path) if snapshot_cache_path else None
+
+        self.__locks_guard = threading.Lock()
+        # versions of the same project share a base checkout, which the checkouts create only once. Copying the base
+        # from a temporary directory, however, interferes with any other checkout of the project, hence, we then check
+        # out one at a time.
+        self.__project_locks = {}  # type: Dict[Tuple[str, bool], object]
+        # we limit the concurrent fetches from each remote host, such that we do not overload it
+        self.__host_semaphores = {}  # type: Dict[Tuple[str, bool], object]
 
     def run(self, version: ProjectVersion) -> List[ProjectCheckout]:
-        logger = logging.getLogger("tasks.checkout")
+        checkout = self.__get_checkout(version)
+        with self.__get_project_lock(version, is_async=False):
+            if self.__needs_create(version, checkout):
+                with self.__get_host_semaphore(checkout, is_async=False):
+                    if self.use_temp_dir:
+                        self.__create_in_temp_dir(version)
+                    else:
+                        checkout.create()
 
+        return checkout
+
+    async def run_async(self, version: ProjectVersion) -> List[ProjectCheckout]:
+        checkout = self.__get_checkout(version)
+        loop = asyncio.get_event_loop()
+        async with self.__get_project_lock(version, is_async=True):
+            # deleting, verifying, and migrating a checkout blocks, hence, we keep it off the event loop
+            if await loop.run_in_executor(None, self.__needs_create, version, checkout):
+                async with self.__get_host_semaphore(checkout, is_async=True):
+                    if self.use_temp_dir:
+                        await loop.run_in_executor(None, self.__create_in_temp_dir, version)
+                    else:
+                        await checkout.create_async()
+
+        return checkout
+
+    def __get_checkout(self, version: ProjectVersion) -> ProjectCheckout:
         try:
-            checkout = version.get_checkout(self.checkouts_path)
+            checkout = version.get_checkout(self.checkouts_path, self.sparse_checkout, self.svn_export,
+                                            self.bundles_path)
+            checkout.snapshot_cache = self.__snapshot_cache
+            return checkout
         except ValueError as e:
             raise UserWarning("Checkout data corrupted: %s", e)
 
+    def __needs_create(self, version: ProjectVersion, checkout: ProjectCheckout) -> bool:
+        logger = logging.getLogger("tasks.checkout")
+
         if self.force_checkout:
             checkout.delete()
-        checkout_exists = checkout.exists()
+        # the manifest tells whether the checkout exists, verifying asks the VCS, too
+        checkout_exists = checkout.verify() if self.verify_checkouts else checkout.exists()
         logger.debug("Checkout exists = %r", checkout_exists)
         if checkout_exists:
             logger.debug("Already checked out %s.", version)
+            if self.migrate_checkouts:
+                logger.debug("Migrating checkout of %s...", version)
+                checkout.migrate()
         else:
             logger.info("Fetching %s from %s...", version, checkout)
-            if self.use_temp_dir:
-                temp_dir = mkdtemp(prefix="mubench-checkout_")
-                temp_checkout = version.get_checkout(temp_dir)
-                temp_checkout.create()
-                logger.debug("Copying checkout to persistent directory...")
-                copy_tree(temp_dir, self.checkouts_path)
-                remove_tree(temp_dir)
-            else:
-                checkout.create()
+        return not checkout_exists
 
-        return checkout
+    def __create_in_temp_dir(self, version: ProjectVersion):
+        logger = logging.getLogger("tasks.checkout")
+        temp_dir = mkdtemp(prefix="mubench-checkout_")
+        temp_checkout = version.get_checkout(temp_dir, self.sparse_checkout, self.svn_export, self.bundles_path)
+        temp_checkout.snapshot_cache = self.__snapshot_cache
+        temp_checkout.create()
+        logger.debug("Copying checkout to persistent directory...")
+        copy_tree(temp_dir, self.checkouts_path)
+        remove_tree(temp_dir)
+
+    def __get_project_lock(self, version: ProjectVersion, is_async: bool):
+        if not self.use_temp_dir:
+            return _NoLock()
+        with self.__locks_guard:
+            key = (version.project_id, is_async)
+            if key not in self.__project_locks:
+                self.__project_locks[key] = asyncio.Lock() if is_async else threading.Lock()
+            return self.__project_locks[key]
+
+    def __get_host_semaphore(self, checkout: ProjectCheckout, is_async: bool):
+        host = get_host(checkout.url)
+        if not self.jobs_per_host or not host:
+            return _NoLock()
+        with self.__locks_guard:
+            key = (host, is_async)
+            if key not in self.__host_semaphores:
+                self.__host_semaphores[key] = asyncio.Semaphore(self.jobs_per_host) if is_async \
+                    else threading.BoundedSemaphore(self.jobs_per_host)
+            return self.__host_semaphores[key]
+
+
+class ParallelCheckoutTask(CheckoutTask):
+    """
+    Checks out the project versions of a batch concurrently, using up to `jobs` threads, since checkouts mostly wait
+    for the network. We ask the runner for batches of at least `jobs` versions, such that the checkouts run
+    concurrently, also if batching is otherwise disabled.
+    """
+
+    def __init__(self, checkouts_path: str, force_checkout: bool, use_temp_dir: bool, migrate_checkouts: bool = False,
+                 jobs_per_host: int = 0, sparse_checkout: bool = False, snapshot_cache_path: str = None,
+                 svn_export: bool = False, bundles_path: str = None, verify_checkouts: bool = False, jobs: int = 1):
+        super().__init__(checkouts_path, force_checkout, use_temp_dir, migrate_checkouts, jobs_per_host,
+                         sparse_checkout, snapshot_cache_path, svn_export, bundles_path, verify_checkouts)
+        self.jobs = jobs
+        self.batch_size = jobs
+
+    def run_batch(self, parameter_values: List[Tuple[ProjectVersion]]) -> List:
+        with ThreadPoolExecutor(self.jobs) as executor:
+            futures = [executor.submit(self.run, version) for version, in parameter_values]
+        return [future.exception() or future.result() for future in futures]
+
+
+class _NoLock:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_details):
+        return False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_details):
+        return False
@@ -1,25 +1,37 @@
 from os import listdir
 from os.path import exists, join
 
+from data import entity_registry
+from data.dataset_index import DatasetIndex
 from data.project import Project
 from utils.data_entity_lists import DataEntityLists
+from utils.scheduling import Schedule
 
 
 class CollectProjectsTask:
-    def __init__(self, data_path: str, data_entity_lists: DataEntityLists):
+    def __init__(self, data_path: str, data_entity_lists: DataEntityLists, schedule: Schedule = None,
+                 dataset_index: DatasetIndex = None):
         self.data_path = data_path
-        self.white_list = data_entity_lists.get_project_white_list()
-        self.black_list = data_entity_lists.black_list
+        self.dataset_index = dataset_index
+        self.data_entity_lists = data_entity_lists
+        self.schedule = schedule
 
     def run(self):
+        if self.dataset_index:
+            projects = [entity_registry.get_project(self.data_path, project_id, self.dataset_index)
+                        for project_id in self.dataset_index.get_project_ids()]
+        else:
+            projects = self.__get_projects()
+        projects = [project for project in projects if not self.data_entity_lists.is_project_filtered(project)]
+
+        if self.schedule:
+            projects = self.schedule.sort_projects(projects)
+        return projects
+
+    def __get_projects(self):
         project_ids = []
         if exists(self.data_path):
             project_ids.extend(sorted(listdir(self.data_path)))
 
-        return [Project(self.data_path, project_id) for project_id in project_ids if
-                Project.is_project(join(self.data_path, project_id)) and not self.__is_filtered(project_id)]
-
-    def __is_filtered(self, project_id: str) -> bool:
-        is_whitelisted = not self.white_list or project_id in self.white_list
-        is_blacklisted = project_id in self.black_list
-        return is_blacklisted or not is_whitelisted
+        return [entity_registry.get_project(self.data_path, project_id) for project_id in project_ids if
+                Project.is_project(join(self.data_path, project_id))]
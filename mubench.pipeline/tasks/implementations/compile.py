@@ -1,6 +1,7 @@
 import logging
 import os
 import shutil
+import time
 from glob import glob
 from logging import Logger
 from os import makedirs
@@ -69,11 +70,13 @@ class CompileTask:
                 logger.info("Compiling project...")
                 logger.debug("Copying patterns to source directory...")
                 self.__copy(version.patterns, sources_path)
+                start = time.time()
                 self._compile(version.compile_commands,
                               build_path,
                               project_compile.dependencies_path,
                               self.compiles_base_path,
                               logger)
+                project_compile.save_runtime(time.time() - start)
                 logger.debug("Move pattern classes...")
                 self.__copy_pattern_classes(version.misuses, classes_path, project_compile)
                 self.__remove_pattern_classes(version.misuses, classes_path)
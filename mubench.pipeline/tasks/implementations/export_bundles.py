@@ -0,0 +1,37 @@
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+from data.project_checkout import ProjectCheckout, GitProjectCheckout
+from data.project_version import ProjectVersion
+from utils.shell import CommandFailedError
+
+
+class ExportBundlesTask:
+    """
+    Exports one git bundle per project to `bundles_path`, with the revisions of the project's checked-out versions,
+    such that `checkout import-bundles` creates the checkouts from the bundles, without access to the remotes.
+    """
+
+    def __init__(self, bundles_path: str):
+        super().__init__()
+        self.bundles_path = bundles_path
+
+        self.__projects = OrderedDict()  # type: Dict[str, Tuple[GitProjectCheckout, List[str]]]
+
+    def run(self, version: ProjectVersion, checkout: ProjectCheckout):
+        if not isinstance(checkout, GitProjectCheckout):
+            logging.getLogger("tasks.export_bundles").debug("Not bundling %s, which is no git checkout.", version)
+            return
+
+        _, revisions = self.__projects.setdefault(checkout.name, (checkout, []))
+        revisions.append(checkout.revision)
+
+    def end(self):
+        logger = logging.getLogger("tasks.export_bundles")
+        for project_id, (checkout, revisions) in self.__projects.items():
+            logger.info("Exporting %d revision(s) of %s to %s...", len(revisions), project_id, self.bundles_path)
+            try:
+                checkout.export_bundle(revisions, self.bundles_path)
+            except CommandFailedError as e:
+                logger.error("Failed to export %s: %s", project_id, e)
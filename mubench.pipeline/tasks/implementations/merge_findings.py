@@ -0,0 +1,70 @@
+import filecmp
+import logging
+from os import walk
+from os.path import join, relpath, getmtime
+from typing import List, Dict
+
+from data.detector_execution import DetectorExecution
+from utils.io import remove_tree, copy_tree
+from utils.sharding import get_recorded_runtimes, write_runtimes, RUNTIMES_FILE
+
+
+class MergeFindingsTask:
+    """
+    Merges the findings trees of the shards of a benchmark run into one findings tree. Every directory with a run file
+    is merged as a whole. If the same run exists in multiple shards with different results, the run whose run file was
+    written last wins. Finally, we write the recorded runtimes of all versions to `runtimes.yml` in the merged tree,
+    which all machines of a later sharded run may share, to balance their shards.
+    """
+
+    def __init__(self, shard_findings_paths: List[str], findings_path: str):
+        super().__init__()
+        self.shard_findings_paths = shard_findings_paths
+        self.findings_path = findings_path
+
+    def run(self):
+        logger = logging.getLogger("tasks.merge")
+
+        runs = {}  # type: Dict[str, List[str]]
+        for shard_findings_path in self.shard_findings_paths:
+            logger.info("Collecting runs from %s...", shard_findings_path)
+            for run_path in MergeFindingsTask.__get_run_paths(shard_findings_path):
+                runs.setdefault(relpath(run_path, shard_findings_path), []).append(run_path)
+
+        for run_id, run_paths in sorted(runs.items()):
+            run_path = MergeFindingsTask.__select_run(run_paths)
+            if len(run_paths) > 1 and not MergeFindingsTask.__are_equal(run_paths):
+                logger.warning("Run %s differs between shards, taking the latest from %s.", run_id, run_path)
+
+            target_path = join(self.findings_path, run_id)
+            logger.debug("Copying %s to %s...", run_path, target_path)
+            remove_tree(target_path)
+            copy_tree(run_path, target_path)
+
+        logger.info("Merged %d run(s) from %d shard(s) into %s.",
+                    len(runs), len(self.shard_findings_paths), self.findings_path)
+        write_runtimes(get_recorded_runtimes(self.findings_path), join(self.findings_path, RUNTIMES_FILE))
+
+    @staticmethod
+    def __get_run_paths(findings_path: str) -> List[str]:
+        return [path for path, _, files in walk(findings_path) if DetectorExecution.RUN_FILE in files]
+
+    @staticmethod
+    def __select_run(run_paths: List[str]) -> str:
+        # max() returns the first of equally recent runs, i.e., the one from the shard given first
+        return max(run_paths, key=lambda run_path: getmtime(join(run_path, DetectorExecution.RUN_FILE)))
+
+    @staticmethod
+    def __are_equal(run_paths: List[str]) -> bool:
+        return all(MergeFindingsTask.__are_equal_trees(run_paths[0], other) for other in run_paths[1:])
+
+    @staticmethod
+    def __are_equal_trees(left: str, right: str) -> bool:
+        comparison = filecmp.dircmp(left, right)
+        if comparison.left_only or comparison.right_only or comparison.funny_files:
+            return False
+        _, mismatch, errors = filecmp.cmpfiles(left, right, comparison.common_files, shallow=False)
+        if mismatch or errors:
+            return False
+        return all(MergeFindingsTask.__are_equal_trees(join(left, directory), join(right, directory))
+                   for directory in comparison.common_dirs)
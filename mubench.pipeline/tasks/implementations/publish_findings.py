@@ -12,7 +12,7 @@ from data.project_compile import ProjectCompile
 from data.project_version import ProjectVersion
 from data.run import Run
 from data.snippets import SnippetUnavailableException
-from utils.web_util import post, as_markdown
+from utils.web_util import post, post_async, as_markdown
 
 
 class PublishFindingsTask:
@@ -42,42 +42,70 @@ class PublishFindingsTask:
     def run(self, project: Project, version: ProjectVersion, detector_run: Run,
             version_compile: ProjectCompile) -> List:
         logger = self.logger.getChild("version")
+        result = self.__get_result(version, detector_run, logger)
 
-        run_info = detector_run.get_run_info()
-        potential_hits = detector_run.get_potential_hits()
+        try:
+            logger.info("Publishing findings...")
+            for data, file_paths in self.__prepare_posts(project, version, detector_run, version_compile, result,
+                                                         logger):
+                post(self.__upload_url, data, file_paths=file_paths,
+                     username=self.review_site_user, password=self.review_site_password)
+            logger.info("Findings published.")
+        except RequestException as e:
+            self.__report_request_exception(e, logger)
 
-        if detector_run.is_success():
-            logger.info("Preparing findings in %s...", version)
-            result = "success"
-            logger.info("Found %s potential hits.", len(potential_hits))
-        else:
-            if detector_run.is_error():
-                logger.info("Run on %s produced an error.", version)
-                result = "error"
-            elif detector_run.is_timeout():
-                logger.info("Run on %s timed out.", version)
-                result = "timeout"
-            else:
-                logger.info("Not run on %s.", version)
-                result = "not run"
+    async def run_async(self, project: Project, version: ProjectVersion, detector_run: Run,
+                        version_compile: ProjectCompile) -> List:
+        logger = self.logger.getChild("version")
+        result = self.__get_result(version, detector_run, logger)
 
         try:
             logger.info("Publishing findings...")
-            for potential_hits_slice in self.__slice_by_max_files_per_post(potential_hits):
-                post_data_slice = []
-                for potential_hit in potential_hits_slice:
-                    postable_data = self._prepare_post(potential_hit, version_compile, logger)
-                    post_data_slice.append(postable_data)
-
-                file_paths = PublishFindingsTask.get_file_paths(potential_hits_slice)
-                self.__post(project, version, run_info, result, post_data_slice, file_paths)
+            for data, file_paths in self.__prepare_posts(project, version, detector_run, version_compile, result,
+                                                         logger):
+                await post_async(self.__upload_url, data, file_paths=file_paths,
+                                 username=self.review_site_user, password=self.review_site_password)
             logger.info("Findings published.")
         except RequestException as e:
-            response = e.response
-            if response:
-                logger.error("ERROR: %d %s: %s", response.status_code, response.reason, response.text)
-            else:
-                logger.error("ERROR: %s", e)
+            self.__report_request_exception(e, logger)
+
+    @staticmethod
+    def __get_result(version: ProjectVersion, detector_run: Run, logger) -> str:
+        if detector_run.is_success():
+            logger.info("Preparing findings in %s...", version)
+            logger.info("Found %s potential hits.", len(detector_run.get_potential_hits()))
+            return "success"
+        elif detector_run.is_error():
+            logger.info("Run on %s produced an error.", version)
+            return "error"
+        elif detector_run.is_timeout():
+            logger.info("Run on %s timed out.", version)
+            return "timeout"
+        else:
+            logger.info("Not run on %s.", version)
+            return "not run"
+
+    def __prepare_posts(self, project: Project, version: ProjectVersion, detector_run: Run,
+                        version_compile: ProjectCompile, result: str, logger):
+        run_info = detector_run.get_run_info()
+        potential_hits = detector_run.get_potential_hits()
+
+        for potential_hits_slice in self.__slice_by_max_files_per_post(potential_hits):
+            post_data_slice = []
+            for potential_hit in potential_hits_slice:
+                postable_data = self._prepare_post(potential_hit, version_compile, logger)
+                post_data_slice.append(postable_data)
+
+            file_paths = PublishFindingsTask.get_file_paths(potential_hits_slice)
+            yield self.__get_post_data(project, version, run_info, result, post_data_slice), file_paths
+
+    @staticmethod
+    def __report_request_exception(exception: RequestException, logger):
+        response = exception.response
+        if response:
+            logger.error("ERROR: %d %s: %s", response.status_code, response.reason, response.text)
+        else:
+            logger.error("ERROR: %s", exception)
 
     def __slice_by_max_files_per_post(self, potential_hits: List[SpecializedFinding]) -> List[List[SpecializedFinding]]:
         potential_hits_slice = []
@@ -107,7 +135,7 @@ class PublishFindingsTask:
         markdown_dict["target_snippets"] = [snippet.__dict__ for snippet in snippets]
         return markdown_dict
 
-    def __post(self, project, version, run_info, result, upload_data, file_paths):
+    def __get_post_data(self, project, version, run_info, result, upload_data):
         data = {}
         data.update(self._to_markdown_dict(run_info))
         data.update({
@@ -118,8 +146,7 @@ class PublishFindingsTask:
             "result": result,
             "potential_hits": upload_data
         })
-        post(self.__upload_url, data, file_paths=file_paths,
-             username=self.review_site_user, password=self.review_site_password)
+        return data
 
     @staticmethod
     def get_file_paths(findings: List[SpecializedFinding]) -> List[str]:
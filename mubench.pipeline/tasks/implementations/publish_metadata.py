@@ -1,6 +1,8 @@
 import getpass
 import logging
-from typing import Dict
+from concurrent.futures import ThreadPoolExecutor
+from os import cpu_count
+from typing import Dict, Tuple
 from typing import List
 from urllib.parse import urljoin
 
@@ -9,7 +11,7 @@ from requests import RequestException
 from data.misuse import Misuse
 from data.project import Project
 from utils.io import safe_read
-from utils.web_util import post
+from utils.web_util import post, post_async
 
 
 class PublishMetadataTask:
@@ -30,6 +32,27 @@ class PublishMetadataTask:
         self.__metadata.clear()
 
     def run(self, project: Project, misuse: Misuse):
+        self.__metadata.append(self.__get_metadata(project, misuse))
+
+    def run_batch(self, parameter_values: List[Tuple[Project, Misuse]]) -> List:
+        """
+        Collects the metadata of many misuses at once. Since the extraction of every target snippet starts a JVM of
+        its own, we run the extractions concurrently.
+        """
+        with ThreadPoolExecutor(cpu_count() or 1) as executor:
+            futures = [executor.submit(self.__get_metadata, project, misuse) for project, misuse in parameter_values]
+
+        results = []
+        for future in futures:
+            exception = future.exception()
+            if exception:
+                results.append(exception)
+            else:
+                self.__metadata.append(future.result())
+                results.append(None)
+        return results
+
+    def __get_metadata(self, project: Project, misuse: Misuse) -> Dict:
         versions = [version for version in project.versions if misuse in version.misuses]
         if len(versions) == 1:
             version = versions[0]
@@ -37,11 +60,11 @@ class PublishMetadataTask:
             raise UserWarning("misuse {} is assigned to multiple project versions,"
                               " cannot handle this case!".format(misuse.id))
 
-        self.__metadata.append({
+        return {
             "project": project.id,
             "version": version.version_id,
             "misuse": misuse.id,
-            "location": misuse.location.__dict__,
+            "location": {"file": misuse.location.file, "method": misuse.location.method},
             "description": misuse.description,
             "violation_types": misuse.characteristics,
             "fix": {
@@ -50,7 +73,7 @@ class PublishMetadataTask:
             },
             "target_snippets": self.__get_snippets(misuse, version),
             "patterns": self.__get_patterns(misuse)
-        })
+        }
 
     def __get_snippets(self, misuse, version):
         version_compile = version.get_compile(self.compiles_base_path)
@@ -70,15 +93,31 @@ class PublishMetadataTask:
         return line.startswith("import") or line.startswith("package") or not line
 
     def end(self):
-        url = urljoin(self.review_site_url, "api/upload/metadata")
-        logger = logging.getLogger("publish.metadata")
-        logger.info("Uploading metadata about %r misuses to %s...", len(self.__metadata), url)
+        url, logger = self.__start_upload()
         try:
             post(url, self.__metadata, username=self.review_site_user, password=self.review_site_password)
             logger.info("Metadata published.")
         except RequestException as e:
-            response = e.response
-            if response:
-                logger.error("ERROR: %d %s: %s", response.status_code, response.reason, response.text)
-            else:
-                logger.error("ERROR: %s", e)
+            self.__report_request_exception(e, logger)
+
+    async def end_async(self):
+        url, logger = self.__start_upload()
+        try:
+            await post_async(url, self.__metadata, username=self.review_site_user, password=self.review_site_password)
+            logger.info("Metadata published.")
+        except RequestException as e:
+            self.__report_request_exception(e, logger)
+
+    def __start_upload(self):
+        url = urljoin(self.review_site_url, "api/upload/metadata")
+        logger = logging.getLogger("publish.metadata")
+        logger.info("Uploading metadata about %r misuses to %s...", len(self.__metadata), url)
+        return url, logger
+
+    @staticmethod
+    def __report_request_exception(exception: RequestException, logger):
+        response = exception.response
+        if response:
+            logger.error("ERROR: %d %s: %s", response.status_code, response.reason, response.text)
+        else:
+            logger.error("ERROR: %s", exception)
@@ -0,0 +1,84 @@
+import hashlib
+import json
+import logging
+from datetime import datetime
+from os import makedirs
+from os.path import exists, dirname
+from typing import List, Set, Tuple, Dict
+
+
+class Journal:
+    """
+    An append-only record of the (task, entity, fingerprint) triples that a run completed. An entity is identified by
+    the ids of the results the task ran on, e.g., a project version. A fingerprint identifies the task's
+    configuration, such that a run with different options does not take over another run's records. Every record is
+    appended in a single write, such that concurrent runner processes may share a journal. A run that does not resume
+    appends a run header, rather than truncating the journal, and resuming takes over the records after the last header.
+    """
+
+    def __init__(self, path: str, resume: bool):
+        self.path = path
+        self.__completed = set()  # type: Set[Tuple[str, str, str]]
+        self.__fingerprints = {}  # type: Dict[int, Tuple[object, str]]
+        self.__logger = logging.getLogger("journal")
+
+        makedirs(dirname(path), exist_ok=True)
+        if resume and exists(path):
+            self.__load()
+        else:
+            self.__append({"run": datetime.now().isoformat()})
+
+    def __load(self):
+        with open(self.path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                    if "run" in record:
+                        # a run that started over
+                        self.__completed.clear()
+                    else:
+                        self.__completed.add((record["task"], record["entity"], record["fingerprint"]))
+                except (ValueError, KeyError):
+                    # a line that the previous run did not finish writing
+                    self.__logger.debug("Ignoring incomplete record: %s", line)
+        self.__logger.info("Resuming after %d completed item(s) from %s.", len(self.__completed), self.path)
+
+    def is_completed(self, task, previous_results: List) -> bool:
+        return self.__get_record(task, previous_results) in self.__completed
+
+    def record(self, task, previous_results: List):
+        record = self.__get_record(task, previous_results)
+        self.__completed.add(record)
+        self.__append({"task": record[0], "entity": record[1], "fingerprint": record[2]})
+
+    def __append(self, record: Dict[str, str]):
+        line = json.dumps(record) + "\n"
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(line)
+
+    def __get_record(self, task, previous_results: List) -> Tuple[str, str, str]:
+        entity = "/".join(str(result.id) for result in previous_results if hasattr(result, "id"))
+        return type(task).__name__, entity, self.__get_fingerprint(task)
+
+    def __get_fingerprint(self, task) -> str:
+        # we keep the task with its fingerprint, such that its id is not reused for another task
+        if id(task) not in self.__fingerprints:
+            configuration = json.dumps(Journal.__get_configuration(task, 2), sort_keys=True)
+            self.__fingerprints[id(task)] = task, hashlib.sha1(configuration.encode("utf-8")).hexdigest()
+        return self.__fingerprints[id(task)][1]
+
+    @staticmethod
+    def __get_configuration(value, depth: int):
+        if value is None or isinstance(value, (str, int, float, bool)):
+            return value
+        elif isinstance(value, (list, tuple, set)):
+            return sorted([Journal.__get_configuration(element, depth) for element in value], key=str)
+        elif isinstance(value, dict):
+            return {str(key): Journal.__get_configuration(element, depth) for key, element in value.items()}
+        elif isinstance(value, logging.Logger):
+            return value.name
+        elif hasattr(value, "__dict__") and depth > 0:
+            return {name: Journal.__get_configuration(attribute, depth - 1)
+                    for name, attribute in vars(value).items() if not name.startswith("_")}
+        else:
+            return type(value).__name__
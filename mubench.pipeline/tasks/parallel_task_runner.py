@@ -0,0 +1,132 @@
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict
+
+from data.project_version import ProjectVersion
+from tasks.journal import Journal
+from tasks.task_runner import TaskRunner
+from utils import tracing, profiling
+
+# The runner whose subtrees the pool's worker processes execute. Workers are forked from the parent after this is
+# set, such that they inherit the runner and its tasks and we never need to pickle them.
+_RUNNER = None  # type: ParallelTaskRunner
+
+
+class ParallelTaskRunner(TaskRunner):
+    """
+    Runs the task chain like the TaskRunner, but sends the subtree below every result of the split type (by default
+    every ProjectVersion) to a pool of worker processes. Log output of a subtree is buffered in the worker and emitted
+    by the parent, in the order in which the subtrees were scheduled. The tasks' end() hooks run once in the parent.
+
+    Subtrees that contain tasks with an end() hook run in the parent, since such tasks collect results across runs.
+    """
+
+    def __init__(self, tasks: List, jobs: int, split_type: type = ProjectVersion, journal: Journal = None,
+                 batch_size: int = 0):
+        super().__init__(tasks, journal, batch_size)
+        self.jobs = jobs
+        self.split_type = split_type
+        self._in_worker = False
+        self.__pool = None
+        self.__pending = deque()
+        self.__splittable = {}  # type: Dict[int, bool]
+
+    def run(self):
+        global _RUNNER
+        _RUNNER = self
+        try:
+            with ProcessPoolExecutor(self.jobs) as pool:
+                self.__pool = pool
+                self._run(0, [])
+                self._run_batches()
+                self.__emit_completed(wait=True)
+        finally:
+            self.__pool = None
+            _RUNNER = None
+        self._end()
+
+    def _run_next(self, next_task_index: int, previous_results: List, result) -> bool:
+        if self._in_worker or not isinstance(result, self.split_type) or not self.__can_split_at(next_task_index):
+            return super()._run_next(next_task_index, previous_results, result)
+        else:
+            future = self.__pool.submit(_run_subtree, next_task_index, previous_results, result)
+            self.__pending.append(future)
+            self.__emit_completed(wait=False)
+            # the subtree completes in a worker, which records it in the journal
+            return False
+
+    def __can_split_at(self, task_index: int) -> bool:
+        if task_index not in self.__splittable:
+            collecting_tasks = [type(task).__name__ for task in self.tasks[task_index:]
+                                if callable(getattr(task, 'end', None))]
+            if collecting_tasks:
+                self.logger.debug("Running serially, since %s collect results for end().",
+                                  ", ".join(collecting_tasks))
+            self.__splittable[task_index] = not collecting_tasks
+        return self.__splittable[task_index]
+
+    def __emit_completed(self, wait: bool):
+        while self.__pending and (wait or self.__pending[0].done()):
+            records, events, profiles, failure = self.__pending.popleft().result()
+            tracing.add_events(events)
+            profiling.add_profiles(*profiles)
+            for record in records:
+                logging.getLogger(record.name).handle(record)
+            if failure:
+                failure.reraise()
+
+    def _run_in_worker(self, task_index: int, previous_results: List, result):
+        self._in_worker = True
+        # drop the events and profiles that the worker inherited from the parent
+        tracing.take_events()
+        profiling.take_profiles()
+        # drop the entities that the worker inherited from the parent's batches, since the parent runs them
+        self._batches = {}
+        self._parent_frames = threading.local()
+        root_logger = logging.getLogger()
+        handlers = root_logger.handlers
+        buffer = _BufferingHandler()
+        root_logger.handlers = [buffer]
+        failure = None
+        try:
+            super()._run_next(task_index, previous_results, result)
+            self._run_batches()
+        except Exception as exception:
+            failure = _Failure(exception)
+        finally:
+            root_logger.handlers = handlers
+        return buffer.records, tracing.take_events(), profiling.take_profiles(), failure
+
+
+def _run_subtree(task_index: int, previous_results: List, result):
+    return _RUNNER._run_in_worker(task_index, previous_results, result)
+
+
+class _Failure:
+    # Exceptions whose constructors take other arguments than their message, like the TaskRunner's warnings, cannot be
+    # unpickled. Since unpicklable results break the pool, we transfer only the exception's type and arguments.
+    def __init__(self, exception: Exception):
+        self.exception_type = type(exception)
+        self.args = exception.args
+
+    def reraise(self):
+        exception = self.exception_type.__new__(self.exception_type)
+        exception.args = self.args
+        raise exception
+
+
+class _BufferingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.records = []
+
+    def emit(self, record: logging.LogRecord):
+        # make the record picklable, since its arguments and exception info may reference arbitrary objects
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        self.records.append(record)
@@ -0,0 +1,111 @@
+from queue import Queue
+from threading import Thread, Condition, Lock
+from typing import List, Dict, Optional
+
+from tasks.journal import Journal
+from tasks.task_runner import TaskRunner
+
+
+class PipelineTaskRunner(TaskRunner):
+    """
+    Runs every task of the chain, except the first one, as a pipeline stage with a bounded input queue and its own
+    worker threads. A stage passes each of its results on to the next stage's queue, such that, for example, the
+    CheckoutTask fetches one version while the CompileTask builds the previous one and the DetectTask analyzes the one
+    before that. Tasks run by more than one worker must be thread safe.
+    """
+
+    def __init__(self, tasks: List, stage_workers: Dict[str, int] = None, queue_size: int = 2,
+                 journal: Journal = None):
+        super().__init__(tasks, journal)
+        stage_workers = stage_workers or {}
+        self.stages = [_Stage(type(task).__name__, stage_workers.get(type(task).__name__, 1), queue_size)
+                       for task in tasks]
+        self.__in_flight = 0
+        self.__in_flight_changed = Condition()
+        self.__error = None  # type: Optional[Exception]
+
+    def run(self):
+        threads = [Thread(target=self.__work, args=(stage_index,), daemon=True)
+                   for stage_index, stage in enumerate(self.stages) if stage_index > 0
+                   for _ in range(stage.workers)]
+        for thread in threads:
+            thread.start()
+
+        try:
+            self._run(0, [])
+            self.__await_completion()
+        finally:
+            for stage in self.stages[1:]:
+                for _ in range(stage.workers):
+                    stage.queue.put(None)
+            for thread in threads:
+                thread.join()
+
+        self.__log_stage_statistics()
+        if self.__error:
+            raise self.__error
+
+        self._end()
+
+    def _run_next(self, next_task_index: int, previous_results: List, result) -> bool:
+        with self.__in_flight_changed:
+            self.__in_flight += 1
+        self.stages[next_task_index].put((previous_results, result))
+        # the subtree completes in the next stage, which records it in the journal
+        return False
+
+    def _get_batch_size(self, compiled_task) -> int:
+        # the stages run their entities one by one, hence, we never collect a batch
+        return 0
+
+    def __work(self, stage_index: int):
+        stage = self.stages[stage_index]
+        while True:
+            item = stage.queue.get()
+            if item is None:
+                break
+
+            try:
+                if not self.__error:
+                    previous_results, result = item
+                    super()._run_next(stage_index, previous_results, result)
+            except Exception as error:
+                self.__error = self.__error or error
+            finally:
+                with self.__in_flight_changed:
+                    self.__in_flight -= 1
+                    self.__in_flight_changed.notify_all()
+
+    def __await_completion(self):
+        with self.__in_flight_changed:
+            while self.__in_flight:
+                self.__in_flight_changed.wait()
+
+    def __log_stage_statistics(self):
+        for stage in self.stages[1:]:
+            self.logger.info("Stage %s: %d worker(s), %d item(s), queue depth max %d, mean %.1f",
+                             stage.name, stage.workers, stage.number_of_items, stage.max_queue_depth,
+                             stage.mean_queue_depth)
+
+
+class _Stage:
+    def __init__(self, name: str, workers: int, queue_size: int):
+        self.name = name
+        self.workers = workers
+        self.queue = Queue(queue_size * workers)
+        self.number_of_items = 0
+        self.max_queue_depth = 0
+        self.__total_queue_depth = 0
+        self.__statistics_lock = Lock()
+
+    def put(self, item):
+        self.queue.put(item)
+        with self.__statistics_lock:
+            queue_depth = self.queue.qsize()
+            self.number_of_items += 1
+            self.max_queue_depth = max(self.max_queue_depth, queue_depth)
+            self.__total_queue_depth += queue_depth
+
+    @property
+    def mean_queue_depth(self) -> float:
+        return self.__total_queue_depth / self.number_of_items if self.number_of_items else 0.0
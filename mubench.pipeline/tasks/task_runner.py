@@ -1,8 +1,12 @@
 import collections
 import logging
+import threading
 from inspect import signature, Parameter
 
-from typing import List
+from typing import List, Dict, Optional, Tuple, Iterator
+
+from tasks.journal import Journal
+from utils import tracing, profiling
 
 
 class Continue:
@@ -10,62 +14,250 @@ class Continue:
 
 
 class TaskRunner:
-    def __init__(self, tasks: List):
+    """
+    Runs a chain of tasks, every task on every result of its predecessors.
+
+    A task may implement `run_batch(parameter_values: List[Tuple])`, in addition to `run`, to process many entities in
+    one call, e.g., to amortize startup costs. If `batch_size` is greater than one, the runner collects the entities of
+    such a task and passes them in chunks of at most `batch_size` parameter-value tuples, one per entity, in the order of
+    `run`'s parameters. A task may ask for larger batches with a `batch_size` attribute of its own. `run_batch` returns a list with the result of every entity, in the same order. An exception in
+    this list reports the failure of its entity alone. Tasks without `run_batch` are run entity by entity. An entity
+    whose subsequent entities wait for a batch completes, and is recorded in the journal, once they complete.
+    """
+
+    def __init__(self, tasks: List, journal: Journal = None, batch_size: int = 0):
         self.tasks = tasks
+        self.journal = journal
+        self.batch_size = batch_size
         self.logger = logging.getLogger("task_runner")
+        self.__journaled = {}  # type: Dict[int, bool]
+        self._batches = {}  # type: Dict[int, List[Tuple[List, Optional[_Frame]]]]
+        self._parent_frames = threading.local()
+        self.__plan = None  # type: Optional[List[_CompiledTask]]
+        self.__runs_next_inline = type(self)._run_next is TaskRunner._run_next
 
     def run(self):
-        self.__run(0, [])
+        self._run(0, [])
+        self._run_batches()
+        self._end()
+
+    def _end(self):
         for task in self.tasks:
             if callable(getattr(task, 'end', None)):
                 task.end()
 
-    def __run(self, current_task_index: int, previous_results: List):
-        task = self.tasks[current_task_index]
-        parameter_values = self.__get_parameter_values(task, previous_results)
+    def _run(self, current_task_index: int, previous_results: List) -> bool:
+        """
+        Runs the task and the subsequent tasks on its results, depth first. Returns whether all of them completed.
+        """
+        # the frame of the previous task, if the runner dispatched to this task from __run_frames()
+        parent = getattr(self._parent_frames, "frame", None)
+        self._parent_frames.frame = None
+        frames = []  # type: List[_Frame]
+        completed = self.__start(current_task_index, previous_results, frames, parent)
+        return self.__run_frames(frames, completed)
+
+    def __start(self, current_task_index: int, previous_results: List, frames: List['_Frame'],
+                parent: Optional['_Frame'] = None) -> Optional[bool]:
+        """
+        Runs the task and pushes the frame that runs the subsequent tasks on its results. Returns None, if it pushed a
+        frame, and otherwise whether the task completed.
+        """
+        if self._is_completed(current_task_index, previous_results):
+            return True
+
+        compiled_task = self._get_plan()[current_task_index]
+        batch_size = self._get_batch_size(compiled_task)
+        if compiled_task.run_batch and batch_size > 1:
+            parent = frames[-1] if frames else parent
+            if parent:
+                parent.pending += 1
+            batch = self._batches.setdefault(current_task_index, [])
+            batch.append((previous_results, parent))
+            if len(batch) >= batch_size:
+                self.__run_batch(current_task_index)
+            # the entity completes with its batch, which then completes the previous entities
+            return True
+
+        parameter_values = self._get_parameter_values(current_task_index, previous_results)
+
+        try:
+            if tracing.is_tracing() or profiling.is_profiling():
+                with tracing.span(compiled_task.name, "task", entity=self._get_entity(previous_results)), \
+                        profiling.profile(compiled_task.name):
+                    results = compiled_task.run(*parameter_values)
+            else:
+                results = compiled_task.run(*parameter_values)
+        except Exception as exception:
+            self._report_failure(compiled_task.task, exception)
+            return False
+
+        frames.append(_Frame(current_task_index, previous_results,
+                             self._get_next_results(current_task_index, previous_results, results),
+                             frames[-1] if frames else parent))
+        return None
 
-        task_name = type(task).__name__
-        self.logger.debug("Running task {}".format(task_name))
-        self.logger.debug("Parameters: {}".format([str(v) for v in parameter_values]))
+    def __run_frames(self, frames: List['_Frame'], completed: Optional[bool]) -> bool:
+        # We keep the frames on an explicit stack, rather than recursing once per task, such that the stack depth is
+        # constant, however long the chain. Runners that override _run_next() take over the dispatch to the next task.
+        plan = self._get_plan()
+        while frames:
+            frame = frames[-1]
+            if completed is False:
+                frame.completed = False
 
+            next_item = next(frame.next_results, None)
+            if next_item is None:
+                frames.pop()
+                frame.exhausted = True
+                if frame.pending:
+                    # some subsequent entities wait for their batch, which completes the entity later
+                    if not frame.deferred and frame.parent:
+                        frame.parent.pending += 1
+                    frame.deferred = True
+                    completed = True
+                else:
+                    completed = self.__complete(frame)
+            else:
+                result, next_results = next_item
+                next_task_index = frame.task_index + 1
+                if self.__runs_next_inline:
+                    self.logger.info("Running %s on %s", plan[next_task_index].name, result)
+                    completed = self.__start(next_task_index, next_results, frames)
+                else:
+                    self._parent_frames.frame = frame
+                    try:
+                        completed = self._run_next(next_task_index, next_results, result)
+                    finally:
+                        self._parent_frames.frame = None
+        return bool(completed)
+
+    def __complete(self, frame: '_Frame') -> bool:
+        if frame.completed:
+            self._record_completed(frame.task_index, frame.previous_results)
+        if frame.deferred:
+            self.__resolve(frame.parent, frame.completed)
+        return frame.completed
+
+    def __resolve(self, parent: Optional['_Frame'], completed: bool):
+        """
+        Completes the previous entities, once none of their subsequent entities waits for a batch anymore.
+        """
+        while parent:
+            parent.pending -= 1
+            parent.completed = parent.completed and completed
+            if parent.pending or not parent.exhausted:
+                return
+            if parent.completed:
+                self._record_completed(parent.task_index, parent.previous_results)
+            completed = parent.completed
+            parent = parent.parent
+
+    def _get_batch_size(self, compiled_task: '_CompiledTask') -> int:
+        return max(self.batch_size, compiled_task.batch_size)
+
+    def _run_batches(self):
+        """
+        Runs the entities that are still waiting for their batch to fill up. Running a batch may add entities to the
+        batches of subsequent tasks, hence, we run the batches in the order of the tasks.
+        """
+        while self._batches:
+            self.__run_batch(min(self._batches))
+
+    def __run_batch(self, current_task_index: int):
+        compiled_task = self._get_plan()[current_task_index]
+        batch = self._batches.pop(current_task_index)
         try:
-            results = task.run(*parameter_values)
+            parameter_values = [tuple(self._get_parameter_values(current_task_index, previous_results))
+                                for previous_results, _ in batch]
+            with tracing.span(compiled_task.name, "task", entities=len(batch)), profiling.profile(compiled_task.name):
+                batch_results = compiled_task.run_batch(parameter_values)
+            if len(batch_results) != len(batch):
+                raise TaskBatchResultsMismatchWarning(compiled_task.task, len(batch), len(batch_results))
         except Exception as exception:
-            logger = logging.getLogger("task_runner.{}".format(task_name))
-            logger.warning("%s", exception)
-            logger.debug("Full exception:", exc_info=True)
+            self._report_failure(compiled_task.task, exception)
+            for _, parent in batch:
+                self.__resolve(parent, False)
             return
 
+        for (previous_results, parent), results in zip(batch, batch_results):
+            if isinstance(results, Exception):
+                self._report_failure(compiled_task.task, results)
+                self.__resolve(parent, False)
+            else:
+                frame = _Frame(current_task_index, previous_results,
+                               self._get_next_results(current_task_index, previous_results, results), parent)
+                frame.deferred = True
+                self.__run_frames([frame], None)
+
+    def _run_next(self, next_task_index: int, previous_results: List, result) -> bool:
+        self.logger.info("Running %s on %s", self._get_plan()[next_task_index].name, result)
+        return self._run(next_task_index, previous_results)
+
+    def _get_plan(self) -> List['_CompiledTask']:
+        """
+        Returns the compiled tasks of the chain. Compiling validates every task once, up front, and, later, binds its
+        parameters once per combination of types of the previous results, rather than once per entity.
+        """
+        if self.__plan is None:
+            self.__plan = [_CompiledTask(task) for task in self.tasks]
+        return self.__plan
+
+    @staticmethod
+    def _get_entity(previous_results: List) -> str:
+        return str(previous_results[-1]) if previous_results else ""
+
+    def _is_completed(self, task_index: int, previous_results: List) -> bool:
+        if self.__is_journaled(task_index) and self.journal.is_completed(self.tasks[task_index], previous_results):
+            task = type(self.tasks[task_index]).__name__
+            self.logger.debug("Skipping %s, since it completed in a previous run.", task)
+            return True
+        return False
+
+    def _record_completed(self, task_index: int, previous_results: List):
+        if self.__is_journaled(task_index):
+            self.journal.record(self.tasks[task_index], previous_results)
+
+    def __is_journaled(self, task_index: int) -> bool:
+        # tasks with an end() hook collect results across runs, hence, we cannot skip any run before them
+        if task_index not in self.__journaled:
+            self.__journaled[task_index] = self.journal is not None and \
+                                           not any(callable(getattr(task, 'end', None))
+                                                   for task in self.tasks[task_index:])
+        return self.__journaled[task_index]
+
+    def _get_next_results(self, current_task_index: int, previous_results: List, results):
+        task = self.tasks[current_task_index]
+        has_next_task = current_task_index + 1 < len(self.tasks)
+        previous_result_types = {type(previous_result) for previous_result in previous_results}
+
         if not results:
             results = [Continue()]
 
         for result in TaskRunner.__as_iterable(results):
-            result_type_already_exists = type(result) in [type(previous_result) for previous_result in previous_results]
-            if result_type_already_exists:
+            if type(result) in previous_result_types:
                 raise TaskParameterDuplicateTypeWarning(task, type(result))
 
-            if current_task_index + 1 < len(self.tasks):
-                next_task = type(self.tasks[current_task_index + 1]).__name__
-
+            if has_next_task:
                 if isinstance(result, Continue):
                     next_results = previous_results
                 else:
                     next_results = previous_results + [result]
 
-                self.logger.info("Running %s on %s", next_task, result)
-                self.__run(current_task_index + 1, next_results)
+                yield result, next_results
 
     @staticmethod
-    def __get_parameter_values(task, previous_results):
-        parameter_values = []
-        for parameter in TaskRunner.__get_parameters(task):
-            parameter_value = TaskRunner.__find_value(parameter, previous_results)
-            if parameter_value:
-                if type(parameter_value) in [type(existing_value) for existing_value in parameter_values]:
-                    raise TaskRequestsDuplicateTypeWarning(task, type(parameter_value))
-                parameter_values.append(parameter_value)
-            else:
-                raise TaskParameterUnavailableWarning(task, parameter)
+    def _report_failure(task, exception: Exception):
+        logger = logging.getLogger("task_runner.{}".format(type(task).__name__))
+        logger.warning("%s", exception)
+        logger.debug("Full exception:", exc_info=True)
+
+    def _get_parameter_values(self, task_index: int, previous_results: List) -> List:
+        compiled_task = self._get_plan()[task_index]
+        parameter_values = compiled_task.get_parameter_values(previous_results)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Running task %s with parameters %s", compiled_task.name,
+                              [str(value) for value in parameter_values])
         return parameter_values
 
     @staticmethod
@@ -75,16 +267,77 @@ class TaskRunner:
         else:
             return [previous_results]
 
-    @staticmethod
-    def __get_parameters(task):
-        return signature(task.run).parameters.values()
 
-    @staticmethod
-    def __find_value(parameter: Parameter, previous_results):
-        for value in previous_results:
-            if isinstance(value, parameter.annotation):
-                return value
-        return None
+class _Frame:
+    """
+    The entity of a task, with the results that the subsequent tasks still have to run on. The entity completes once
+    all of them complete, including those that wait for a batch (`pending`) after its results are `exhausted`. The
+    `parent` is the frame of the previous task, which a `deferred` entity completes once it completes.
+    """
+    __slots__ = ["task_index", "previous_results", "next_results", "completed", "parent", "pending", "exhausted",
+                 "deferred"]
+
+    def __init__(self, task_index: int, previous_results: List, next_results: Iterator[Tuple[object, List]],
+                 parent: Optional['_Frame'] = None):
+        self.task_index = task_index
+        self.previous_results = previous_results
+        self.next_results = next_results
+        self.completed = True
+        self.parent = parent
+        self.pending = 0
+        self.exhausted = False
+        self.deferred = False
+
+
+class _CompiledTask:
+    """
+    A task with the bindings of its parameters. The parameter that a previous result binds to depends only on the
+    result's type, hence, we bind the parameters once per combination of types of the previous results.
+    """
+
+    def __init__(self, task):
+        if not callable(getattr(task, 'run', None)):
+            raise TaskNotRunnableWarning(task)
+
+        self.task = task
+        self.name = type(task).__name__
+        self.run = task.run
+        self.run_batch = task.run_batch if callable(getattr(task, 'run_batch', None)) else None
+        self.batch_size = getattr(task, 'batch_size', 0) if self.run_batch else 0
+        self.parameters = list(signature(task.run).parameters.values())
+        self.__bindings = {}  # type: Dict[Tuple[type, ...], Tuple[int, ...]]
+
+        annotations = [parameter.annotation for parameter in self.parameters]
+        for annotation in annotations:
+            if annotations.count(annotation) > 1:
+                raise TaskRequestsDuplicateTypeWarning(task, annotation)
+
+    def get_parameter_values(self, previous_results: List) -> List:
+        result_types = tuple(map(type, previous_results))
+        binding = self.__bindings.get(result_types)
+        if binding is None:
+            binding = self.__bindings[result_types] = self.__bind(previous_results)
+
+        parameter_values = [previous_results[index] for index in binding]
+        if not all(parameter_values):
+            # like a missing result, an empty one, e.g., an empty list, is no value
+            parameter = self.parameters[[bool(value) for value in parameter_values].index(False)]
+            raise TaskParameterUnavailableWarning(self.task, parameter)
+        return parameter_values
+
+    def __bind(self, previous_results: List) -> Tuple[int, ...]:
+        binding = []
+        for parameter in self.parameters:
+            index = next((index for index, value in enumerate(previous_results)
+                          if isinstance(value, parameter.annotation)), None)
+            if index is None:
+                raise TaskParameterUnavailableWarning(self.task, parameter)
+
+            value_type = type(previous_results[index])
+            if value_type in [type(previous_results[bound_index]) for bound_index in binding]:
+                raise TaskRequestsDuplicateTypeWarning(self.task, value_type)
+            binding.append(index)
+        return tuple(binding)
 
 
 class TaskParameterUnavailableWarning(UserWarning):
@@ -103,3 +356,14 @@ class TaskParameterDuplicateTypeWarning(UserWarning):
 class TaskRequestsDuplicateTypeWarning(UserWarning):
     def __init__(self, task, type_: type):
         super().__init__("Task {} requests multiple parameters of type {}".format(type(task).__name__, type_.__name__))
+
+
+class TaskBatchResultsMismatchWarning(UserWarning):
+    def __init__(self, task, expected: int, actual: int):
+        super().__init__("Task {} returned {} results for a batch of {} entities".format(
+            type(task).__name__, actual, expected))
+
+
+class TaskNotRunnableWarning(UserWarning):
+    def __init__(self, task):
+        super().__init__("Task {} has no run() method".format(type(task).__name__))
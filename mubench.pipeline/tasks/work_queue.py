@@ -0,0 +1,209 @@
+import json
+import logging
+import time
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from socketserver import ThreadingMixIn
+from threading import Lock, Thread, Event
+from typing import List, Optional, Dict, Callable
+from urllib.parse import urljoin
+from uuid import uuid4
+
+import requests
+
+
+class WorkQueue:
+    """
+    Hands out work items to workers under leases. An item whose lease is neither renewed nor completed before it
+    times out, e.g., because its worker crashed, goes back to the queue, to be leased to another worker. An item whose
+    worker reports it failed is done, like a completed one, such that it does not fail over and over again.
+    """
+
+    def __init__(self, items: List[str], lease_timeout: float, clock: Callable[[], float] = time.time):
+        self.items = list(items)
+        self.lease_timeout = lease_timeout
+        self.__clock = clock
+        self.__pending = deque(items)
+        self.__leases = OrderedDict()  # type: Dict[str, _Lease]
+        self.__completed = set()
+        self.failed = OrderedDict()  # type: Dict[str, str]
+        self.__lock = Lock()
+        self.__logger = logging.getLogger("work_queue")
+
+    def lease(self, worker: str) -> Optional[Dict]:
+        with self.__lock:
+            self.__requeue_expired_leases()
+            if not self.__pending:
+                return None
+
+            lease = _Lease(str(uuid4()), self.__pending.popleft(), worker, self.__clock() + self.lease_timeout)
+            self.__leases[lease.id] = lease
+            self.__logger.info("Leased %s to %s.", lease.item, worker)
+            return {"lease": lease.id, "item": lease.item, "timeout": self.lease_timeout}
+
+    def renew(self, lease_id: str) -> bool:
+        with self.__lock:
+            lease = self.__leases.get(lease_id)
+            if lease:
+                lease.expiry = self.__clock() + self.lease_timeout
+            return lease is not None
+
+    def complete(self, lease_id: str) -> bool:
+        with self.__lock:
+            lease = self.__leases.pop(lease_id, None)
+            if lease:
+                self.__completed.add(lease.item)
+                self.__logger.info("%s completed %s (%d of %d).", lease.worker, lease.item, len(self.__completed),
+                                   len(self.items))
+            return lease is not None
+
+    def fail(self, lease_id: str, reason: str) -> bool:
+        with self.__lock:
+            lease = self.__leases.pop(lease_id, None)
+            if lease:
+                self.failed[lease.item] = reason
+                self.__logger.error("%s failed %s: %s", lease.worker, lease.item, reason)
+            return lease is not None
+
+    def is_done(self) -> bool:
+        with self.__lock:
+            return len(self.__completed) + len(self.failed) == len(self.items)
+
+    def __requeue_expired_leases(self):
+        now = self.__clock()
+        for lease in [lease for lease in self.__leases.values() if lease.expiry <= now]:
+            self.__logger.warning("Lease of %s by %s timed out, requeueing it.", lease.item, lease.worker)
+            del self.__leases[lease.id]
+            self.__pending.append(lease.item)
+
+
+class _Lease:
+    def __init__(self, lease_id: str, item: str, worker: str, expiry: float):
+        self.id = lease_id
+        self.item = item
+        self.worker = worker
+        self.expiry = expiry
+
+
+class WorkQueueServer(ThreadingMixIn, HTTPServer):
+    """
+    Serves a work queue and the command-line arguments of the run to workers over HTTP:
+
+    - GET /arguments returns the arguments, as a JSON list
+    - POST /lease with {"worker": <name>} returns a lease {"lease": <id>, "item": <item>, "timeout": <seconds>}, or
+      {"lease": null, "done": <bool>}, if there is currently no item to lease
+    - POST /renew and POST /complete with {"lease": <id>} renew and complete a lease
+    - POST /fail with {"lease": <id>, "reason": <message>} reports that the leased item failed
+    """
+    daemon_threads = True
+
+    def __init__(self, queue: WorkQueue, arguments: List[str], host: str = "localhost", port: int = 0):
+        super().__init__((host, port), _WorkQueueRequestHandler)
+        self.queue = queue
+        self.arguments = arguments
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return "http://{}:{}/".format(host, port)
+
+    @contextmanager
+    def serving(self, grace_period: float = 0):
+        """
+        Serves the queue in the background. On exit, we keep serving for the grace period, such that workers that
+        poll meanwhile learn that the queue is done, rather than finding no server.
+        """
+        thread = Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        try:
+            yield self
+            time.sleep(grace_period)
+        finally:
+            self.shutdown()
+            self.server_close()
+            thread.join()
+
+
+class _WorkQueueRequestHandler(BaseHTTPRequestHandler):
+    server = None  # type: WorkQueueServer
+
+    def do_GET(self):
+        if self.path == "/arguments":
+            self.__respond(200, self.server.arguments)
+        else:
+            self.__respond(404, {"error": "unknown resource {}".format(self.path)})
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))).decode("utf-8") or "{}")
+        queue = self.server.queue
+        if self.path == "/lease":
+            lease = queue.lease(request.get("worker", self.client_address[0]))
+            self.__respond(200, lease or {"lease": None, "done": queue.is_done()})
+        elif self.path == "/renew":
+            self.__respond(200, {"valid": queue.renew(request.get("lease"))})
+        elif self.path == "/complete":
+            self.__respond(200, {"valid": queue.complete(request.get("lease"))})
+        elif self.path == "/fail":
+            self.__respond(200, {"valid": queue.fail(request.get("lease"), request.get("reason", ""))})
+        else:
+            self.__respond(404, {"error": "unknown resource {}".format(self.path)})
+
+    def __respond(self, status: int, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.getLogger("work_queue.server").debug(format, *args)
+
+
+class WorkQueueClient:
+    # seconds to wait before asking for a lease again, while all remaining items are leased to other workers
+    POLL_INTERVAL = 5
+
+    def __init__(self, url: str, worker: str):
+        self.url = url if url.endswith("/") else url + "/"
+        self.worker = worker
+
+    def get_arguments(self) -> List[str]:
+        response = requests.get(urljoin(self.url, "arguments"))
+        response.raise_for_status()
+        return response.json()
+
+    def lease(self) -> Dict:
+        return self.__post("lease", {"worker": self.worker})
+
+    def renew(self, lease_id: str) -> bool:
+        return self.__post("renew", {"lease": lease_id})["valid"]
+
+    def complete(self, lease_id: str) -> bool:
+        return self.__post("complete", {"lease": lease_id})["valid"]
+
+    def fail(self, lease_id: str, reason: str) -> bool:
+        return self.__post("fail", {"lease": lease_id, "reason": reason})["valid"]
+
+    @contextmanager
+    def keeping_alive(self, lease: Dict):
+        """Renews the lease in the background, such that it does not time out while the worker is busy."""
+        stopped = Event()
+
+        def renew():
+            while not stopped.wait(lease["timeout"] / 3):
+                self.renew(lease["lease"])
+
+        thread = Thread(target=renew, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stopped.set()
+            thread.join()
+
+    def __post(self, resource: str, data: Dict) -> Dict:
+        response = requests.post(urljoin(self.url, resource), json=data)
+        response.raise_for_status()
+        return response.json()
@@ -182,6 +182,9 @@ class TestMavenCommand:
         except CommandFailedError as e:
             assert_equals(expected_error_output, e.output)
 
+    def test_build_files(self, shell_mock, copy_mock):
+        assert_equals(["pom.xml"], MavenCommand.build_files())
+
 
 
 @patch("data.build_command.shutil.copy")
@@ -246,6 +249,9 @@ class TestGradleCommand:
         except CommandFailedError as e:
             assert_equals(expected_error_output, e.output)
 
+    def test_build_files(self, shell_mock, copy_mock):
+        assert_equals(["build.gradle", "settings.gradle"], GradleCommand.build_files())
+
 
 @patch("data.build_command.shutil.copy")
 @patch("data.build_command.Shell.exec")
@@ -290,3 +296,6 @@ class TestAntCommand:
             AntCommand("ant", []).execute("-project_dir-", self.logger)
         except CommandFailedError as e:
             assert_equals(expected_error_output, e.output)
+
+    def test_build_files(self, shell_mock, copy_mock):
+        assert_equals(["build.xml"], AntCommand.build_files())
@@ -0,0 +1,119 @@
+import os
+from os.path import join
+from tempfile import mkdtemp
+from unittest.mock import patch
+
+from nose.tools import assert_equals, assert_raises
+from yaml import YAMLError
+
+from data.dataset_index import DatasetIndex
+from data.misuse import Misuse
+from data.pattern import Pattern
+from data.project import Project
+from utils.io import remove_tree, write_yaml, create_file
+
+
+class TestDatasetIndex:
+    # noinspection PyAttributeOutsideInit
+    def setup(self):
+        self.temp_dir = mkdtemp(prefix="mubench-test-dataset-index_")
+        self.data_path = join(self.temp_dir, "data")
+        self.index_path = join(self.temp_dir, "index", "dataset.sqlite")
+
+        self.project_file = join(self.data_path, "-p-", Project.PROJECT_FILE)
+        write_yaml({"name": "-project-"}, self.project_file)
+        self.version_file = join(self.data_path, "-p-", Project.VERSIONS_DIR, "-v-", "version.yml")
+        write_yaml({"misuses": ["-m-"]}, self.version_file)
+        self.misuse_path = join(self.data_path, "-p-", Project.MISUSES_DIR, "-m-")
+        write_yaml({"description": "-description-"}, join(self.misuse_path, Misuse.MISUSE_FILE))
+        self.patterns_path = join(self.misuse_path, Misuse.PATTERNS_DIR)
+
+    def teardown(self):
+        remove_tree(self.temp_dir)
+
+    def test_indexes_projects_and_versions(self):
+        uut = self.__update_index()
+
+        assert_equals(["-p-"], uut.get_project_ids())
+        assert_equals(["-v-"], uut.get_version_ids("-p-"))
+
+    def test_reads_yaml(self):
+        uut = self.__update_index()
+
+        assert_equals({"name": "-project-"}, uut.read_yaml(self.project_file))
+
+    def test_reads_indexed_files_from_index(self):
+        self.__update_index()
+
+        with patch("data.dataset_index.read_yaml") as read_yaml_mock:
+            uut = self.__update_index()
+
+        read_yaml_mock.assert_not_called()
+        assert_equals({"name": "-project-"}, uut.read_yaml(self.project_file))
+
+    def test_rereads_changed_files(self):
+        self.__update_index()
+        write_yaml({"name": "-changed-"}, self.project_file)
+        self.__touch(self.project_file)
+
+        uut = self.__update_index()
+
+        assert_equals({"name": "-changed-"}, uut.read_yaml(self.project_file))
+
+    def test_drops_removed_projects(self):
+        self.__update_index()
+        remove_tree(join(self.data_path, "-p-"))
+
+        uut = self.__update_index()
+
+        assert_equals([], uut.get_project_ids())
+        assert not uut.exists(self.project_file)
+
+    def test_reports_invalid_yaml_on_read(self):
+        with open(self.project_file, "w") as file:
+            file.write("name: [")
+
+        uut = self.__update_index()
+
+        assert_equals(["-p-"], uut.get_project_ids())
+        assert_raises(YAMLError, uut.read_yaml, self.project_file)
+
+    def test_indexes_patterns(self):
+        create_file(join(self.patterns_path, "P1.java"))
+        create_file(join(self.patterns_path, "sub", "P2.java"))
+
+        uut = self.__update_index()
+
+        assert_equals(["P1.java", join("sub", "P2.java")], uut.get_patterns(self.patterns_path))
+
+    def test_finds_added_patterns(self):
+        self.__update_index()
+        create_file(join(self.patterns_path, "P1.java"))
+
+        uut = self.__update_index()
+
+        assert_equals(["P1.java"], uut.get_patterns(self.patterns_path))
+
+    def test_entities_read_from_index(self):
+        create_file(join(self.patterns_path, "P1.java"))
+        uut = self.__update_index()
+
+        project = Project(self.data_path, "-p-", uut)
+        version = project.versions[0]
+        misuse = version.misuses[0]
+
+        assert_equals("-project-", project.name)
+        assert_equals("-v-", version.version_id)
+        assert_equals("-description-", misuse.description)
+        assert_equals({Pattern(self.patterns_path, "P1.java")}, misuse.patterns)
+
+    def __update_index(self) -> DatasetIndex:
+        index = DatasetIndex(self.data_path, self.index_path)
+        index.update()
+        return index
+
+    @staticmethod
+    def __touch(path: str):
+        # make sure the modification time changes, even on file systems with a coarse resolution
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
@@ -0,0 +1,80 @@
+import gc
+from os.path import join
+from tempfile import mkdtemp
+from weakref import ref
+
+from nose.tools import assert_equals
+
+from data import entity_registry
+from data.project import Project
+from utils.io import remove_tree, write_yaml, get_number_of_yaml_parses
+
+
+class TestEntityRegistry:
+    # noinspection PyAttributeOutsideInit
+    def setup(self):
+        self.temp_dir = mkdtemp(prefix="mubench-test-entity-registry_")
+        write_yaml({"name": "-project-"}, join(self.temp_dir, "-p-", Project.PROJECT_FILE))
+        write_yaml({"misuses": ["-m-"]}, join(self.temp_dir, "-p-", Project.VERSIONS_DIR, "-v-", "version.yml"))
+        write_yaml({"description": "-description-"},
+                   join(self.temp_dir, "-p-", Project.MISUSES_DIR, "-m-", "misuse.yml"))
+
+    def teardown(self):
+        entity_registry.invalidate(self.temp_dir)
+        remove_tree(self.temp_dir)
+
+    def test_builds_entity_once(self):
+        project = entity_registry.get_project(self.temp_dir, "-p-")
+
+        assert entity_registry.get_project(self.temp_dir, "-p-") is project
+
+    def test_shares_entities(self):
+        project = entity_registry.get_project(self.temp_dir, "-p-")
+        version = entity_registry.get_version(self.temp_dir, "-p-", "-v-")
+        misuse = entity_registry.get_misuse(self.temp_dir, "-p-", "-v-", "-m-")
+
+        assert project.versions[0] is version
+        assert version.misuses[0] is misuse
+
+    def test_distinguishes_misuses_of_different_versions(self):
+        misuse = entity_registry.get_misuse(self.temp_dir, "-p-", "-v-", "-m-")
+
+        assert entity_registry.get_misuse(self.temp_dir, "-p-", "-v2-", "-m-") is not misuse
+
+    def test_parses_shared_file_once(self):
+        project = entity_registry.get_project(self.temp_dir, "-p-")
+        project.name
+        number_of_yaml_parses = get_number_of_yaml_parses()
+
+        version = entity_registry.get_version(self.temp_dir, "-p-", "-v-")
+        version.misuses[0].description
+        entity_registry.get_misuse(self.temp_dir, "-p-", "-v-", "-m-").description
+        entity_registry.get_project(self.temp_dir, "-p-").name
+
+        # the version file and the misuse file
+        assert_equals(number_of_yaml_parses + 2, get_number_of_yaml_parses())
+
+    def test_invalidates_entities(self):
+        project = entity_registry.get_project(self.temp_dir, "-p-")
+
+        entity_registry.invalidate(self.temp_dir)
+
+        assert entity_registry.get_project(self.temp_dir, "-p-") is not project
+
+    def test_invalidates_entities_of_project(self):
+        project = entity_registry.get_project(self.temp_dir, "-p-")
+        other_project = entity_registry.get_project(self.temp_dir, "-other-")
+
+        entity_registry.invalidate(self.temp_dir, "-p-")
+
+        assert entity_registry.get_project(self.temp_dir, "-p-") is not project
+        assert entity_registry.get_project(self.temp_dir, "-other-") is other_project
+
+    def test_drops_unused_entities(self):
+        project = entity_registry.get_project(self.temp_dir, "-p-")
+        project_ref = ref(project)
+
+        del project
+        gc.collect()
+
+        assert project_ref() is None
@@ -3,11 +3,14 @@ from os.path import join, dirname, exists
 from shutil import rmtree
 from tempfile import mkdtemp
 
+from unittest.mock import patch
+
 from nose.tools import assert_equals
 
 from data.misuse import Misuse, Location
 from data.pattern import Pattern
 from tests.test_utils.data_util import create_misuse
+from utils.io import write_yaml, read_yaml
 
 
 # noinspection PyAttributeOutsideInit
@@ -57,6 +60,29 @@ class TestMisuse:
         assert_equals("blub", misuse.fix.description)
         assert_equals("42", misuse.fix.revision)
 
+    def test_reads_misuse_file_once(self):
+        write_yaml({"description": "-description-", "api": ["-api-"]}, self.uut.misuse_file)
+
+        with patch("data.misuse.read_yaml", wraps=read_yaml) as read_yaml_mock:
+            assert_equals("-description-", self.uut.description)
+            assert_equals(["-api-"], self.uut.apis)
+
+        assert_equals(1, read_yaml_mock.call_count)
+
+    def test_parses_entire_misuse_file_once(self):
+        write_yaml({"description": "-description-"}, self.uut.misuse_file)
+
+        with patch("data.misuse.read_yaml", wraps=read_yaml) as read_yaml_mock:
+            assert_equals("-description-", self.uut._yaml["description"])
+            assert_equals("-description-", self.uut._yaml["description"])
+
+        assert_equals(1, read_yaml_mock.call_count)
+
+    def test_interns_ids(self):
+        other = Misuse(self.temp_dir, "".join(["pro", "ject"]), self.version_id, self.misuse_id)
+        assert self.uut.project_id is other.project_id
+        assert self.uut.id is other.id
+
     @staticmethod
     def create_pattern_file(misuse: Misuse, filename: str) -> Pattern:
         patterns_path = join(misuse.path, "patterns")
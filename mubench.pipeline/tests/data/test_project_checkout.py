@@ -1,13 +1,17 @@
+import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
 from os.path import join, exists, realpath, dirname
 from shutil import rmtree
 from tempfile import mkdtemp
+from unittest.mock import patch
 
 from nose.tools import assert_equals
 from pathlib import Path
 
 from data.project_checkout import GitProjectCheckout, LocalProjectCheckout, SVNProjectCheckout, \
     SyntheticProjectCheckout, ZipProjectCheckout
+from data.snapshot_cache import SnapshotCache
 from utils.io import remove_tree, copy_tree, create_file
 from utils.shell import Shell
 
@@ -104,6 +108,15 @@ class TestZipProjectCheckout:
 
         assert exists(join(self.checkouts_dir, "-project-", "-version-", "checkout", "foo"))
 
+    def test_recreate_does_not_download_again(self):
+        self.uut.create()
+        remove_tree(join(self.checkouts_dir, "-project-", "-version-", "checkout"))
+
+        with patch("data.project_checkout.download_file", side_effect=AssertionError("must not download")):
+            self.uut.create()
+
+        assert exists(join(self.checkouts_dir, "-project-", "-version-", "checkout", "foo"))
+
     def test_not_exists(self):
         assert not self.uut.exists()
 
@@ -123,6 +136,14 @@ class TestZipProjectCheckout:
 
         assert not exists(checkout_path)
 
+    def test_delete_deletes_bundle(self):
+        self.uut.create()
+
+        self.uut.delete()
+
+        bundle_path = join(self.checkouts_dir, "-project-", "-version-", "bundle")
+        assert not exists(join(bundle_path, "d2046c17a1ea90a45eb4d20429cd46c8"))
+
     def test_to_string(self):
         assert_equals("zip:-project-:{}".format(self.url), str(self.uut))
 
@@ -149,7 +170,7 @@ class TestGitProjectCheckout:
 
         uut.create()
 
-        assert exists(join(self.checkouts_dir, "-project-", "checkout", ".git"))
+        assert exists(join(self.checkouts_dir, "-project-", "repository.git", "objects"))
 
     def test_create_copies_and_checks_out_repo(self):
         uut = GitProjectCheckout(self.git_url, self.checkouts_dir, "-project-", "-id-", "HEAD")
@@ -160,6 +181,276 @@ class TestGitProjectCheckout:
         assert_equals(expected_checkout_path, uut.checkout_dir)
         assert exists(join(expected_checkout_path, ".git"))
 
+    def test_create_async_clones_and_checks_out_repo(self):
+        uut = GitProjectCheckout(self.git_url, self.checkouts_dir, "-project-", "-id-", "HEAD")
+
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(uut.create_async())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+        assert exists(join(self.checkouts_dir, "-project-", "repository.git", "objects"))
+        assert exists(join(uut.checkout_dir, ".git"))
+
+    def test_create_shares_objects_between_versions(self):
+        uut = GitProjectCheckout(self.git_url, self.checkouts_dir, "-project-", "-id-", "HEAD")
+        other_version = GitProjectCheckout(self.git_url, self.checkouts_dir, "-project-", "-id2-", "HEAD")
+
+        uut.create()
+        other_version.create()
+
+        assert exists(join(other_version.checkout_dir, "foo"))
+        assert_equals([], os.listdir(join(uut.checkout_dir, ".git", "objects", "pack")))
+        with open(join(uut.checkout_dir, ".git", "objects", "info", "alternates")) as alternates:
+            assert_equals("../../../../repository.git/objects\n", alternates.read())
+
+    def test_concurrent_creates_clone_once(self):
+        versions = [GitProjectCheckout(self.git_url, self.checkouts_dir, "-project-", "-id{}-".format(i), "HEAD")
+                    for i in range(4)]
+
+        with patch.object(GitProjectCheckout, "_clone", autospec=True,
+                          side_effect=GitProjectCheckout._clone) as clone_mock:
+            with ThreadPoolExecutor(len(versions)) as executor:
+                for future in [executor.submit(version.create) for version in versions]:
+                    future.result()
+
+        assert_equals(1, clone_mock.call_count)
+        assert all(exists(join(version.checkout_dir, "foo")) for version in versions)
+
+    def test_create_fetches_only_revision(self):
+        self.__commit("bar")
+        self.__commit("baz")
+        revision = Shell.exec("git rev-parse HEAD~1", cwd=self.git_url).strip()
+        uut = GitProjectCheckout("file://" + self.git_url, self.checkouts_dir, "-project-", "-id-", revision + "~1")
+
+        uut.create()
+
+        base_checkout_dir = join(self.checkouts_dir, "-project-", "repository.git")
+        assert exists(join(base_checkout_dir, "shallow"))
+        assert_equals("2", Shell.exec("git rev-list --count --all", cwd=base_checkout_dir).strip())
+        assert exists(join(uut.checkout_dir, "foo"))
+        assert not exists(join(uut.checkout_dir, "bar"))
+
+    def test_create_fetches_entire_history_if_remote_refuses_revision(self):
+        self.__commit("bar")
+        revision = Shell.exec("git rev-parse HEAD", cwd=self.git_url).strip()
+        uut = GitProjectCheckout(self.git_url, self.checkouts_dir, "-project-", "-id-", revision)
+
+        def refuse_fetch_by_id(command, *args, **kwargs):
+            if command.startswith("git fetch --depth"):
+                return False
+            return try_exec(command, *args, **kwargs)
+        try_exec = Shell.try_exec
+        with patch.object(Shell, "try_exec", side_effect=refuse_fetch_by_id):
+            uut.create()
+
+        base_checkout_dir = join(self.checkouts_dir, "-project-", "repository.git")
+        assert not exists(join(base_checkout_dir, "shallow"))
+        assert exists(join(uut.checkout_dir, "bar"))
+
+    def test_sparse_checkout(self):
+        Shell.exec("git config uploadpack.allowFilter true", cwd=self.git_url)
+        os.makedirs(join(self.git_url, "module", "src"))
+        os.makedirs(join(self.git_url, "docs"))
+        self.__commit(join("module", "src", "A.java"))
+        self.__commit(join("module", "pom.xml"))
+        self.__commit(join("docs", "index.html"))
+        uut = GitProjectCheckout("file://" + self.git_url, self.checkouts_dir, "-project-", "-id-", "HEAD",
+                                 ["/module/src/", "pom.xml"])
+
+        uut.create()
+
+        assert exists(join(uut.checkout_dir, "module", "src", "A.java"))
+        assert exists(join(uut.checkout_dir, "module", "pom.xml"))
+        assert not exists(join(uut.checkout_dir, "docs"))
+        assert not exists(join(uut.checkout_dir, "foo"))
+        base_checkout_dir = join(self.checkouts_dir, "-project-", "repository.git")
+        assert_equals("true", Shell.exec("git config --get remote.origin.promisor", cwd=base_checkout_dir).strip())
+
+    def test_switches_between_sparse_and_full_checkout(self):
+        Shell.exec("git config uploadpack.allowFilter true", cwd=self.git_url)
+        os.makedirs(join(self.git_url, "docs"))
+        self.__commit(join("docs", "index.html"))
+        sparse = GitProjectCheckout("file://" + self.git_url, self.checkouts_dir, "-project-", "-id-", "HEAD", ["foo"])
+        full = GitProjectCheckout("file://" + self.git_url, self.checkouts_dir, "-project-", "-id-", "HEAD")
+
+        sparse.create()
+        assert not full.exists()
+        full.create()
+        assert exists(join(full.checkout_dir, "docs", "index.html"))
+        assert not sparse.exists()
+        sparse.create()
+
+        assert sparse.exists()
+        assert not exists(join(sparse.checkout_dir, "docs"))
+
+    def test_restores_checkout_from_snapshot_cache(self):
+        revision = Shell.exec("git rev-parse HEAD", cwd=self.git_url).strip()
+        snapshot_cache = SnapshotCache(join(self.temp_dir, "cache"))
+        uut = GitProjectCheckout(self.git_url, self.checkouts_dir, "-project-", "-id-", revision)
+        uut.snapshot_cache = snapshot_cache
+        uut.create()
+        uut.delete()
+
+        with patch.object(Shell, "exec", side_effect=AssertionError("must not run VCS commands")):
+            uut.create()
+            assert uut.exists()
+
+        assert exists(join(uut.checkout_dir, "foo"))
+        assert not exists(join(uut.checkout_dir, ".git"))
+
+    def test_does_not_cache_moving_revisions(self):
+        uut = GitProjectCheckout(self.git_url, self.checkouts_dir, "-project-", "-id-", "HEAD")
+        uut.snapshot_cache = SnapshotCache(join(self.temp_dir, "cache"))
+
+        uut.create()
+
+        assert not exists(join(self.temp_dir, "cache"))
+
+    def test_creates_checkout_from_exported_bundle(self):
+        self.__commit("bar")
+        self.__commit("baz")
+        revision = Shell.exec("git rev-parse HEAD~1", cwd=self.git_url).strip() + "~1"
+        bundles_dir = join(self.temp_dir, "bundles")
+        GitProjectCheckout("file://" + self.git_url, self.checkouts_dir, "-project-", "-id-", revision).create()
+        GitProjectCheckout("file://" + self.git_url, self.checkouts_dir, "-project-", "-id-", revision) \
+            .export_bundle([revision], bundles_dir)
+        remove_tree(self.git_url)
+
+        uut = GitProjectCheckout("file://" + self.git_url, join(self.temp_dir, "imported"), "-project-", "-id-",
+                                 revision, bundles_path=bundles_dir)
+        uut.create()
+
+        assert exists(join(bundles_dir, "-project-.bundle"))
+        assert exists(join(bundles_dir, "-project-.shallow"))
+        assert exists(join(uut.checkout_dir, "foo"))
+        assert not exists(join(uut.checkout_dir, "bar"))
+        Shell.exec("git fsck --no-dangling", cwd=uut.checkout_dir)
+
+    def test_creates_checkout_of_branch_from_exported_bundle(self):
+        bundles_dir = join(self.temp_dir, "bundles")
+        GitProjectCheckout(self.git_url, self.checkouts_dir, "-project-", "-id-", "HEAD").create()
+        GitProjectCheckout(self.git_url, self.checkouts_dir, "-project-", "-id-", "HEAD") \
+            .export_bundle(["HEAD"], bundles_dir)
+        self.__commit("bar")
+
+        uut = GitProjectCheckout(self.git_url, join(self.temp_dir, "imported"), "-project-", "-id-", "HEAD",
+                                 bundles_path=bundles_dir)
+        uut.create()
+
+        assert exists(join(uut.checkout_dir, "foo"))
+        assert not exists(join(uut.checkout_dir, "bar"))
+
+    def test_does_not_take_sparse_checkout_for_checkout_from_bundle(self):
+        Shell.exec("git config uploadpack.allowFilter true", cwd=self.git_url)
+        os.makedirs(join(self.git_url, "docs"))
+        self.__commit(join("docs", "index.html"))
+        bundles_dir = join(self.temp_dir, "bundles")
+        GitProjectCheckout(self.git_url, self.checkouts_dir, "-project-", "-id-", "HEAD").create()
+        GitProjectCheckout(self.git_url, self.checkouts_dir, "-project-", "-id-", "HEAD") \
+            .export_bundle(["HEAD"], bundles_dir)
+        imported_dir = join(self.temp_dir, "imported")
+        GitProjectCheckout("file://" + self.git_url, imported_dir, "-project-", "-id-", "HEAD", ["foo"]).create()
+
+        uut = GitProjectCheckout("file://" + self.git_url, imported_dir, "-project-", "-id-", "HEAD",
+                                 bundles_path=bundles_dir)
+
+        assert not uut.exists()
+        uut.create()
+        assert exists(join(uut.checkout_dir, "docs", "index.html"))
+
+    def test_creates_checkout_from_remote_if_bundle_lacks_revision(self):
+        bundles_dir = join(self.temp_dir, "bundles")
+        GitProjectCheckout(self.git_url, self.checkouts_dir, "-project-", "-id-", "HEAD").create()
+        GitProjectCheckout(self.git_url, self.checkouts_dir, "-project-", "-id-", "HEAD") \
+            .export_bundle(["HEAD"], bundles_dir)
+        self.__commit("bar")
+        revision = Shell.exec("git rev-parse HEAD", cwd=self.git_url).strip()
+
+        uut = GitProjectCheckout("file://" + self.git_url, join(self.temp_dir, "imported"), "-project-", "-id-",
+                                 revision, bundles_path=bundles_dir)
+        uut.create()
+
+        assert exists(join(uut.checkout_dir, "bar"))
+
+    def test_checkout_survives_move(self):
+        uut = GitProjectCheckout(self.git_url, self.checkouts_dir, "-project-", "-id-", "HEAD")
+        uut.create()
+
+        moved_checkouts_dir = join(self.temp_dir, "moved-checkouts")
+        os.rename(self.checkouts_dir, moved_checkouts_dir)
+        moved = GitProjectCheckout(self.git_url, moved_checkouts_dir, "-project-", "-id-", "HEAD")
+
+        assert moved.exists()
+        Shell.exec("git fsck --no-dangling", cwd=moved.checkout_dir)
+
+    def test_migrates_former_layout(self):
+        former_base_checkout_dir = join(self.checkouts_dir, "-project-", "checkout")
+        Shell.exec("git clone {} {} --quiet".format(self.git_url, former_base_checkout_dir))
+        uut = GitProjectCheckout(self.git_url, self.checkouts_dir, "-project-", "-id-", "HEAD")
+        copy_tree(former_base_checkout_dir, uut.checkout_dir)
+
+        uut.migrate()
+
+        assert not exists(former_base_checkout_dir)
+        assert exists(join(self.checkouts_dir, "-project-", "repository.git", "objects"))
+        assert exists(join(uut.checkout_dir, ".git", "objects", "info", "alternates"))
+        assert Shell.exec("git count-objects", cwd=uut.checkout_dir).startswith("0 objects")
+        assert uut.exists()
+        assert exists(uut.checkout_dir + ".manifest")
+        Shell.exec("git fsck --no-dangling", cwd=uut.checkout_dir)
+
+    def test_exists_by_manifest(self):
+        uut = GitProjectCheckout(self.git_url, self.checkouts_dir, "-project-", "-id-", "HEAD")
+        uut.create()
+
+        with patch.object(Shell, "exec", side_effect=AssertionError("must not run VCS commands")), \
+                patch.object(Shell, "try_exec", side_effect=AssertionError("must not run VCS commands")):
+            assert uut.exists()
+
+        assert exists(uut.checkout_dir + ".manifest")
+
+    def test_not_exists_if_create_was_interrupted(self):
+        uut = GitProjectCheckout(self.git_url, self.checkouts_dir, "-project-", "-id-", "HEAD")
+        with patch.object(GitProjectCheckout, "_update", side_effect=KeyboardInterrupt):
+            try:
+                uut.create()
+            except KeyboardInterrupt:
+                pass
+
+        assert not uut.exists()
+        uut.create()
+        assert uut.exists()
+        assert exists(join(uut.checkout_dir, "foo"))
+
+    def test_recreates_checkout_of_other_revision(self):
+        revision = Shell.exec("git rev-parse HEAD", cwd=self.git_url).strip()
+        self.__commit("bar")
+        GitProjectCheckout(self.git_url, self.checkouts_dir, "-project-", "-id-", revision).create()
+        uut = GitProjectCheckout(self.git_url, self.checkouts_dir, "-project-", "-id-", "HEAD")
+
+        assert not uut.exists()
+        uut.create()
+        assert exists(join(uut.checkout_dir, "bar"))
+
+    def test_verify(self):
+        uut = GitProjectCheckout(self.git_url, self.checkouts_dir, "-project-", "-id-", "HEAD")
+        uut.create()
+
+        assert uut.verify()
+
+    def test_verify_detects_other_tree(self):
+        uut = GitProjectCheckout(self.git_url, self.checkouts_dir, "-project-", "-id-", "HEAD")
+        uut.create()
+        Shell.exec("git rm --quiet foo", cwd=uut.checkout_dir)
+        Shell.exec("git commit --quiet -m \"Remove foo.\"", cwd=uut.checkout_dir)
+
+        assert uut.exists()
+        assert not uut.verify()
+
     def test_not_exists(self):
         uut = GitProjectCheckout(self.git_url, self.checkouts_dir, "-project-", "-id-", "HEAD")
         assert not uut.exists()
@@ -182,6 +473,34 @@ class TestGitProjectCheckout:
         assert not exists(join(self.checkouts_dir, "-project-", "checkout"))
         assert not exists(uut.checkout_dir)
 
+    def test_delete_keeps_checkouts_of_other_versions(self):
+        uut = GitProjectCheckout(self.git_url, self.checkouts_dir, "-project-", "-id-", "HEAD")
+        other_version = GitProjectCheckout(self.git_url, self.checkouts_dir, "-project-", "-id2-", "HEAD")
+        uut.create()
+        other_version.create()
+
+        uut.delete()
+
+        assert exists(join(self.checkouts_dir, "-project-", "repository.git"))
+        assert other_version.exists()
+        Shell.exec("git fsck --no-dangling", cwd=other_version.checkout_dir)
+
+    def test_create_repairs_corrupt_base_checkout(self):
+        uut = GitProjectCheckout(self.git_url, self.checkouts_dir, "-project-", "-id-", "HEAD")
+        other_version = GitProjectCheckout(self.git_url, self.checkouts_dir, "-project-", "-id2-", "HEAD")
+        uut.create()
+        os.remove(join(self.checkouts_dir, "-project-", "repository.git", "HEAD"))
+
+        other_version.create()
+
+        assert exists(join(other_version.checkout_dir, "foo"))
+        Shell.exec("git fsck --no-dangling", cwd=uut.checkout_dir)
+
+    def __commit(self, file_name: str):
+        Shell.exec("touch {}".format(file_name), cwd=self.git_url)
+        Shell.exec("git add -A", cwd=self.git_url)
+        Shell.exec("git commit -a -m \"Add {}.\"".format(file_name), cwd=self.git_url)
+
     def test_to_string(self):
         uut = GitProjectCheckout(self.git_url, self.checkouts_dir, "-project-", "-id-", "-revision-")
 
@@ -234,3 +553,77 @@ class TestSVNProjectCheckout:
 
     def test_to_string(self):
         assert_equals("svn:{}@1".format(self.svn_url), str(self.uut))
+
+
+class TestSVNProjectCheckoutExport:
+    # noinspection PyAttributeOutsideInit
+    def setup(self):
+        self.temp_dir = mkdtemp(prefix='mubench-checkout-svn-export_')
+        self.checkouts_dir = join(self.temp_dir, "checkouts")
+        self.exports = []
+
+        def exec_mock(command, cwd, **_):
+            if not command.startswith("svn export"):
+                raise AssertionError("unexpected command " + command)
+            self.exports.append(command)
+            create_file(join(cwd, "foo"))
+        shell_patch = patch.object(Shell, "exec", side_effect=exec_mock)
+        shell_patch.start()
+        self.shell_patch = shell_patch
+        try_shell_patch = patch.object(Shell, "try_exec", side_effect=AssertionError("must not run commands"))
+        try_shell_patch.start()
+        self.try_shell_patch = try_shell_patch
+
+        self.uut = SVNProjectCheckout("-url-", self.checkouts_dir, "-project-", "-version-", "1", export=True)
+
+    def teardown(self):
+        self.shell_patch.stop()
+        self.try_shell_patch.stop()
+        remove_tree(self.temp_dir)
+
+    def test_exports(self):
+        self.uut.create()
+
+        assert_equals(["svn export --quiet --force \"-url-@1\" ."], self.exports)
+        assert exists(join(self.uut.checkout_dir, "foo"))
+
+    def test_exists_by_manifest(self):
+        self.uut.create()
+
+        assert self.uut.exists()
+
+    def test_not_exists_without_manifest(self):
+        os.makedirs(self.uut.checkout_dir)
+
+        assert not self.uut.exists()
+
+    def test_not_exists_with_manifest_of_other_revision(self):
+        self.uut.create()
+        other_revision = SVNProjectCheckout("-url-", self.checkouts_dir, "-project-", "-version-", "2", export=True)
+
+        assert not other_revision.exists()
+
+    def test_exports_revision_once(self):
+        other_version = SVNProjectCheckout("-url-", self.checkouts_dir, "-project-", "-version2-", "1", export=True)
+
+        self.uut.create()
+        other_version.create()
+
+        assert_equals(1, len(self.exports))
+        assert exists(join(other_version.checkout_dir, "foo"))
+
+    def test_delete(self):
+        self.uut.create()
+
+        self.uut.delete()
+
+        assert not exists(self.uut.checkout_dir)
+        assert not self.uut.exists()
+
+    def test_delete_exports_revision_again(self):
+        self.uut.create()
+
+        self.uut.delete()
+        self.uut.create()
+
+        assert_equals(2, len(self.exports))
@@ -86,6 +86,16 @@ class TestProjectVersion:
         assert_equals([], self.uut.compile_commands)
         assert_equals("", self.uut.classes_dir)
 
+    def test_derives_sparse_checkout_paths(self):
+        self.uut._YAML = {"build": {"src": "module/src/main/java/", "commands": ["mvn compile", "ant"],
+                                    "sparse_checkout": ["lib/", "/other-module/"]}}
+        assert_equals(["/module/src/main/java/", "pom.xml", "build.xml", "/lib/", "/other-module/"],
+                      self.uut.sparse_checkout_paths)
+
+    def test_no_sparse_checkout_paths_for_sources_at_root(self):
+        self.uut._YAML = {"build": {"src": "./", "commands": ["mvn compile"]}}
+        assert_equals(None, self.uut.sparse_checkout_paths)
+
     def test_id(self):
         assert_equals("{}.{}".format(self.project_id, self.version_id), self.uut.id)
 
@@ -122,6 +132,15 @@ class TestProjectCheckout:
         assert_equals("-version-", checkout.version)
         assert_equals("-revision-", checkout.revision)
 
+    def test_sparse_git_project(self):
+        project = create_project("-project-", meta={"repository": {"type": "git", "url": "ssh://foobar.git"}})
+        version = create_version("-version-", meta={"revision": "-revision-", "build": {"src": "src/"}},
+                                 project=project)
+
+        checkout = version.get_checkout("-base_path-", sparse=True)
+
+        assert_equals(["/src/"], checkout.sparse_paths)
+
     def test_svn_project(self):
         project = create_project("-project-", meta={"repository": {"type": "svn", "url": "http://url/svn"}})
         version = create_version("-version-", meta={"revision": "667"}, project=project)
@@ -134,6 +153,14 @@ class TestProjectCheckout:
         assert_equals("-version-", checkout.version)
         assert_equals("667", checkout.revision)
 
+    def test_svn_project_export(self):
+        project = create_project("-project-", meta={"repository": {"type": "svn", "url": "http://url/svn"}})
+        version = create_version("-version-", meta={"revision": "667"}, project=project)
+
+        checkout = version.get_checkout("-base_path-", svn_export=True)
+
+        assert checkout.export
+
     def test_zip_project(self):
         project = create_project("-project-", meta={"repository": {"type": "zip"}})
         version = create_version("-version-", meta={"revision": "http://to.zip", "md5": "-checksum-"}, project=project)
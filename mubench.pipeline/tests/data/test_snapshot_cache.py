@@ -0,0 +1,65 @@
+from os import listdir
+from os.path import join, exists
+from tempfile import mkdtemp
+
+from nose.tools import assert_equals
+
+from data.snapshot_cache import SnapshotCache
+from utils.io import remove_tree, create_file, safe_write, safe_read
+
+
+class TestSnapshotCache:
+    # noinspection PyAttributeOutsideInit
+    def setup(self):
+        self.temp_dir = mkdtemp(prefix="mubench-snapshot-cache_")
+        self.checkout_dir = join(self.temp_dir, "checkout")
+        safe_write("-content-", join(self.checkout_dir, "src", "A.java"), append=False)
+        create_file(join(self.checkout_dir, ".git", "HEAD"))
+
+        self.uut = SnapshotCache(join(self.temp_dir, "cache"))
+
+    def teardown(self):
+        remove_tree(self.temp_dir)
+
+    def test_restores_stored_snapshot(self):
+        restored_dir = join(self.temp_dir, "restored")
+        self.uut.store("-identity-", self.checkout_dir, [])
+
+        assert self.uut.restore("-identity-", restored_dir)
+
+        assert_equals("-content-\n", safe_read(join(restored_dir, "src", "A.java")))
+
+    def test_restores_nothing_without_snapshot(self):
+        assert not self.uut.restore("-identity-", join(self.temp_dir, "restored"))
+        assert not exists(join(self.temp_dir, "restored"))
+
+    def test_excludes_files(self):
+        restored_dir = join(self.temp_dir, "restored")
+        self.uut.store("-identity-", self.checkout_dir, [".git"])
+
+        self.uut.restore("-identity-", restored_dir)
+
+        assert_equals(["src"], listdir(restored_dir))
+
+    def test_restore_replaces_existing_files(self):
+        self.uut.store("-identity-", self.checkout_dir, [".git"])
+        create_file(join(self.temp_dir, "restored", "-stale-"))
+
+        self.uut.restore("-identity-", join(self.temp_dir, "restored"))
+
+        assert_equals(["src"], listdir(join(self.temp_dir, "restored")))
+
+    def test_keys_snapshots_by_identity(self):
+        self.uut.store("-identity-", self.checkout_dir, [])
+
+        assert self.uut.contains("-identity-")
+        assert not self.uut.contains("-other-identity-")
+
+    def test_keeps_existing_snapshot(self):
+        self.uut.store("-identity-", self.checkout_dir, [])
+        safe_write("-changed-", join(self.checkout_dir, "src", "A.java"), append=False)
+
+        self.uut.store("-identity-", self.checkout_dir, [])
+
+        self.uut.restore("-identity-", join(self.temp_dir, "restored"))
+        assert_equals("-content-\n", safe_read(join(self.temp_dir, "restored", "src", "A.java")))
@@ -1,11 +1,19 @@
+import asyncio
+import threading
+import time
 import unittest
+from os.path import join
+from tempfile import mkdtemp
 from unittest.mock import MagicMock
 
 from nose.tools import assert_equals, assert_raises
 
 from data.project_checkout import ProjectCheckout
-from tasks.implementations.checkout import CheckoutTask
+from tasks.implementations.checkout import CheckoutTask, ParallelCheckoutTask, get_host
+from tasks.task_runner import TaskRunner
+from tests.tasks.test_task_runner import VoidTask
 from tests.test_utils.data_util import create_project, create_version
+from utils.io import remove_tree
 from utils.shell import CommandFailedError
 
 
@@ -40,6 +48,16 @@ class TestCheckout(unittest.TestCase):
         self.checkout.create.assert_not_called()
         assert_equals(self.checkout, response)
 
+    def test_migrates_existing_checkout(self):
+        self.checkout.exists = MagicMock(return_value=True)
+        self.checkout.migrate = MagicMock()
+        self.uut.migrate_checkouts = True
+
+        self.uut.run(self.version)
+
+        self.checkout.migrate.assert_called_with()
+        self.checkout.create.assert_not_called()
+
     def test_error_get_checkout(self):
         self.version.get_checkout = MagicMock(side_effect=ValueError)
 
@@ -59,3 +77,118 @@ class TestCheckout(unittest.TestCase):
 
         self.checkout.delete.assert_called_with()
         self.checkout.create.assert_called_with()
+
+    def test_verifies_checkout(self):
+        self.checkout.exists = MagicMock(return_value=True)
+        self.checkout.verify = MagicMock(return_value=False)
+        self.uut.verify_checkouts = True
+
+        self.uut.run(self.version)
+
+        self.checkout.exists.assert_not_called()
+        self.checkout.create.assert_called_with()
+
+    def test_initial_checkout_async(self):
+        temp_dir = mkdtemp(prefix="mubench-checkout-task_")
+        self.addCleanup(remove_tree, temp_dir)
+        self.checkout.checkout_dir = join(temp_dir, "checkout")
+        self.checkout.exists = MagicMock(return_value=False)
+        self.checkout._create = MagicMock()
+
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            response = loop.run_until_complete(self.uut.run_async(self.version))
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+        self.checkout._create.assert_called_with()
+        assert_equals(self.checkout, response)
+
+    def test_checks_existing_checkout_off_event_loop_async(self):
+        threads = []
+        self.checkout.exists = MagicMock(side_effect=lambda: threads.append(threading.current_thread()) or True)
+
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self.uut.run_async(self.version))
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+        assert_equals(1, len(threads))
+        assert threads[0] is not threading.current_thread()
+
+    def test_uses_snapshot_cache(self):
+        self.checkout.exists = MagicMock(return_value=True)
+        uut = CheckoutTask("-checkouts-", force_checkout=False, use_temp_dir=False, snapshot_cache_path="-cache-")
+
+        uut.run(self.version)
+
+        assert_equals("-cache-", self.checkout.snapshot_cache.path)
+
+    def test_limits_checkouts_per_host(self):
+        self.checkout.url = "https://github.com/-project-.git"
+        self.checkout.exists = MagicMock(return_value=False)
+        running = []
+        max_running = []
+        running_lock = threading.Lock()
+
+        def create():
+            with running_lock:
+                running.append(None)
+                max_running.append(len(running))
+            time.sleep(0.05)
+            with running_lock:
+                running.pop()
+        self.checkout.create = MagicMock(side_effect=create)
+        uut = ParallelCheckoutTask("-checkouts-", force_checkout=False, use_temp_dir=False, jobs_per_host=2, jobs=4)
+
+        uut.run_batch([(self.version,)] * 4)
+
+        assert_equals(4, self.checkout.create.call_count)
+        assert_equals(2, max(max_running))
+
+    def test_checks_out_concurrently_without_batching(self):
+        self.checkout.exists = MagicMock(return_value=False)
+        running = []
+        max_running = []
+        running_lock = threading.Lock()
+
+        def create():
+            with running_lock:
+                running.append(None)
+                max_running.append(len(running))
+            time.sleep(0.05)
+            with running_lock:
+                running.pop()
+        self.checkout.create = MagicMock(side_effect=create)
+        uut = ParallelCheckoutTask("-checkouts-", force_checkout=False, use_temp_dir=False, jobs=4)
+
+        TaskRunner([VoidTask([self.version] * 4), uut], batch_size=1).run()
+
+        assert_equals(4, self.checkout.create.call_count)
+        assert_equals(4, max(max_running))
+
+    def test_run_batch_reports_failures_per_version(self):
+        error = CommandFailedError("-cmd-", "-out-")
+        self.checkout.exists = MagicMock(return_value=False)
+        self.checkout.create = MagicMock(side_effect=[None, error])
+        uut = ParallelCheckoutTask("-checkouts-", force_checkout=False, use_temp_dir=False, jobs=1)
+
+        results = uut.run_batch([(self.version,), (self.version,)])
+
+        assert_equals([self.checkout, error], results)
+
+
+class TestGetHost:
+    def test_url(self):
+        assert_equals("github.com", get_host("https://github.com/user/repo.git"))
+
+    def test_scp_like_url(self):
+        assert_equals("github.com", get_host("git@github.com:user/repo.git"))
+
+    def test_local_path(self):
+        assert_equals("", get_host("/path/to/repo"))
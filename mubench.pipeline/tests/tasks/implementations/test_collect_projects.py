@@ -1,11 +1,14 @@
+from os.path import join
 from tempfile import mkdtemp
 
 from nose.tools import assert_equals
 
+from data.dataset_index import DatasetIndex
 from tasks.implementations.collect_projects import CollectProjectsTask
-from tests.test_utils.data_util import create_project
+from tests.test_utils.data_util import create_project, create_version
 from utils.data_entity_lists import DataEntityLists
 from utils.io import remove_tree, create_file
+from utils.scheduling import Schedule
 
 
 class TestCollectProject:
@@ -26,6 +29,18 @@ class TestCollectProject:
 
         assert_equals([p1, p2], actual)
 
+    def test_finds_indexed_projects(self):
+        p1 = create_project("p1", base_path=self.temp_dir)
+        create_file(p1._project_file)
+        index = DatasetIndex(self.temp_dir, join(self.temp_dir, "index.sqlite"))
+        index.update()
+        uut = CollectProjectsTask(self.temp_dir, DataEntityLists([], []), dataset_index=index)
+
+        actual = uut.run()
+
+        assert_equals([p1], actual)
+        assert_equals(index, actual[0]._dataset_index)
+
     def test_filters_non_whitelisted(self):
         project = create_project("-id-", base_path=self.temp_dir)
         create_file(project._project_file)
@@ -43,3 +58,16 @@ class TestCollectProject:
         actual = uut.run()
 
         assert_equals([], actual)
+
+    def test_orders_by_schedule(self):
+        p1 = create_project("p1", base_path=self.temp_dir)
+        create_file(p1._project_file)
+        p2 = create_project("p2", base_path=self.temp_dir)
+        create_file(p2._project_file)
+        schedule = Schedule([create_version("v", project=p1), create_version("v", project=p2)],
+                            lambda version: 2 if version.project_id == "p2" else 1)
+        uut = CollectProjectsTask(self.temp_dir, DataEntityLists([], []), schedule)
+
+        actual = uut.run()
+
+        assert_equals([p2, p1], actual)
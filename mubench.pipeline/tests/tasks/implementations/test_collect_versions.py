@@ -3,6 +3,7 @@ from nose.tools import assert_equals
 from tasks.implementations.collect_versions import CollectVersionsTask
 from tests.test_utils.data_util import create_project, create_version
 from utils.data_entity_lists import DataEntityLists
+from utils.scheduling import Schedule
 
 
 class TestCollectVersions:
@@ -51,3 +52,13 @@ class TestCollectVersions:
         actual = uut.run(project)
 
         assert_equals([], actual)
+
+    def test_orders_by_schedule(self):
+        project = create_project("-project-")
+        v1 = create_version("-v1-", project=project)
+        v2 = create_version("-v2-", project=project)
+        uut = CollectVersionsTask(DataEntityLists([], []), Schedule([v1, v2], lambda version: int(version is v2)))
+
+        actual = uut.run(project)
+
+        assert_equals([v2, v1], actual)
@@ -150,6 +150,13 @@ class TestCompile:
 
         assert exists(join(self.build_path, "additional.file"))
 
+    def test_records_compile_runtime(self):
+        self.mock_with_fake_compile()
+
+        project_compile = self.uut.run(self.version, self.checkout)
+
+        assert project_compile.runtime is not None
+
     def test_skips_compile_if_classes_exist(self):
         self.mock_with_fake_compile()
         makedirs(self.original_classes_path)
@@ -0,0 +1,53 @@
+from unittest.mock import patch, call
+
+from nose.tools import assert_equals
+
+from data.project_checkout import GitProjectCheckout, LocalProjectCheckout
+from tasks.implementations.export_bundles import ExportBundlesTask
+from tests.test_utils.data_util import create_version, create_project
+from utils.shell import CommandFailedError
+
+
+@patch.object(GitProjectCheckout, "export_bundle")
+class TestExportBundlesTask:
+    # noinspection PyAttributeOutsideInit
+    def setup(self):
+        self.uut = ExportBundlesTask("-bundles-")
+
+    def test_exports_revisions_of_project_once(self, export_bundle_mock):
+        project = create_project("-project-")
+        checkout1 = GitProjectCheckout("-url-", "-checkouts-", "-project-", "-v1-", "-revision1-")
+        checkout2 = GitProjectCheckout("-url-", "-checkouts-", "-project-", "-v2-", "-revision2-")
+
+        self.uut.run(create_version("-v1-", project=project), checkout1)
+        self.uut.run(create_version("-v2-", project=project), checkout2)
+        self.uut.end()
+
+        export_bundle_mock.assert_called_once_with(["-revision1-", "-revision2-"], "-bundles-")
+
+    def test_exports_each_project(self, export_bundle_mock):
+        self.uut.run(create_version("-v-", project=create_project("-p1-")),
+                     GitProjectCheckout("-url1-", "-checkouts-", "-p1-", "-v-", "-revision1-"))
+        self.uut.run(create_version("-v-", project=create_project("-p2-")),
+                     GitProjectCheckout("-url2-", "-checkouts-", "-p2-", "-v-", "-revision2-"))
+        self.uut.end()
+
+        expected_calls = [call(["-revision1-"], "-bundles-"), call(["-revision2-"], "-bundles-")]
+        export_bundle_mock.assert_has_calls(expected_calls)
+
+    def test_skips_other_checkouts(self, export_bundle_mock):
+        self.uut.run(create_version("-v-"), LocalProjectCheckout("-url-", "-checkouts-", "-project-"))
+        self.uut.end()
+
+        export_bundle_mock.assert_not_called()
+
+    def test_continues_after_failed_export(self, export_bundle_mock):
+        export_bundle_mock.side_effect = [CommandFailedError("git bundle", ""), None]
+        self.uut.run(create_version("-v-", project=create_project("-p1-")),
+                     GitProjectCheckout("-url1-", "-checkouts-", "-p1-", "-v-", "-revision1-"))
+        self.uut.run(create_version("-v-", project=create_project("-p2-")),
+                     GitProjectCheckout("-url2-", "-checkouts-", "-p2-", "-v-", "-revision2-"))
+
+        self.uut.end()
+
+        assert_equals(2, export_bundle_mock.call_count)
@@ -0,0 +1,68 @@
+import os
+from os.path import join, exists
+from tempfile import mkdtemp
+
+from nose.tools import assert_equals
+
+from tasks.implementations.merge_findings import MergeFindingsTask
+from utils.io import remove_tree, safe_read, safe_write
+from utils.sharding import read_runtimes
+
+
+class TestMergeFindings:
+    # noinspection PyAttributeOutsideInit
+    def setup(self):
+        self.temp_dir = mkdtemp(prefix="mubench-test-merge-findings_")
+        self.shard1 = join(self.temp_dir, "shard1")
+        self.shard2 = join(self.temp_dir, "shard2")
+        self.findings_path = join(self.temp_dir, "findings")
+
+        self.uut = MergeFindingsTask([self.shard1, self.shard2], self.findings_path)
+
+    def teardown(self):
+        remove_tree(self.temp_dir)
+
+    def test_merges_runs_of_all_shards(self):
+        self.create_run(self.shard1, "mine_and_detect/-d-/-p-/-v1-", "-run1-")
+        self.create_run(self.shard2, "mine_and_detect/-d-/-p-/-v2-", "-run2-")
+
+        self.uut.run()
+
+        assert_equals("-run1-", self.read_run("mine_and_detect/-d-/-p-/-v1-"))
+        assert_equals("-run2-", self.read_run("mine_and_detect/-d-/-p-/-v2-"))
+
+    def test_takes_latest_of_conflicting_runs(self):
+        self.create_run(self.shard1, "detect_only/-d-/-p-/-v-/-m-", "-new-", mtime=2000)
+        self.create_run(self.shard2, "detect_only/-d-/-p-/-v-/-m-", "-old-", mtime=1000)
+
+        self.uut.run()
+
+        assert_equals("-new-", self.read_run("detect_only/-d-/-p-/-v-/-m-"))
+
+    def test_replaces_existing_run(self):
+        self.create_run(self.findings_path, "mine_and_detect/-d-/-p-/-v-", "-old-")
+        safe_write("-stale-", join(self.findings_path, "mine_and_detect/-d-/-p-/-v-/findings.yml"), append=False)
+        self.create_run(self.shard1, "mine_and_detect/-d-/-p-/-v-", "-new-")
+
+        self.uut.run()
+
+        assert_equals("-new-", self.read_run("mine_and_detect/-d-/-p-/-v-"))
+        assert not exists(join(self.findings_path, "mine_and_detect/-d-/-p-/-v-/findings.yml"))
+
+    def test_writes_runtimes_of_merged_runs(self):
+        self.create_run(self.shard1, "mine_and_detect/-d-/-p-/-v1-", "runtime: 1.5")
+        self.create_run(self.shard2, "mine_and_detect/-d-/-p-/-v2-", "runtime: 2")
+
+        self.uut.run()
+
+        assert_equals({"-p-.-v1-": 1.5, "-p-.-v2-": 2}, read_runtimes(join(self.findings_path, "runtimes.yml")))
+
+    @staticmethod
+    def create_run(findings_path: str, run_id: str, content: str, mtime: int = None):
+        run_file_path = join(findings_path, run_id, "run.yml")
+        safe_write(content, run_file_path, append=False)
+        if mtime:
+            os.utime(run_file_path, (mtime, mtime))
+
+    def read_run(self, run_id: str):
+        return safe_read(join(self.findings_path, run_id, "run.yml")).strip()
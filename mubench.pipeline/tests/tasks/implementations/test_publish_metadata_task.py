@@ -51,6 +51,30 @@ class TestPublishMetadataTask:
         assert_equals(post_mock.call_args[1]["username"], "-username-")
         assert_equals(post_mock.call_args[1]["password"], "-password-")
 
+    def test_publishes_metadata_of_batch(self, post_mock, snippets_mock):
+        misuse1 = create_misuse("-m1-", project=self.project)
+        misuse2 = create_misuse("-m2-", project=self.project)
+        create_version("-v-", project=self.project, misuses=[misuse1, misuse2])
+
+        task = PublishMetadataTask("-compiles-path-", "http://test.url")
+        results = task.run_batch([(self.project, misuse1), (self.project, misuse2)])
+        task.end()
+
+        assert_equals([None, None], results)
+        assert_equals([misuse1.id, misuse2.id], [metadata["misuse"] for metadata in post_mock.call_args[0][1]])
+
+    def test_reports_failure_of_misuse_in_batch(self, post_mock, snippets_mock):
+        misuse1 = create_misuse("-m1-", project=self.project)
+        misuse2 = create_misuse("-m2-", project=self.project)
+        create_version("-v-", project=self.project, misuses=[misuse2])
+
+        task = PublishMetadataTask("-compiles-path-", "http://test.url")
+        results = task.run_batch([(self.project, misuse1), (self.project, misuse2)])
+        task.end()
+
+        assert isinstance(results[0], UserWarning)
+        assert_equals([misuse2.id], [metadata["misuse"] for metadata in post_mock.call_args[0][1]])
+
     def test_publishes_metadata(self, post_mock, snippets_mock):
         misuse = create_misuse("-m-", meta={
             "description": "-description-",
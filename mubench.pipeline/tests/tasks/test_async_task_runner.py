@@ -0,0 +1,138 @@
+import asyncio
+import threading
+import time
+
+from nose.tools import assert_equals, assert_raises
+
+from tasks.async_task_runner import AsyncTaskRunner
+from tasks.task_runner import TaskParameterUnavailableWarning
+from tests.tasks.test_task_runner import VoidTask, StringConsumingTask, StringAndIntConsumingTask, MockTask, \
+    FailingStringConsumingTask
+
+
+class TestAsyncTaskRunner:
+    def test_runs_chain(self):
+        first_task = VoidTask([":some string:", ":other string:"])
+        second_task = StringConsumingTask([42])
+        third_task = StringAndIntConsumingTask()
+        uut = AsyncTaskRunner([first_task, second_task, third_task], 2)
+
+        uut.run()
+
+        third_task.assert_has_calls([(":some string:", 42), (":other string:", 42)])
+
+    def test_overlaps_async_tasks(self):
+        first_task = VoidTask(["-a-", "-b-", "-c-"])
+        second_task = SleepingAsyncTask()
+        uut = AsyncTaskRunner([first_task, second_task], 3)
+
+        start = time.time()
+        uut.run()
+
+        assert time.time() - start < 0.3
+        assert_equals(3, second_task.max_concurrency)
+
+    def test_limits_concurrency(self):
+        first_task = VoidTask(["-a-", "-b-", "-c-"])
+        second_task = SleepingAsyncTask()
+        uut = AsyncTaskRunner([first_task, second_task], 2)
+
+        uut.run()
+
+        assert_equals(2, second_task.max_concurrency)
+
+    def test_passes_async_results_on(self):
+        first_task = VoidTask(["-a-"])
+        second_task = SleepingAsyncTask([42])
+        third_task = StringAndIntConsumingTask()
+        uut = AsyncTaskRunner([first_task, second_task, third_task], 1)
+
+        uut.run()
+
+        third_task.assert_has_calls([("-a-", 42)])
+
+    def test_continues_with_next_input_if_task_fails(self):
+        first_task = VoidTask(["-some string-", "-some other string-"])
+        second_task = FailingStringConsumingTask("-error-")
+        uut = AsyncTaskRunner([first_task, second_task], 1)
+
+        uut.run()
+
+        second_task.assert_has_calls([("-some string-",), ("-some other string-",)])
+
+    def test_reports_if_a_task_requires_an_unavailable_parameter(self):
+        first_task = VoidTask([42])
+        second_task = StringConsumingTask()
+        uut = AsyncTaskRunner([first_task, second_task], 1)
+
+        assert_raises(TaskParameterUnavailableWarning, uut.run)
+
+    def test_prefers_end_async(self):
+        first_task = VoidTask(["-a-"])
+        second_task = EndRecordingTask()
+        uut = AsyncTaskRunner([first_task, second_task], 1)
+
+        uut.run()
+
+        assert_equals([("-a-",), "end_async"], second_task.calls)
+
+    def test_limits_blocking_work_in_default_executor(self):
+        first_task = VoidTask(["-a-"])
+        second_task = BlockingEndTask()
+        uut = AsyncTaskRunner([first_task, second_task], 2)
+
+        uut.run()
+
+        assert_equals(2, second_task.max_concurrency)
+
+
+class SleepingAsyncTask(MockTask):
+    def __init__(self, results=None):
+        super().__init__(results)
+        self.concurrency = 0
+        self.max_concurrency = 0
+
+    def run(self, s: str):
+        raise NotImplementedError
+
+    async def run_async(self, s: str):
+        self.concurrency += 1
+        self.max_concurrency = max(self.max_concurrency, self.concurrency)
+        await asyncio.sleep(0.1)
+        self.concurrency -= 1
+        self.calls.append((s,))
+        return self.results
+
+
+class BlockingEndTask(MockTask):
+    def __init__(self):
+        super().__init__()
+        self.concurrency = 0
+        self.max_concurrency = 0
+        self.lock = threading.Lock()
+
+    def run(self, s: str):
+        self.calls.append((s,))
+
+    async def end_async(self):
+        loop = asyncio.get_event_loop()
+        await asyncio.gather(*[loop.run_in_executor(None, self.__block) for _ in range(4)])
+
+    def __block(self):
+        with self.lock:
+            self.concurrency += 1
+            self.max_concurrency = max(self.max_concurrency, self.concurrency)
+        time.sleep(0.1)
+        with self.lock:
+            self.concurrency -= 1
+
+
+class EndRecordingTask(MockTask):
+    def run(self, s: str):
+        self.calls.append((s,))
+
+    def end(self):
+        self.calls.append("end")
+
+    async def end_async(self):
+        self.calls.append("end_async")
@@ -0,0 +1,79 @@
+from os.path import join
+from tempfile import mkdtemp
+
+from nose.tools import assert_in
+
+from tasks.journal import Journal
+from tests.test_utils.data_util import create_project, create_version
+from utils.io import remove_tree, safe_write
+
+
+class TestJournal:
+    # noinspection PyAttributeOutsideInit
+    def setup(self):
+        self.temp_dir = mkdtemp(prefix="mubench-test-journal_")
+        self.path = join(self.temp_dir, "journals", "-task-.journal")
+        self.project = create_project("-p-")
+        self.version = create_version("-v-", project=self.project)
+
+    def teardown(self):
+        remove_tree(self.temp_dir)
+
+    def test_records_completed_item(self):
+        uut = Journal(self.path, resume=False)
+
+        uut.record(ConfiguredTask("-config-"), [self.project, self.version])
+
+        assert uut.is_completed(ConfiguredTask("-config-"), [self.project, self.version])
+        assert not uut.is_completed(ConfiguredTask("-config-"), [self.project])
+
+    def test_resumes_from_file(self):
+        Journal(self.path, resume=False).record(ConfiguredTask("-config-"), [self.project, self.version])
+
+        uut = Journal(self.path, resume=True)
+
+        assert uut.is_completed(ConfiguredTask("-config-"), [self.project, self.version])
+
+    def test_starts_over_without_resume(self):
+        Journal(self.path, resume=False).record(ConfiguredTask("-config-"), [self.project, self.version])
+
+        uut = Journal(self.path, resume=False)
+
+        assert not uut.is_completed(ConfiguredTask("-config-"), [self.project, self.version])
+
+    def test_resumes_run_that_started_over(self):
+        Journal(self.path, resume=False).record(ConfiguredTask("-config-"), [self.project])
+        Journal(self.path, resume=False).record(ConfiguredTask("-config-"), [self.project, self.version])
+
+        uut = Journal(self.path, resume=True)
+
+        assert not uut.is_completed(ConfiguredTask("-config-"), [self.project])
+        assert uut.is_completed(ConfiguredTask("-config-"), [self.project, self.version])
+
+    def test_keeps_records_of_previous_runs(self):
+        Journal(self.path, resume=False).record(ConfiguredTask("-config-"), [self.project])
+
+        Journal(self.path, resume=False)
+
+        with open(self.path) as file:
+            assert_in('"entity": "-p-"', file.read())
+
+    def test_distinguishes_configurations(self):
+        uut = Journal(self.path, resume=False)
+
+        uut.record(ConfiguredTask("-config-"), [self.project, self.version])
+
+        assert not uut.is_completed(ConfiguredTask("-other-config-"), [self.project, self.version])
+
+    def test_ignores_incomplete_record(self):
+        Journal(self.path, resume=False).record(ConfiguredTask("-config-"), [self.project])
+        safe_write('{"task": "ConfiguredTask", "ent', self.path, append=True)
+
+        uut = Journal(self.path, resume=True)
+
+        assert uut.is_completed(ConfiguredTask("-config-"), [self.project])
+
+
+class ConfiguredTask:
+    def __init__(self, config: str):
+        self.config = config
@@ -0,0 +1,145 @@
+import logging
+import time
+from os.path import join, exists
+from tempfile import mkdtemp
+
+from nose.tools import assert_equals, assert_raises
+
+from tasks.parallel_task_runner import ParallelTaskRunner
+from tasks.task_runner import TaskParameterUnavailableWarning
+from tests.tasks.test_task_runner import VoidTask, StringConsumingTask, MockTask
+from utils import tracing
+from utils.io import remove_tree
+
+
+class TestParallelTaskRunner:
+    # noinspection PyAttributeOutsideInit
+    def setup(self):
+        self.temp_dir = mkdtemp(prefix="mubench-test-parallel-task-runner_")
+        # the test's log records must pass, whatever the level of the root logger
+        self.logger = logging.getLogger("test.parallel")
+        self.logger_level = self.logger.level
+        self.logger.setLevel(logging.INFO)
+
+    def teardown(self):
+        self.logger.setLevel(self.logger_level)
+        remove_tree(self.temp_dir)
+
+    def test_runs_subtrees_in_worker_processes(self):
+        first_task = VoidTask(["-a-", "-b-"])
+        second_task = FileWritingTask(self.temp_dir)
+        uut = ParallelTaskRunner([first_task, second_task], 2, split_type=str)
+
+        uut.run()
+
+        assert exists(join(self.temp_dir, "-a-"))
+        assert exists(join(self.temp_dir, "-b-"))
+        assert_equals([], second_task.calls)
+
+    def test_runs_end_once_in_parent(self):
+        first_task = EndRecordingTask(["-a-", "-b-"])
+        second_task = FileWritingTask(self.temp_dir)
+        uut = ParallelTaskRunner([first_task, second_task], 2, split_type=str)
+
+        uut.run()
+
+        assert_equals(1, first_task.ends)
+
+    def test_runs_subtree_with_end_in_parent(self):
+        first_task = VoidTask(["-a-", "-b-"])
+        second_task = EndRecordingStringConsumingTask()
+        uut = ParallelTaskRunner([first_task, second_task], 2, split_type=str)
+
+        uut.run()
+
+        second_task.assert_has_calls([("-a-",), ("-b-",)])
+        assert_equals(1, second_task.ends)
+
+    def test_emits_log_in_order_of_scheduling(self):
+        handler = RecordingHandler()
+        self.logger.addHandler(handler)
+        first_task = VoidTask(["-slow-", "-fast-"])
+        second_task = LoggingTask()
+        uut = ParallelTaskRunner([first_task, second_task], 2, split_type=str)
+
+        try:
+            uut.run()
+        finally:
+            self.logger.removeHandler(handler)
+
+        assert_equals(["-slow- started", "-slow- done", "-fast- started", "-fast- done"], handler.messages)
+
+    def test_collects_trace_events_from_workers(self):
+        first_task = VoidTask(["-a-", "-b-"])
+        second_task = FileWritingTask(self.temp_dir)
+        uut = ParallelTaskRunner([first_task, second_task], 2, split_type=str)
+
+        tracing.start()
+        try:
+            uut.run()
+        finally:
+            events = tracing.take_events()
+            tracing.stop(join(self.temp_dir, "trace.json"))
+
+        entities = sorted(event["args"]["entity"] for event in events if event["name"] == "FileWritingTask")
+        assert_equals(["-a-", "-b-"], entities)
+
+    def test_reports_unavailable_parameter_from_worker(self):
+        first_task = VoidTask(["-a-"])
+        second_task = StringConsumingTask()
+        third_task = IntConsumingTask()
+        uut = ParallelTaskRunner([first_task, second_task, third_task], 2, split_type=str)
+
+        assert_raises(TaskParameterUnavailableWarning, uut.run)
+
+
+class FileWritingTask(MockTask):
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+
+    def run(self, s: str):
+        self.calls.append((s,))
+        open(join(self.path, s), "w").close()
+
+
+class EndRecordingTask(MockTask):
+    def __init__(self, results=None):
+        super().__init__(results)
+        self.ends = 0
+
+    def run(self):
+        self.calls.append(())
+        return self.results
+
+    def end(self):
+        self.ends += 1
+
+
+class EndRecordingStringConsumingTask(EndRecordingTask):
+    def run(self, s: str):
+        self.calls.append((s,))
+        return self.results
+
+
+class LoggingTask(MockTask):
+    def run(self, s: str):
+        logger = logging.getLogger("test.parallel")
+        logger.info("%s started", s)
+        if s == "-slow-":
+            time.sleep(0.5)
+        logger.info("%s done", s)
+
+
+class IntConsumingTask(MockTask):
+    def run(self, i: int):
+        return self.results
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
@@ -0,0 +1,123 @@
+import time
+from threading import Lock
+
+from nose.tools import assert_equals, assert_raises
+
+from tasks.pipeline_task_runner import PipelineTaskRunner
+from tasks.task_runner import TaskParameterUnavailableWarning
+from tests.tasks.test_task_runner import VoidTask, StringConsumingTask, StringAndIntConsumingTask, MockTask, \
+    FailingStringConsumingTask
+
+
+class TestPipelineTaskRunner:
+    def test_runs_chain(self):
+        first_task = VoidTask([":some string:", ":other string:"])
+        second_task = StringConsumingTask([42])
+        third_task = StringAndIntConsumingTask()
+        uut = PipelineTaskRunner([first_task, second_task, third_task])
+
+        uut.run()
+
+        third_task.assert_has_calls([(":some string:", 42), (":other string:", 42)])
+
+    def test_preserves_order_with_single_worker(self):
+        first_task = VoidTask(["-a-", "-b-", "-c-"])
+        second_task = StringConsumingTask()
+        uut = PipelineTaskRunner([first_task, second_task])
+
+        uut.run()
+
+        assert_equals([("-a-",), ("-b-",), ("-c-",)], second_task.calls)
+
+    def test_overlaps_stages(self):
+        first_task = VoidTask(["-a-", "-b-"])
+        second_task = TimingTask("second")
+        third_task = TimingTask("third")
+        uut = PipelineTaskRunner([first_task, second_task, third_task])
+
+        uut.run()
+
+        # the second stage processes "-b-" while the third stage processes "-a-"
+        assert second_task.intervals["-b-"][0] < third_task.intervals["-a-"][1]
+
+    def test_runs_stage_with_multiple_workers(self):
+        first_task = VoidTask(["-a-", "-b-", "-c-", "-d-"])
+        second_task = ConcurrencyRecordingTask()
+        uut = PipelineTaskRunner([first_task, second_task], stage_workers={"ConcurrencyRecordingTask": 2})
+
+        uut.run()
+
+        assert_equals(2, second_task.max_concurrency)
+
+    def test_continues_with_next_input_if_task_fails(self):
+        first_task = VoidTask(["-some string-", "-some other string-"])
+        second_task = FailingStringConsumingTask("-error-")
+        uut = PipelineTaskRunner([first_task, second_task])
+
+        uut.run()
+
+        second_task.assert_has_calls([("-some string-",), ("-some other string-",)])
+
+    def test_reports_if_a_task_requires_an_unavailable_parameter(self):
+        first_task = VoidTask([42])
+        second_task = StringConsumingTask()
+        uut = PipelineTaskRunner([first_task, second_task])
+
+        assert_raises(TaskParameterUnavailableWarning, uut.run)
+
+    def test_runs_end_after_all_stages(self):
+        first_task = VoidTask(["-a-", "-b-"])
+        second_task = EndRecordingTask()
+        uut = PipelineTaskRunner([first_task, second_task])
+
+        uut.run()
+
+        assert_equals([("-a-",), ("-b-",), "end"], second_task.calls)
+
+    def test_records_queue_depth(self):
+        first_task = VoidTask(["-a-", "-b-", "-c-"])
+        second_task = TimingTask("second")
+        uut = PipelineTaskRunner([first_task, second_task], queue_size=3)
+
+        uut.run()
+
+        stage = uut.stages[1]
+        assert_equals(3, stage.number_of_items)
+        assert stage.max_queue_depth >= 2
+        assert stage.mean_queue_depth > 0
+
+
+class TimingTask(MockTask):
+    def __init__(self, name: str):
+        super().__init__()
+        self.name = name
+        self.intervals = {}
+
+    def run(self, s: str):
+        start = time.time()
+        time.sleep(0.1)
+        self.intervals[s] = (start, time.time())
+
+
+class ConcurrencyRecordingTask(MockTask):
+    def __init__(self):
+        super().__init__()
+        self.concurrency = 0
+        self.max_concurrency = 0
+        self.lock = Lock()
+
+    def run(self, s: str):
+        with self.lock:
+            self.concurrency += 1
+            self.max_concurrency = max(self.max_concurrency, self.concurrency)
+        time.sleep(0.1)
+        with self.lock:
+            self.concurrency -= 1
+
+
+class EndRecordingTask(MockTask):
+    def run(self, s: str):
+        self.calls.append((s,))
+
+    def end(self):
+        self.calls.append("end")
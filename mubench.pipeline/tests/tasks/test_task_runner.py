@@ -1,10 +1,15 @@
+import sys
+from os.path import join
+from tempfile import mkdtemp
 from typing import List
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, call
 
 from nose.tools import assert_in, assert_raises, assert_equals
 
+from tasks.journal import Journal
 from tasks.task_runner import TaskRunner, TaskParameterUnavailableWarning, TaskParameterDuplicateTypeWarning, \
-    TaskRequestsDuplicateTypeWarning, Continue
+    TaskRequestsDuplicateTypeWarning, Continue, TaskNotRunnableWarning
+from utils.io import remove_tree
 
 
 class TestTaskRunner:
@@ -150,6 +155,206 @@ class TestTaskRunner:
 
         third_task.assert_called_once_with("-some string-")
 
+    def test_binds_parameters_of_results_of_different_types(self):
+        first_task = VoidTask(["-some string-", 42])
+        second_task = ObjectConsumingTask()
+        uut = TaskRunner([first_task, second_task])
+
+        uut.run()
+
+        second_task.assert_has_calls([("-some string-",), (42,)])
+
+    def test_reports_task_that_requests_the_same_type_multiple_times_up_front(self):
+        uut = TaskRunner([VoidTask(), DuplicateIntRequestingTask()])
+
+        assert_raises(TaskRequestsDuplicateTypeWarning, uut.run)
+
+    def test_reports_task_without_run(self):
+        uut = TaskRunner([VoidTask(), object()])
+
+        with assert_raises(TaskNotRunnableWarning) as context:
+            uut.run()
+
+        assert_equals("Task object has no run() method", str(context.exception))
+
+    def test_runs_chains_longer_than_the_recursion_limit(self):
+        last_task = VoidTask()
+        uut = TaskRunner([VoidTask() for _ in range(sys.getrecursionlimit())] + [last_task])
+
+        uut.run()
+
+        last_task.assert_called_once_with()
+
+
+class TestTaskRunnerJournal:
+    # noinspection PyAttributeOutsideInit
+    def setup(self):
+        self.temp_dir = mkdtemp(prefix="mubench-test-task-runner-journal_")
+        self.journal_path = join(self.temp_dir, "-task-.journal")
+
+    def teardown(self):
+        remove_tree(self.temp_dir)
+
+    def test_resume_skips_completed_items(self):
+        TaskRunner([VoidTask([Entity("-a-"), Entity("-b-")]), EntityConsumingTask()],
+                   Journal(self.journal_path, resume=False)).run()
+        second_task = EntityConsumingTask()
+        uut = TaskRunner([VoidTask([Entity("-a-"), Entity("-b-"), Entity("-c-")]), second_task],
+                         Journal(self.journal_path, resume=True))
+
+        uut.run()
+
+        assert_equals([("-c-",)], second_task.calls)
+
+    def test_resume_reruns_failed_items(self):
+        TaskRunner([VoidTask([Entity("-a-"), Entity("-b-")]), FailingEntityConsumingTask("-b-")],
+                   Journal(self.journal_path, resume=False)).run()
+        second_task = FailingEntityConsumingTask("-b-")
+        uut = TaskRunner([VoidTask([Entity("-a-"), Entity("-b-")]), second_task],
+                         Journal(self.journal_path, resume=True))
+
+        uut.run()
+
+        assert_equals([("-b-",)], second_task.calls)
+
+    def test_resume_does_not_skip_items_collected_for_end(self):
+        TaskRunner([VoidTask([Entity("-a-")]), EndingEntityConsumingTask()],
+                   Journal(self.journal_path, resume=False)).run()
+        second_task = EndingEntityConsumingTask()
+        uut = TaskRunner([VoidTask([Entity("-a-")]), second_task], Journal(self.journal_path, resume=True))
+
+        uut.run()
+
+        assert_equals([("-a-",)], second_task.calls)
+
+
+class TestTaskRunnerBatches:
+    def test_runs_batch_with_parameters_of_every_entity(self):
+        second_task = BatchStringConsumingTask()
+        uut = TaskRunner([VoidTask(["-a-", "-b-"]), second_task], batch_size=10)
+
+        uut.run()
+
+        assert_equals([[("-a-",), ("-b-",)]], second_task.batches)
+        second_task.assert_not_called()
+
+    def test_runs_batches_of_at_most_batch_size_entities(self):
+        second_task = BatchStringConsumingTask()
+        uut = TaskRunner([VoidTask(["-a-", "-b-", "-c-"]), second_task], batch_size=2)
+
+        uut.run()
+
+        assert_equals([[("-a-",), ("-b-",)], [("-c-",)]], second_task.batches)
+
+    def test_runs_entities_one_by_one_without_batch_size(self):
+        second_task = BatchStringConsumingTask()
+        uut = TaskRunner([VoidTask(["-a-", "-b-"]), second_task])
+
+        uut.run()
+
+        assert_equals([], second_task.batches)
+        second_task.assert_has_calls([("-a-",), ("-b-",)])
+
+    def test_runs_subsequent_task_with_every_batch_result(self):
+        third_task = StringAndIntConsumingTask()
+        uut = TaskRunner([VoidTask(["-a-", "-b-"]), BatchStringConsumingTask([[1], [2]]), third_task], batch_size=10)
+
+        uut.run()
+
+        assert_equals([("-a-", 1), ("-b-", 2)], third_task.calls)
+
+    def test_runs_subsequent_batches(self):
+        third_task = BatchIntConsumingTask()
+        uut = TaskRunner([VoidTask(["-a-", "-b-"]), BatchStringConsumingTask([[1], [2]]), third_task], batch_size=10)
+
+        uut.run()
+
+        assert_equals([[(1,), (2,)]], third_task.batches)
+
+    def test_continues_with_other_entities_if_entity_fails(self):
+        third_task = StringAndIntConsumingTask()
+        uut = TaskRunner([VoidTask(["-a-", "-b-"]), BatchStringConsumingTask([ValueError("-a-"), [2]]), third_task],
+                         batch_size=10)
+
+        uut.run()
+
+        assert_equals([("-b-", 2)], third_task.calls)
+
+    def test_continues_if_batch_fails(self):
+        third_task = StringConsumingTask()
+        uut = TaskRunner([VoidTask(["-a-"]), BatchStringConsumingTask([]), third_task], batch_size=10)
+
+        uut.run()
+
+        third_task.assert_not_called()
+
+    def test_records_completed_entities_of_batch(self):
+        journal = MagicMock()
+        journal.is_completed.return_value = False
+        second_task = BatchEntityConsumingTask()
+        uut = TaskRunner([VoidTask([Entity("-a-")]), second_task], journal, batch_size=10)
+
+        uut.run()
+
+        journal.record.assert_any_call(second_task, [Entity("-a-")])
+
+    def test_records_entity_once_its_batched_entities_complete(self):
+        journal = MagicMock()
+        journal.is_completed.return_value = False
+        first_task = VoidTask([Entity("-a-"), Entity("-b-")])
+        second_task = BatchEntityConsumingTask()
+        uut = TaskRunner([first_task, second_task], journal, batch_size=10)
+
+        uut.run()
+
+        assert_equals([call(second_task, [Entity("-a-")]), call(second_task, [Entity("-b-")]), call(first_task, [])],
+                      journal.record.call_args_list)
+
+    def test_does_not_record_entity_if_its_batch_fails(self):
+        journal = MagicMock()
+        journal.is_completed.return_value = False
+        first_task = VoidTask(["-a-"])
+        uut = TaskRunner([first_task, BatchStringConsumingTask([])], journal, batch_size=10)
+
+        uut.run()
+
+        journal.record.assert_not_called()
+
+
+class Entity:
+    def __init__(self, entity_id: str):
+        self.id = entity_id
+
+    def __str__(self):
+        return self.id
+
+    def __eq__(self, other):
+        return isinstance(other, Entity) and self.id == other.id
+
+
+class EntityConsumingTask:
+    def __init__(self):
+        self.calls = []
+
+    def run(self, entity: Entity):
+        self.calls.append((entity.id,))
+
+
+class FailingEntityConsumingTask(EntityConsumingTask):
+    def __init__(self, failing_id: str):
+        super().__init__()
+        self.failing_id = failing_id
+
+    def run(self, entity: Entity):
+        super().run(entity)
+        if entity.id == self.failing_id:
+            raise ValueError(entity.id)
+
+
+class EndingEntityConsumingTask(EntityConsumingTask):
+    def end(self):
+        pass
+
 
 class MockTask:
     def __init__(self, results: List = None):
@@ -191,6 +396,12 @@ class IntAndStringConsumingTask(MockTask):
         return self.results
 
 
+class ObjectConsumingTask(MockTask):
+    def run(self, o: object):
+        self.calls.append((o,))
+        return self.results
+
+
 class ListConsumingTask(MockTask):
     def run(self, l: List):
         self.calls.append((l,))
@@ -235,3 +446,34 @@ class NoneReturningTask(MockTask):
     # noinspection PyMethodMayBeStatic
     def run(self):
         return None
+
+
+class BatchStringConsumingTask(StringConsumingTask):
+    def __init__(self, batch_results: List = None):
+        super().__init__()
+        self.batch_results = batch_results
+        self.batches = []
+
+    def run_batch(self, parameter_values: List):
+        self.batches.append(parameter_values)
+        if self.batch_results is None:
+            return [None] * len(parameter_values)
+        return self.batch_results
+
+
+class BatchIntConsumingTask(MockTask):
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def run(self, i: int):
+        self.calls.append((i,))
+
+    def run_batch(self, parameter_values: List):
+        self.batches.append(parameter_values)
+        return [None] * len(parameter_values)
+
+
+class BatchEntityConsumingTask(EntityConsumingTask):
+    def run_batch(self, parameter_values: List):
+        return [None] * len(parameter_values)
@@ -0,0 +1,114 @@
+import time
+from threading import Thread
+
+from nose.tools import assert_equals
+
+from tasks.work_queue import WorkQueue, WorkQueueServer, WorkQueueClient
+
+
+class TestWorkQueue:
+    # noinspection PyAttributeOutsideInit
+    def setup(self):
+        self.now = 0
+        self.uut = WorkQueue(["-a-", "-b-"], 10, clock=lambda: self.now)
+
+    def test_leases_items_in_order(self):
+        assert_equals("-a-", self.uut.lease("-w1-")["item"])
+        assert_equals("-b-", self.uut.lease("-w2-")["item"])
+        assert_equals(None, self.uut.lease("-w3-"))
+
+    def test_is_done_when_all_items_completed(self):
+        self.uut.complete(self.uut.lease("-w-")["lease"])
+        assert not self.uut.is_done()
+
+        self.uut.complete(self.uut.lease("-w-")["lease"])
+        assert self.uut.is_done()
+
+    def test_is_done_when_all_items_completed_or_failed(self):
+        self.uut.complete(self.uut.lease("-w-")["lease"])
+        self.uut.fail(self.uut.lease("-w-")["lease"], "-reason-")
+
+        assert self.uut.is_done()
+        assert_equals({"-b-": "-reason-"}, dict(self.uut.failed))
+
+    def test_does_not_requeue_failed_item(self):
+        self.uut.fail(self.uut.lease("-w1-")["lease"], "-reason-")
+        self.uut.lease("-w1-")
+
+        self.now = 10
+
+        assert_equals("-b-", self.uut.lease("-w2-")["item"])
+        assert_equals(None, self.uut.lease("-w2-"))
+
+    def test_requeues_item_of_expired_lease(self):
+        lease = self.uut.lease("-w1-")
+        self.uut.lease("-w1-")
+
+        self.now = 10
+
+        assert_equals(lease["item"], self.uut.lease("-w2-")["item"])
+        assert not self.uut.complete(lease["lease"])
+
+    def test_renew_extends_lease(self):
+        lease = self.uut.lease("-w1-")
+        self.uut.complete(self.uut.lease("-w1-")["lease"])
+
+        self.now = 5
+        assert self.uut.renew(lease["lease"])
+        self.now = 10
+
+        assert_equals(None, self.uut.lease("-w2-"))
+
+
+class TestWorkQueueServer:
+    def test_serves_queue(self):
+        queue = WorkQueue(["-a-"], 10)
+        with WorkQueueServer(queue, ["detect", "-d-", "1"]).serving() as server:
+            client = WorkQueueClient(server.url, "-worker-")
+
+            arguments = client.get_arguments()
+            lease = client.lease()
+            renewed = client.renew(lease["lease"])
+            completed = client.complete(lease["lease"])
+            no_lease = client.lease()
+
+        assert_equals(["detect", "-d-", "1"], arguments)
+        assert_equals("-a-", lease["item"])
+        assert renewed
+        assert completed
+        assert_equals({"lease": None, "done": True}, no_lease)
+
+    def test_keeps_lease_alive(self):
+        queue = WorkQueue(["-a-"], 0.3)
+        with WorkQueueServer(queue, []).serving() as server:
+            client = WorkQueueClient(server.url, "-worker-")
+            lease = client.lease()
+            with client.keeping_alive(lease):
+                time.sleep(0.5)
+
+            assert client.complete(lease["lease"])
+
+    def test_reports_failure(self):
+        queue = WorkQueue(["-a-"], 10)
+        with WorkQueueServer(queue, []).serving() as server:
+            client = WorkQueueClient(server.url, "-worker-")
+            lease = client.lease()
+
+            assert client.fail(lease["lease"], "-reason-")
+            assert_equals({"lease": None, "done": True}, client.lease())
+
+        assert_equals({"-a-": "-reason-"}, dict(queue.failed))
+
+    def test_serves_workers_that_poll_after_the_queue_is_done(self):
+        queue = WorkQueue(["-a-"], 10)
+        server = WorkQueueServer(queue, [])
+        client = WorkQueueClient(server.url, "-worker-")
+        late_leases = []
+        late_worker = Thread(target=lambda: time.sleep(0.2) or late_leases.append(client.lease()))
+
+        with server.serving(grace_period=1):
+            client.complete(client.lease()["lease"])
+            late_worker.start()
+        late_worker.join()
+
+        assert_equals([{"lease": None, "done": True}], late_leases)
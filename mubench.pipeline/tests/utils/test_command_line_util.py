@@ -1,6 +1,7 @@
 import sys
 from nose.tools import assert_raises, assert_equals, nottest
 
+from tests.test_utils.data_util import create_misuse
 from utils.command_line_util import get_command_line_parser
 
 def setup_module():
@@ -149,3 +150,214 @@ def test_dataset_check():
     parser = get_command_line_parser([], [], [])
     result = parser.parse_args(['dataset-check'])
     assert_equals('dataset-check', result.task)
+
+
+def test_jobs():
+    parser = get_command_line_parser([], [], [])
+    result = parser.parse_args(['compile', '--jobs', '4'])
+    assert_equals(4, result.jobs)
+
+
+def test_jobs_default():
+    parser = get_command_line_parser([], [], [])
+    result = parser.parse_args(['compile'])
+    assert_equals(1, result.jobs)
+
+
+def test_jobs_fails_for_non_positive_number():
+    parser = get_command_line_parser([], [], [])
+    assert_raises(SystemExit, parser.parse_args, ['compile', '--jobs', '0'])
+
+
+def test_batch_size():
+    parser = get_command_line_parser([], [], [])
+    result = parser.parse_args(['compile', '--batch-size', '20'])
+    assert_equals(20, result.batch_size)
+
+
+def test_batch_size_default():
+    parser = get_command_line_parser([], [], [])
+    result = parser.parse_args(['compile'])
+    assert_equals(1, result.batch_size)
+
+
+def test_pipeline():
+    parser = get_command_line_parser([], [], [])
+    result = parser.parse_args(['compile', '--pipeline', '--stage-workers', 'CheckoutTask=4', 'CompileTask=2'])
+    assert result.pipeline
+    assert_equals([('CheckoutTask', 4), ('CompileTask', 2)], result.stage_workers)
+
+
+def test_pipeline_default():
+    parser = get_command_line_parser([], [], [])
+    result = parser.parse_args(['compile'])
+    assert not result.pipeline
+    assert_equals([], result.stage_workers)
+
+
+def test_stage_workers_fails_for_invalid_value():
+    parser = get_command_line_parser([], [], [])
+    assert_raises(SystemExit, parser.parse_args, ['compile', '--stage-workers', 'CheckoutTask'])
+
+
+def test_async():
+    parser = get_command_line_parser([], [], [])
+    result = parser.parse_args(['checkout', '--async', '--concurrency', '8'])
+    assert result.use_async
+    assert_equals(8, result.concurrency)
+
+
+def test_async_default():
+    parser = get_command_line_parser([], [], [])
+    result = parser.parse_args(['checkout'])
+    assert not result.use_async
+    assert_equals(16, result.concurrency)
+
+
+def test_shard():
+    parser = get_command_line_parser([], [], [])
+    result = parser.parse_args(['checkout', '--shard', '2/3'])
+    assert_equals(2, result.shard.index)
+    assert_equals(3, result.shard.count)
+
+
+def test_shard_fails_for_invalid_value():
+    parser = get_command_line_parser([], [], [])
+    assert_raises(SystemExit, parser.parse_args, ['checkout', '--shard', '4/3'])
+
+
+def test_merge():
+    parser = get_command_line_parser([], [], [])
+    result = parser.parse_args(['merge', 'shard1/findings', 'shard2/findings'])
+    assert_equals('merge', result.task)
+    assert_equals(['shard1/findings', 'shard2/findings'], result.shard_findings_paths)
+
+
+def test_coordinate():
+    parser = get_command_line_parser([], [], [])
+    result = parser.parse_args(['checkout', '--coordinate', '8080', '--lease-timeout', '60'])
+    assert_equals(("localhost", 8080), result.coordinate)
+    assert_equals(60, result.lease_timeout)
+
+
+def test_coordinate_with_host():
+    parser = get_command_line_parser([], [], [])
+    result = parser.parse_args(['checkout', '--coordinate', '0.0.0.0:8080'])
+    assert_equals(("0.0.0.0", 8080), result.coordinate)
+
+
+def test_worker():
+    parser = get_command_line_parser([], [], [])
+    result = parser.parse_args(['worker', 'http://localhost:8080/'])
+    assert_equals('worker', result.task)
+    assert_equals('http://localhost:8080/', result.coordinator_url)
+
+
+def test_longest_first_and_plan():
+    parser = get_command_line_parser([], [], [])
+    result = parser.parse_args(['compile', '--longest-first', '--plan'])
+    assert result.longest_first
+    assert result.plan
+
+
+def test_resume():
+    parser = get_command_line_parser([], [], [])
+    result = parser.parse_args(['compile', '--resume'])
+    assert result.resume
+
+
+def test_trace():
+    parser = get_command_line_parser([], [], [])
+    result = parser.parse_args(['compile', '--trace', 'trace.json'])
+    assert_equals('trace.json', result.trace_file)
+
+
+def test_profile():
+    parser = get_command_line_parser([], [], [])
+    result = parser.parse_args(['compile', '--profile', 'profiles'])
+    assert_equals('profiles', result.profile_path)
+
+
+def test_where():
+    parser = get_command_line_parser(['valid-detector'], [], [])
+    result = parser.parse_args(['detect', 'valid-detector', '1', '--where', 'apis == java.util.List'])
+    assert result.where.matches(create_misuse("-m-", meta={"api": ["java.util.List"]}))
+
+
+def test_where_default():
+    parser = get_command_line_parser(['valid-detector'], [], [])
+    result = parser.parse_args(['detect', 'valid-detector', '1'])
+    assert result.where is None
+
+
+def test_where_invalid_fails():
+    parser = get_command_line_parser(['valid-detector'], [], [])
+    assert_raises(SystemExit, parser.parse_args, ['detect', 'valid-detector', '1', '--where', 'apis = x'])
+
+
+def test_checkout_jobs():
+    parser = get_command_line_parser([], [], [])
+    result = parser.parse_args(['checkout', '--checkout-jobs', '8', '--checkout-jobs-per-host', '2'])
+    assert_equals(8, result.checkout_jobs)
+    assert_equals(2, result.checkout_jobs_per_host)
+
+
+def test_checkout_jobs_default():
+    parser = get_command_line_parser([], [], [])
+    result = parser.parse_args(['checkout'])
+    assert_equals(1, result.checkout_jobs)
+    assert_equals(4, result.checkout_jobs_per_host)
+
+
+def test_sparse_checkout():
+    parser = get_command_line_parser([], [], [])
+    result = parser.parse_args(['checkout', '--sparse-checkout'])
+    assert result.sparse_checkout
+
+
+def test_snapshot_cache():
+    parser = get_command_line_parser([], [], [])
+    result = parser.parse_args(['checkout', '--snapshot-cache', '/cache'])
+    assert_equals('/cache', result.snapshot_cache_path)
+
+
+def test_svn_export():
+    parser = get_command_line_parser([], [], [])
+    result = parser.parse_args(['checkout', '--svn-export'])
+    assert result.svn_export
+
+
+def test_verify_checkouts():
+    parser = get_command_line_parser([], [], [])
+    result = parser.parse_args(['checkout', '--verify-checkouts'])
+    assert result.verify_checkouts
+
+
+def test_checkout_without_bundles():
+    parser = get_command_line_parser([], [], [])
+    result = parser.parse_args(['checkout'])
+    assert_equals(None, result.checkout_task)
+
+
+def test_export_bundles():
+    parser = get_command_line_parser([], [], ["valid-dataset"])
+    result = parser.parse_args(['checkout', 'export-bundles', '/bundles', '--dataset', 'valid-dataset'])
+    assert_equals('export-bundles', result.checkout_task)
+    assert_equals('/bundles', result.bundles_path)
+    assert_equals('valid-dataset', result.dataset)
+
+
+def test_import_bundles():
+    parser = get_command_line_parser([], [], [])
+    result = parser.parse_args(['checkout', 'import-bundles', '/bundles', '--checkout-jobs', '2'])
+    assert_equals('import-bundles', result.checkout_task)
+    assert_equals('/bundles', result.bundles_path)
+    assert_equals(2, result.checkout_jobs)
+
+
+def test_bundles_keep_options_before_subcommand():
+    parser = get_command_line_parser([], [], [])
+    result = parser.parse_args(['checkout', '--only', 'x', '--jobs', '4', 'export-bundles', '/bundles'])
+    assert_equals(['x'], result.white_list)
+    assert_equals(4, result.jobs)
+    assert_equals(1, result.batch_size)
@@ -1,29 +1,115 @@
-from nose.tools import assert_equals
+from unittest.mock import patch, PropertyMock
 
+from data.project import Project
+from tests.test_utils.data_util import create_project, create_version, create_misuse
 from utils.data_entity_lists import DataEntityLists
+from utils.misuse_predicate import MisusePredicate
 
 
 class TestDataEntityLists:
     def test_should_add_all_project_ids(self):
         uut = DataEntityLists(["p1.v.m", "p2.v", "p3"], [])
 
-        actual = uut.get_project_white_list()
-
-        expected = ["p1", "p2", "p3"]
-        assert_equals(expected, actual)
+        assert not uut.is_filtered("p1")
+        assert not uut.is_filtered("p2")
+        assert not uut.is_filtered("p3")
+        assert uut.is_filtered("p4")
 
     def test_should_add_all_version_ids(self):
         uut = DataEntityLists(["p.v1.m", "p.v2", "p"], [])
 
-        actual = uut.get_version_white_list("p")
-
-        expected = ["p.v1", "p.v2"]
-        assert_equals(expected, actual)
+        assert not uut.is_filtered("p.v1")
+        assert not uut.is_filtered("p.v2")
+        assert uut.is_filtered("p.v3")
 
     def test_should_add_all_misuse_ids(self):
         uut = DataEntityLists(["p.v1.m1", "p.v2.m1", "p.v2.m2", "p"], [])
 
-        actual = uut.get_misuse_white_list("p.v2")
+        assert not uut.is_filtered("p.v2.m1")
+        assert not uut.is_filtered("p.v2.m2")
+        assert uut.is_filtered("p.v2.m3")
+
+    def test_whitelists_all_versions_of_whitelisted_project(self):
+        uut = DataEntityLists(["p"], [])
+
+        assert not uut.is_filtered("p.v.m")
+
+    def test_whitelists_all_if_white_list_is_empty(self):
+        uut = DataEntityLists([], [])
+
+        assert not uut.is_filtered("p.v.m")
+
+    def test_filters_blacklisted_ids(self):
+        uut = DataEntityLists([], ["p1", "p2.v"])
+
+        assert uut.is_filtered("p1")
+        assert uut.is_filtered("p2.v")
+        assert not uut.is_filtered("p2.other-v")
+
+    def test_filters_children_of_blacklisted_ids(self):
+        uut = DataEntityLists([], ["p.v"])
+
+        assert uut.is_filtered("p.v.m")
+
+    def test_whitelists_by_glob(self):
+        uut = DataEntityLists(["p.v*.m1"], [])
+
+        assert not uut.is_filtered("p.v1.m1")
+        assert not uut.is_filtered("p.v2.m1")
+        assert uut.is_filtered("p.v2.m2")
+        assert uut.is_filtered("p.other.m1")
+
+    def test_blacklists_by_glob(self):
+        uut = DataEntityLists([], ["p?.*"])
+
+        assert uut.is_filtered("p1.v")
+        assert not uut.is_filtered("p1")
+        assert not uut.is_filtered("p10.v")
+
+    def test_matches_ids_and_globs(self):
+        uut = DataEntityLists(["p.v1", "p.v*.m2"], [])
+
+        assert not uut.is_filtered("p.v1.m1")
+        assert not uut.is_filtered("p.v2.m2")
+        assert uut.is_filtered("p.v2.m1")
+
+
+class TestDataEntityListsWhere:
+    # noinspection PyAttributeOutsideInit
+    def setup(self):
+        self.project = create_project("-p-")
+        self.matching_version = create_version("-v1-", project=self.project, misuses=[])
+        self.matching_misuse = create_misuse("-m1-", meta={"api": ["java.util.List"]}, project=self.project,
+                                             version=self.matching_version)
+        self.other_version = create_version("-v2-", project=self.project, misuses=[])
+        create_misuse("-m2-", meta={"api": ["java.util.Map"]}, project=self.project, version=self.other_version)
+
+    def test_filters_misuses(self):
+        uut = DataEntityLists([], [], MisusePredicate("apis == java.util.List"))
+
+        assert not uut.is_misuse_filtered(self.matching_misuse)
+        assert all(uut.is_misuse_filtered(misuse) for misuse in self.other_version.misuses)
+
+    def test_filters_versions_without_matching_misuse(self):
+        uut = DataEntityLists([], [], MisusePredicate("apis == java.util.List"))
+
+        assert not uut.is_version_filtered(self.matching_version)
+        assert uut.is_version_filtered(self.other_version)
+
+    def test_filters_projects_without_matching_misuse(self):
+        uut = DataEntityLists([], [], MisusePredicate("apis == java.util.Set"))
+
+        assert uut.is_project_filtered(self.project)
+
+    def test_filters_projects_by_id_without_reading_misuses(self):
+        uut = DataEntityLists([], [], MisusePredicate("project == -other- and apis == java.util.List"))
+
+        with patch.object(Project, "versions", new_callable=PropertyMock) as versions_mock:
+            assert uut.is_project_filtered(self.project)
+
+        versions_mock.assert_not_called()
+
+    def test_filters_misuses_by_id_and_predicate(self):
+        uut = DataEntityLists(["-p-.-v2-"], [], MisusePredicate("apis == java.util.List"))
 
-        expected = ["p.v2.m1", "p.v2.m2"]
-        assert_equals(expected, actual)
+        assert uut.is_project_filtered(self.project)
@@ -29,3 +29,12 @@ class TestDataFilter:
     def test_filters_blacklisted_by_prefix(self):
         uut = DataFilter([], ["-project-"])
         assert uut.is_filtered("-project-.-version-")
+
+    def test_filters_blacklisted_by_segments(self):
+        uut = DataFilter([], ["-project-"])
+        assert not uut.is_filtered("-project-2-.-version-")
+
+    def test_filters_by_glob(self):
+        uut = DataFilter(["-project-.-version-*"], ["*.-version-2-"])
+        assert not uut.is_filtered("-project-.-version-1-")
+        assert uut.is_filtered("-project-.-version-2-")
@@ -2,11 +2,13 @@ from os import makedirs
 from os.path import join, dirname, exists, isfile
 from shutil import rmtree
 from tempfile import mkdtemp
+from zipfile import ZipFile
 
 import yaml
 from nose.tools import assert_raises, assert_equals
 
-from utils.io import create_file, create_file_path, safe_open, safe_write, remove_tree, copy_tree, write_yaml
+from utils.io import create_file, create_file_path, safe_open, safe_write, remove_tree, copy_tree, write_yaml, \
+    extract_zip
 
 
 class TestIo:
@@ -83,6 +85,31 @@ class TestIo:
         with assert_raises(FileNotFoundError):
             copy_tree(src, "-irrelevant-")
 
+    def test_extracts_zip(self):
+        zip_file_path = join(self.temp_dir, "bundle.zip")
+        with ZipFile(zip_file_path, "w") as zip_file:
+            zip_file.writestr("empty/", "")
+            for i in range(10):
+                zip_file.writestr("dir{}/file{}".format(i % 3, i), "content{}".format(i))
+            zip_file.writestr("file", "-content-")
+
+        extract_zip(zip_file_path, join(self.temp_dir, "dst"), jobs=4)
+
+        assert exists(join(self.temp_dir, "dst", "empty"))
+        assert exists(join(self.temp_dir, "dst", "dir2", "file8"))
+        with open(join(self.temp_dir, "dst", "file")) as file:
+            assert_equals("-content-", file.read())
+
+    def test_rejects_zip_with_entry_outside_of_destination(self):
+        zip_file_path = join(self.temp_dir, "bundle.zip")
+        with ZipFile(zip_file_path, "w") as zip_file:
+            zip_file.writestr("../outside/file", "-content-")
+
+        with assert_raises(ValueError):
+            extract_zip(zip_file_path, join(self.temp_dir, "dst"))
+
+        assert not exists(join(self.temp_dir, "outside"))
+
 
 class TestIOYaml:
     def test_writes_single_line(self):
@@ -0,0 +1,52 @@
+from nose.tools import assert_raises
+
+from tests.test_utils.data_util import create_misuse, create_project
+from utils.misuse_predicate import MisusePredicate
+
+
+class TestMisusePredicate:
+    # noinspection PyAttributeOutsideInit
+    def setup(self):
+        self.misuse = create_misuse("-m-", project=create_project("-p-"), meta={
+            "api": ["java.util.Iterator"],
+            "characteristics": ["missing/condition/null_check"],
+            "source": {"name": "BugClassify"},
+            "crash": True
+        })
+
+    def test_matches_api(self):
+        assert MisusePredicate("apis == java.util.Iterator").matches(self.misuse)
+        assert not MisusePredicate("apis == java.util.List").matches(self.misuse)
+
+    def test_matches_glob(self):
+        assert MisusePredicate("characteristics == missing/condition/*").matches(self.misuse)
+
+    def test_matches_inequality(self):
+        assert MisusePredicate("apis != java.util.List").matches(self.misuse)
+        assert not MisusePredicate("apis != java.util.*").matches(self.misuse)
+
+    def test_matches_source_crash_and_project(self):
+        assert MisusePredicate("source == BugClassify and is_crash == true and project == -p-").matches(self.misuse)
+
+    def test_does_not_match_missing_field(self):
+        misuse = create_misuse("-m-")
+        assert not MisusePredicate("is_crash == false or source == *").matches(misuse)
+
+    def test_combines_comparisons(self):
+        predicate = MisusePredicate("not (apis == java.util.List or is_crash == false) and source == 'BugClassify'")
+        assert predicate.matches(self.misuse)
+
+    def test_may_match_project(self):
+        predicate = MisusePredicate("project == -p- and apis == java.util.List")
+        assert predicate.may_match_project("-p-")
+        assert not predicate.may_match_project("-other-")
+
+    def test_may_match_any_project_without_project_comparison(self):
+        assert MisusePredicate("not apis == java.util.List").may_match_project("-p-")
+
+    def test_rejects_unknown_field(self):
+        assert_raises(ValueError, MisusePredicate, "api == java.util.List")
+
+    def test_rejects_invalid_expressions(self):
+        for expression in ["", "apis", "apis = x", "apis == x and", "(apis == x", "apis == x)"]:
+            assert_raises(ValueError, MisusePredicate, expression)
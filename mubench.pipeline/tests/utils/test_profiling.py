@@ -0,0 +1,68 @@
+import pstats
+import time
+from os.path import join, exists
+from tempfile import mkdtemp
+
+from nose.tools import assert_equals
+
+from tasks.parallel_task_runner import ParallelTaskRunner
+from tasks.task_runner import TaskRunner
+from tests.tasks.test_task_runner import VoidTask, StringConsumingTask
+from utils import profiling
+from utils.io import remove_tree, safe_read
+
+
+class TestProfiling:
+    # noinspection PyAttributeOutsideInit
+    def setup(self):
+        self.temp_dir = mkdtemp(prefix="mubench-test-profiling_")
+
+    def teardown(self):
+        if profiling.is_profiling():
+            profiling.stop(self.temp_dir)
+        remove_tree(self.temp_dir)
+
+    def test_writes_profile_per_task(self):
+        profiling.start()
+
+        TaskRunner([VoidTask(["-a-", "-b-"]), BusyTask()]).run()
+        profiling.stop(self.temp_dir)
+
+        stats = pstats.Stats(join(self.temp_dir, "BusyTask.pstats"))
+        busy_calls = [call_count for (_, _, function), (_, call_count, _, _, _) in stats.stats.items()
+                      if function == "busy"]
+        assert_equals([2], busy_calls)
+
+    def test_writes_combined_profile_and_stacks(self):
+        profiling.start()
+
+        TaskRunner([VoidTask(["-a-"]), BusyTask()]).run()
+        profiling.stop(self.temp_dir)
+
+        assert exists(join(self.temp_dir, "VoidTask.pstats"))
+        pstats.Stats(join(self.temp_dir, "combined.pstats"))
+        assert "busy" in safe_read(join(self.temp_dir, "combined.folded"))
+
+    def test_collects_profiles_from_workers(self):
+        profiling.start()
+
+        ParallelTaskRunner([VoidTask(["-a-", "-b-"]), BusyTask()], 2, split_type=str).run()
+        profiling.stop(self.temp_dir)
+
+        assert exists(join(self.temp_dir, "BusyTask.pstats"))
+
+    def test_profiles_nothing_when_not_profiling(self):
+        TaskRunner([VoidTask(["-a-"]), BusyTask()]).run()
+
+        assert_equals(({}, {}), profiling.take_profiles())
+
+
+class BusyTask(StringConsumingTask):
+    def run(self, s: str):
+        busy()
+
+
+def busy():
+    end = time.time() + 0.05
+    while time.time() < end:
+        pass
@@ -0,0 +1,91 @@
+from os.path import join
+from tempfile import mkdtemp
+
+from nose.tools import assert_equals
+
+from tests.test_utils.data_util import create_project, create_version
+from utils.io import write_yaml, remove_tree
+from utils.scheduling import Schedule, get_estimated_runtime, get_recorded_runtime
+
+
+class TestSchedule:
+    # noinspection PyAttributeOutsideInit
+    def setup(self):
+        self.small_project = create_project("-small-")
+        self.small_v1 = create_version("-v1-", project=self.small_project)
+        self.large_project = create_project("-large-")
+        self.large_v1 = create_version("-v1-", project=self.large_project)
+        self.large_v2 = create_version("-v2-", project=self.large_project)
+        self.runtimes = {self.small_v1.id: 5, self.large_v1.id: 1, self.large_v2.id: 8}
+
+    def test_orders_longest_first_grouped_by_project(self):
+        uut = Schedule([self.small_v1, self.large_v1, self.large_v2], lambda v: self.runtimes[v.id])
+
+        assert_equals([self.large_v2, self.large_v1, self.small_v1], uut.versions)
+
+    def test_sorts_projects_by_total_runtime(self):
+        uut = Schedule([self.small_v1, self.large_v1, self.large_v2], lambda v: self.runtimes[v.id])
+
+        assert_equals([self.large_project, self.small_project],
+                      uut.sort_projects([self.small_project, self.large_project]))
+
+    def test_assumes_mean_runtime_for_unknown_versions(self):
+        self.runtimes[self.large_v1.id] = None
+
+        uut = Schedule([self.small_v1, self.large_v1, self.large_v2], lambda v: self.runtimes[v.id])
+
+        assert_equals(6.5, uut.get_runtime(self.large_v1))
+
+    def test_plans_on_next_free_worker(self):
+        uut = Schedule([self.small_v1, self.large_v1, self.large_v2], lambda v: self.runtimes[v.id])
+
+        plan = uut.plan(2)
+
+        assert_equals([(self.large_v2, 0, 0, 8), (self.large_v1, 1, 0, 1), (self.small_v1, 1, 1, 6)], plan)
+
+
+class TestGetEstimatedRuntime:
+    # noinspection PyAttributeOutsideInit
+    def setup(self):
+        self.temp_dir = mkdtemp(prefix="mubench-test-scheduling_")
+        self.findings_path = join(self.temp_dir, "findings")
+        self.compiles_path = join(self.temp_dir, "checkouts")
+        self.version = create_version("-v-", project=create_project("-p-"))
+
+    def teardown(self):
+        remove_tree(self.temp_dir)
+
+    def test_sums_compile_and_detector_runtimes(self):
+        write_yaml({"runtime": 2}, join(self.findings_path, "mine_and_detect", "-d-", "-p-", "-v-", "run.yml"))
+        self.version.get_compile(self.compiles_path).save_runtime(3)
+
+        assert_equals(5, get_estimated_runtime(self.version, self.findings_path, self.compiles_path))
+
+    def test_none_without_records(self):
+        assert_equals(None, get_estimated_runtime(self.version, self.findings_path, self.compiles_path))
+
+
+class TestGetRecordedRuntime:
+    # noinspection PyAttributeOutsideInit
+    def setup(self):
+        self.findings_path = mkdtemp(prefix="mubench-test-sharding_")
+        self.version = create_version("-v-", project=create_project("-p-"))
+
+    def teardown(self):
+        remove_tree(self.findings_path)
+
+    def test_sums_runtimes_of_all_runs(self):
+        write_yaml({"runtime": 1.5}, join(self.findings_path, "detect_only", "-d-", "-p-", "-v-", "-m1-", "run.yml"))
+        write_yaml({"runtime": 2}, join(self.findings_path, "detect_only", "-d-", "-p-", "-v-", "-m2-", "run.yml"))
+        write_yaml({"runtime": 3}, join(self.findings_path, "mine_and_detect", "-d-", "-p-", "-v-", "run.yml"))
+
+        assert_equals(6.5, get_recorded_runtime(self.findings_path, self.version))
+
+    def test_filters_by_detector(self):
+        write_yaml({"runtime": 1}, join(self.findings_path, "mine_and_detect", "-d1-", "-p-", "-v-", "run.yml"))
+        write_yaml({"runtime": 2}, join(self.findings_path, "mine_and_detect", "-d2-", "-p-", "-v-", "run.yml"))
+
+        assert_equals(2, get_recorded_runtime(self.findings_path, self.version, "-d2-"))
+
+    def test_none_without_runs(self):
+        assert_equals(None, get_recorded_runtime(self.findings_path, self.version))
@@ -0,0 +1,97 @@
+from os.path import join
+from tempfile import mkdtemp
+
+from nose.tools import assert_equals, assert_raises
+
+from tests.test_utils.data_util import create_project, create_version
+from utils.io import write_yaml, remove_tree
+from utils.sharding import Shard, get_recorded_runtimes, read_runtimes, write_runtimes
+
+
+class TestShard:
+    def test_partitions_all_versions(self):
+        project = create_project("-project-")
+        versions = [create_version("-v{}-".format(i), project=project) for i in range(5)]
+
+        shards = [Shard(index, 2).get_versions(versions, None) for index in [1, 2]]
+
+        assert_equals(sorted(version.id for version in versions),
+                      sorted(version.id for shard in shards for version in shard))
+        assert_equals(3, len(shards[0]))
+        assert_equals(2, len(shards[1]))
+
+    def test_balances_by_runtime(self):
+        project = create_project("-project-")
+        long = create_version("-long-", project=project)
+        short1 = create_version("-short1-", project=project)
+        short2 = create_version("-short2-", project=project)
+        runtimes = {long.id: 10, short1.id: 5, short2.id: 4}
+
+        assert_equals([long], Shard(1, 2).get_versions([long, short1, short2], runtimes))
+        assert_equals([short1, short2], Shard(2, 2).get_versions([long, short1, short2], runtimes))
+
+    def test_assumes_mean_runtime_for_unknown_versions(self):
+        project = create_project("-project-")
+        long = create_version("-long-", project=project)
+        short = create_version("-short-", project=project)
+        unknown = create_version("-unknown-", project=project)
+        runtimes = {long.id: 10, short.id: 2}
+
+        assert_equals([long], Shard(1, 2).get_versions([unknown, short, long], runtimes))
+
+    def test_is_independent_of_order(self):
+        project = create_project("-project-")
+        versions = [create_version("-v{}-".format(i), project=project) for i in range(4)]
+
+        assert_equals(Shard(1, 3).get_versions(versions),
+                      Shard(1, 3).get_versions(list(reversed(versions))))
+
+    def test_nodes_with_different_local_runtimes_partition_alike(self):
+        project = create_project("-p-")
+        versions = [create_version("-v{}-".format(i), project=project) for i in range(7)]
+        temp_dir = mkdtemp(prefix="mubench-test-sharding_")
+        try:
+            shared_runtimes_file = join(temp_dir, "runtimes.yml")
+            write_runtimes({versions[0].id: 10, versions[1].id: 3}, shared_runtimes_file)
+            # each node ran another shard before, hence, their findings record other runtimes
+            for node, version in [("-node1-", versions[2]), ("-node2-", versions[5])]:
+                write_yaml({"runtime": 100},
+                           join(temp_dir, node, "mine_and_detect", "-d-", "-p-", version.version_id, "run.yml"))
+
+            shards = []
+            for index, node in [(1, "-node1-"), (2, "-node2-")]:
+                local_runtimes = get_recorded_runtimes(join(temp_dir, node))
+                node_versions = sorted(versions, key=lambda v: -local_runtimes.get(v.id, 0))
+                shards.append(Shard(index, 2).get_versions(node_versions, read_runtimes(shared_runtimes_file)))
+        finally:
+            remove_tree(temp_dir)
+
+        shard_ids = [{version.id for version in shard} for shard in shards]
+        assert not shard_ids[0] & shard_ids[1]
+        assert_equals({version.id for version in versions}, shard_ids[0] | shard_ids[1])
+
+    def test_rejects_invalid_index(self):
+        assert_raises(ValueError, Shard, 3, 2)
+
+
+class TestGetRecordedRuntimes:
+    # noinspection PyAttributeOutsideInit
+    def setup(self):
+        self.findings_path = mkdtemp(prefix="mubench-test-sharding_")
+
+    def teardown(self):
+        remove_tree(self.findings_path)
+
+    def test_sums_runtimes_by_version(self):
+        write_yaml({"runtime": 1.5}, join(self.findings_path, "detect_only", "-d-", "-p-", "-v1-", "-m1-", "run.yml"))
+        write_yaml({"runtime": 2}, join(self.findings_path, "mine_and_detect", "-d-", "-p-", "-v1-", "run.yml"))
+        write_yaml({"runtime": 3}, join(self.findings_path, "mine_and_detect", "-d-", "-p-", "-v2-", "run.yml"))
+
+        assert_equals({"-p-.-v1-": 3.5, "-p-.-v2-": 3}, get_recorded_runtimes(self.findings_path))
+
+    def test_reads_written_runtimes(self):
+        runtimes_file = join(self.findings_path, "runtimes.yml")
+
+        write_runtimes({"-p-.-v-": 1.5}, runtimes_file)
+
+        assert_equals({"-p-.-v-": 1.5}, read_runtimes(runtimes_file))
@@ -1,3 +1,4 @@
+import asyncio
 import os
 
 from nose.tools import assert_equals, assert_raises
@@ -47,3 +48,28 @@ class TestShell:
         except CommandFailedError as e:
             assert_equals("test" + os.linesep, e.error)
 
+
+    def test_exec_async_output(self):
+        out = _run_async(Shell.exec_async("echo test"))
+        assert_equals("test" + os.linesep, out)
+
+    def test_exec_async_command_failure(self):
+        with assert_raises(CommandFailedError):
+            _run_async(Shell.exec_async("unknown command"))
+
+    def test_exec_async_timeout(self):
+        with assert_raises(TimeoutError):
+            _run_async(Shell.exec_async("sleep 10", timeout=1))
+
+    def test_try_exec_async_failure(self):
+        assert not _run_async(Shell.try_exec_async("unknown command"))
+
+
+def _run_async(coroutine):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)  # attaches the loop to the subprocess watcher
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
@@ -0,0 +1,67 @@
+import json
+from os.path import join
+from tempfile import mkdtemp
+
+from nose.tools import assert_equals
+
+from tasks.task_runner import TaskRunner
+from tests.tasks.test_task_runner import VoidTask, StringConsumingTask
+from utils import tracing
+from utils.io import remove_tree
+from utils.shell import Shell
+
+
+class TestTracing:
+    # noinspection PyAttributeOutsideInit
+    def setup(self):
+        self.temp_dir = mkdtemp(prefix="mubench-test-tracing_")
+        self.trace_file = join(self.temp_dir, "trace.json")
+
+    def teardown(self):
+        if tracing.is_tracing():
+            tracing.stop(self.trace_file)
+        remove_tree(self.temp_dir)
+
+    def test_records_span(self):
+        tracing.start()
+
+        with tracing.span("-name-", "-category-", entity="-entity-"):
+            pass
+
+        event = self.stop_tracing()[0]
+        assert_equals("-name-", event["name"])
+        assert_equals("-category-", event["cat"])
+        assert_equals("X", event["ph"])
+        assert_equals("-entity-", event["args"]["entity"])
+        assert "cpu_ms" in event["args"]
+        assert "rss_delta_kb" in event["args"]
+
+    def test_records_nothing_when_not_tracing(self):
+        with tracing.span("-name-", "-category-"):
+            pass
+
+        assert not tracing.is_tracing()
+        assert_equals([], tracing.take_events())
+
+    def test_records_shell_commands_within_tasks(self):
+        tracing.start()
+
+        TaskRunner([VoidTask(["-a-"]), ShellTask()]).run()
+
+        events = self.stop_tracing()
+        task_event = [event for event in events if event["name"] == "ShellTask"][0]
+        exec_event = [event for event in events if event["name"] == "exec"][0]
+        assert_equals("-a-", task_event["args"]["entity"])
+        assert_equals("echo test", exec_event["args"]["command"])
+        assert task_event["ts"] <= exec_event["ts"]
+        assert exec_event["ts"] + exec_event["dur"] <= task_event["ts"] + task_event["dur"]
+
+    def stop_tracing(self):
+        tracing.stop(self.trace_file)
+        with open(self.trace_file) as file:
+            return json.load(file)["traceEvents"]
+
+
+class ShellTask(StringConsumingTask):
+    def run(self, s: str):
+        Shell.exec("echo test")
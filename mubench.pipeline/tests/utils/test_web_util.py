@@ -1,4 +1,7 @@
+import hashlib
 import io
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
 from os.path import join, exists
 from pathlib import Path
 from tempfile import mkdtemp
@@ -91,6 +94,92 @@ class TestDownloadFile:
         assert not exists(self.target)
 
 
+class _RangeRequestHandler(BaseHTTPRequestHandler):
+    # serves the server's content, answering range requests, unless the server ignores ranges, and interrupts the
+    # server's first response halfway, if so configured
+    def do_GET(self):
+        content = self.server.content
+        self.server.ranges.append(self.headers.get("Range"))
+        offset = 0
+        if self.headers.get("Range") and not self.server.ignores_ranges:
+            offset = int(self.headers.get("Range")[len("bytes="):-1])
+            self.send_response(206)
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(content) - offset))
+        self.end_headers()
+        if self.server.interrupt:
+            self.server.interrupt = False
+            self.wfile.write(content[offset:len(content) // 2])
+            self.close_connection = True
+        else:
+            self.wfile.write(content[offset:])
+
+    def log_message(self, *args):
+        pass
+
+
+class TestDownloadFileOverHTTP:
+    CONTENT = b"-content-" * 100000
+
+    # noinspection PyAttributeOutsideInit
+    def setup(self):
+        self.tmp = mkdtemp()
+        self.target = join(self.tmp, "local.file")
+
+        self.server = HTTPServer(("localhost", 0), _RangeRequestHandler)
+        self.server.content = TestDownloadFileOverHTTP.CONTENT
+        self.server.ranges = []
+        self.server.ignores_ranges = False
+        self.server.interrupt = False
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = "http://localhost:{}/file".format(self.server.server_port)
+
+    def teardown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_downloads_file(self):
+        download_file(self.url, self.target, hashlib.md5(TestDownloadFileOverHTTP.CONTENT).hexdigest())
+
+        with open(self.target, "rb") as file:
+            assert_equals(TestDownloadFileOverHTTP.CONTENT, file.read())
+        assert not exists(self.target + ".part")
+
+    def test_resumes_interrupted_download(self):
+        self.server.interrupt = True
+
+        download_file(self.url, self.target, hashlib.md5(TestDownloadFileOverHTTP.CONTENT).hexdigest())
+
+        with open(self.target, "rb") as file:
+            assert_equals(TestDownloadFileOverHTTP.CONTENT, file.read())
+        assert_equals([None, "bytes={}-".format(len(TestDownloadFileOverHTTP.CONTENT) // 2)], self.server.ranges)
+
+    def test_resumes_earlier_download(self):
+        with open(self.target + ".part", "wb") as file:
+            file.write(TestDownloadFileOverHTTP.CONTENT[:100])
+
+        download_file(self.url, self.target, hashlib.md5(TestDownloadFileOverHTTP.CONTENT).hexdigest())
+
+        assert_equals(["bytes=100-"], self.server.ranges)
+
+    def test_starts_over_if_server_ignores_range(self):
+        self.server.ignores_ranges = True
+        safe_write("-stale-", self.target + ".part", append=False)
+
+        download_file(self.url, self.target, hashlib.md5(TestDownloadFileOverHTTP.CONTENT).hexdigest())
+
+        with open(self.target, "rb") as file:
+            assert_equals(TestDownloadFileOverHTTP.CONTENT, file.read())
+
+    def test_invalidates_download(self):
+        with assert_raises(ValueError):
+            download_file(self.url, self.target, ":wrong-md5:")
+
+        assert not exists(self.target)
+        assert not exists(self.target + ".part")
+
+
 @patch("requests.post")
 class TestPost:
     def test_post_data(self, post_mock):
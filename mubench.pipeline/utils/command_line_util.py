@@ -4,6 +4,8 @@ from operator import attrgetter
 
 from typing import List, Any
 from utils.io import read_yaml
+from utils.misuse_predicate import MisusePredicate
+from utils.sharding import Shard
 
 
 class SortingHelpFormatter(HelpFormatter):
@@ -58,6 +60,8 @@ def get_command_line_parser(available_detectors: List[str], available_scripts: L
     __add_publish_subprocess(available_detectors, available_datasets, subparsers)
     __add_stats_subprocess(available_scripts, available_datasets, subparsers)
     __add_dataset_check_subprocess(available_datasets, subparsers)
+    __add_merge_subprocess(subparsers)
+    __add_worker_subprocess(subparsers)
 
     return parser
 
@@ -98,6 +102,32 @@ def __add_checkout_subprocess(available_datasets: List[str], subparsers) -> None
                                             epilog="The clones will be created below `checkouts/`.")  # type: ArgumentParser
     __setup_misuse_filter_arguments(checkout_parser, available_datasets)
     __setup_checkout_arguments(checkout_parser)
+    __setup_execution_arguments(checkout_parser)
+
+    checkout_subparsers = checkout_parser.add_subparsers(
+        help="Optionally, exchange the git checkouts with machines without network access, via git bundles. Run "
+             "`mubench checkout <task> -h` for details.",
+        dest='checkout_task')
+    export_bundles_parser = checkout_subparsers.add_parser(
+        'export-bundles', formatter_class=SortingHelpFormatter,
+        help="Check out and export one git bundle per project, with the revisions of the project's versions.",
+        description="Check out and export one git bundle per project, with the revisions of the project's "
+                    "versions, to the directory.")  # type: ArgumentParser
+    export_bundles_parser.add_argument('bundles_path', metavar='dir', help="the directory to export the bundles to")
+    import_bundles_parser = checkout_subparsers.add_parser(
+        'import-bundles', formatter_class=SortingHelpFormatter,
+        help="Check out from the git bundles that `export-bundles` exported.",
+        description="Check out from the git bundles that `export-bundles` exported to the directory, instead of "
+                    "from the remotes, where the bundles have the revisions.")  # type: ArgumentParser
+    import_bundles_parser.add_argument('bundles_path', metavar='dir', help="the directory to import the bundles from")
+    for parser in [export_bundles_parser, import_bundles_parser]:
+        __setup_misuse_filter_arguments(parser, available_datasets)
+        __setup_checkout_arguments(parser)
+        __setup_execution_arguments(parser)
+        # the subcommand's namespace overwrites the `checkout` options, hence, it must set only the options it got
+        for action in parser._actions:
+            if action.dest != 'bundles_path':
+                action.default = argparse.SUPPRESS
 
 
 def __add_compile_subprocess(available_datasets: List[str], subparsers) -> None:
@@ -110,6 +140,7 @@ def __add_compile_subprocess(available_datasets: List[str], subparsers) -> None:
     __setup_misuse_filter_arguments(compile_parser, available_datasets)
     __setup_compile_arguments(compile_parser)
     __setup_checkout_arguments(compile_parser)
+    __setup_execution_arguments(compile_parser)
 
 
 def __add_detect_subprocess(available_detectors: List[str], available_datasets: List[str], subparsers) -> None:
@@ -122,6 +153,7 @@ def __add_detect_subprocess(available_detectors: List[str], available_datasets:
     __setup_detector_arguments(detect_parser, available_detectors)
     __setup_checkout_arguments(detect_parser)
     __setup_compile_arguments(detect_parser)
+    __setup_execution_arguments(detect_parser)
 
 
 def __add_publish_subprocess(available_detectors: List[str], available_datasets: List[str], subparsers) -> None:
@@ -143,6 +175,7 @@ def __add_publish_subprocess(available_detectors: List[str], available_datasets:
     __setup_checkout_arguments(findings_parser)
     __setup_compile_arguments(findings_parser)
     __setup_publish_arguments(findings_parser)
+    __setup_execution_arguments(findings_parser)
 
     def upload_limit(x):
         limit = int(x)
@@ -163,6 +196,7 @@ def __add_publish_subprocess(available_detectors: List[str], available_datasets:
     __setup_misuse_filter_arguments(metadata_parser, available_datasets)
     __setup_checkout_arguments(metadata_parser)
     __setup_publish_arguments(metadata_parser)
+    __setup_execution_arguments(metadata_parser)
 
 
 def __add_stats_subprocess(available_scripts: List[str], available_datasets: List[str], subparsers) -> None:
@@ -182,6 +216,26 @@ def __add_dataset_check_subprocess(available_datasets: List[str], subparsers) ->
     __setup_misuse_filter_arguments(dataset_check_parser, available_datasets)
 
 
+def __add_merge_subprocess(subparsers) -> None:
+    merge_parser = subparsers.add_parser('merge', formatter_class=SortingHelpFormatter,
+                                         help="Merge the findings of the shards of a run into `findings/`.",
+                                         description="Merge the findings of the shards of a run into `findings/`. "
+                                                     "If a run exists in multiple shards with different results, the "
+                                                     "latest one is taken.")  # type: ArgumentParser
+    merge_parser.add_argument('shard_findings_paths', metavar='path', nargs='+',
+                              help="the `findings/` directories of the shards")
+
+
+def __add_worker_subprocess(subparsers) -> None:
+    worker_parser = subparsers.add_parser('worker', formatter_class=SortingHelpFormatter,
+                                          help="Process project versions handed out by a coordinator.",
+                                          description="Process project versions handed out by a coordinator, i.e., a "
+                                                      "run started with `--coordinate`, until all versions are "
+                                                      "done.")  # type: ArgumentParser
+    worker_parser.add_argument('coordinator_url', metavar='url',
+                               help="the coordinator's address (example: `http://localhost:8080/`)")
+
+
 def __setup_misuse_filter_arguments(parser: ArgumentParser, available_datasets: List[str]):
     parser.add_argument('--only', metavar='X', nargs='+', dest='white_list', default=get_default('only', []),
                         help="process only projects or project versions whose names are given")
@@ -190,11 +244,78 @@ def __setup_misuse_filter_arguments(parser: ArgumentParser, available_datasets:
     parser.add_argument('--dataset', metavar='DATASET', dest='dataset', default=get_default('dataset', None),
                         choices=available_datasets, help="process only misuses in the specified data set")
 
+    def where(x):
+        try:
+            return MisusePredicate(x)
+        except ValueError as error:
+            raise ArgumentTypeError(str(error))
+
+    parser.add_argument('--where', metavar='EXPRESSION', type=where, dest='where', default=get_default('where', None),
+                        help="process only misuses for which the expression holds, and only the projects and project "
+                             "versions with such misuses, e.g., `apis == java.util.Iterator and characteristics == "
+                             "missing/condition/*`. Compare the fields `project`, `apis`, `characteristics`, "
+                             "`source`, and `is_crash` to glob patterns with `==` or `!=`, and combine comparisons "
+                             "with `and`, `or`, `not`, and parentheses")
+
+    def shard(x):
+        index, _, count = x.partition('/')
+        if not index.isdigit() or not count.isdigit() or not 1 <= int(index) <= int(count):
+            raise ArgumentTypeError("invalid value: {}, must be i/n with 1 <= i <= n".format(x))
+        return Shard(int(index), int(count))
+
+    parser.add_argument('--shard', metavar='i/n', type=shard, dest='shard', default=get_default('shard', None),
+                        help="process only the i-th of n parts of the project versions. The parts are balanced by "
+                             "the runtimes in the `--shard-runtimes` file or, without one, by the number of versions. "
+                             "Every machine of a distributed run computes the same partition from the same versions "
+                             "and runtimes file, regardless of its own checkouts and findings")
+    parser.add_argument('--shard-runtimes', metavar='file', dest='shard_runtimes',
+                        default=get_default('shard-runtimes', None),
+                        help="balance the `--shard` parts by the runtimes of the project versions in the YAML file, "
+                             "e.g., the `runtimes.yml` that `merge` writes. Every machine must use the same file")
+
 
 def __setup_checkout_arguments(parser: ArgumentParser):
     parser.add_argument('--force-checkout', dest='force_checkout', action='store_true',
                         default=get_default('force-checkout', False),
                         help="force a clean checkout, deleting any existing files")
+    parser.add_argument('--migrate-checkouts', dest='migrate_checkouts', action='store_true',
+                        default=get_default('migrate-checkouts', False),
+                        help="migrate existing checkouts to the current layout, e.g., make the checkouts of git "
+                             "projects share one repository per project, instead of each holding a full clone, and "
+                             "write the manifests, from which we tell whether a checkout exists")
+    parser.add_argument('--verify-checkouts', dest='verify_checkouts', action='store_true',
+                        default=get_default('verify-checkouts', False),
+                        help="ask the version-control system whether the existing checkouts hold the revisions that "
+                             "their manifests record, and re-create them otherwise, instead of trusting the manifests")
+
+    def positive_number(x):
+        number = int(x)
+        if number < 1:
+            raise ArgumentTypeError("invalid value: {}, must be positive".format(number))
+        return number
+
+    parser.add_argument('--checkout-jobs', type=positive_number, default=get_default('checkout-jobs', 1), metavar='n',
+                        dest='checkout_jobs',
+                        help="check out up to n project versions concurrently, in batches of at least n versions "
+                             "(see `--batch-size`). Defaults to 1")
+    parser.add_argument('--checkout-jobs-per-host', type=positive_number,
+                        default=get_default('checkout-jobs-per-host', 4), metavar='n', dest='checkout_jobs_per_host',
+                        help="fetch from each remote host, e.g., github.com, up to n checkouts concurrently, in every "
+                             "process. Defaults to 4")
+    parser.add_argument('--sparse-checkout', dest='sparse_checkout', action='store_true',
+                        default=get_default('sparse-checkout', False),
+                        help="check out only the files that the compilation needs, i.e., the source directory, the "
+                             "build files, and the paths listed in the version's `build: sparse_checkout:`, without "
+                             "fetching the contents of other files. Applies to git projects only")
+    parser.add_argument('--snapshot-cache', metavar='dir', dest='snapshot_cache_path',
+                        default=get_default('snapshot-cache', None),
+                        help="restore checkouts from snapshots in the directory, instead of fetching them, and store "
+                             "snapshots of new checkouts there. Several machines may share the directory. Snapshots "
+                             "lack version-control metadata and exist only for immutable revisions, e.g., commit ids")
+    parser.add_argument('--svn-export', dest='svn_export', action='store_true',
+                        default=get_default('svn-export', False),
+                        help="export SVN projects, instead of checking them out, i.e., fetch their files without "
+                             "version-control metadata, once per project and revision")
 
 
 def __setup_compile_arguments(parser: ArgumentParser):
@@ -203,6 +324,77 @@ def __setup_compile_arguments(parser: ArgumentParser):
                         help="force a clean compilation")
 
 
+def __setup_execution_arguments(parser: ArgumentParser):
+    def positive_number(x):
+        number = int(x)
+        if number < 1:
+            raise ArgumentTypeError("invalid value: {}, must be positive".format(number))
+        return number
+
+    parser.add_argument('--jobs', type=positive_number, default=get_default('jobs', 1), metavar='n', dest='jobs',
+                        help="process up to n project versions in parallel. Defaults to 1")
+    parser.add_argument('--batch-size', type=positive_number, default=get_default('batch-size', 1), metavar='n',
+                        dest='batch_size',
+                        help="pass up to n entities at once to tasks that process entities in batches, e.g., "
+                             "`--batch-size 100` checks out 100 project versions at once (see `--checkout-jobs`). "
+                             "Defaults to 1, i.e., no batching")
+
+    def stage_workers(x):
+        task, _, workers = x.partition('=')
+        if not task or not workers.isdigit() or int(workers) < 1:
+            raise ArgumentTypeError("invalid value: {}, must be <task>=<number of workers>".format(x))
+        return task, int(workers)
+
+    parser.add_argument('--resume', dest='resume', action='store_true', default=get_default('resume', False),
+                        help="skip what a previous run with the same options completed, according to its journal in "
+                             "`journals/`")
+    parser.add_argument('--trace', metavar='file', dest='trace_file', default=get_default('trace', None),
+                        help="write a trace of the run's tasks and shell commands, with their wall time, CPU time, and "
+                             "memory usage, to the file, in the Chrome trace-event format")
+    parser.add_argument('--profile', metavar='dir', dest='profile_path', default=get_default('profile', None),
+                        help="profile the run and write a profile per task (`<task>.pstats`), their combination "
+                             "(`combined.pstats`), and sampled stacks for a flame graph (`combined.folded`) to the "
+                             "directory")
+    parser.add_argument('--longest-first', dest='longest_first', action='store_true',
+                        default=get_default('longest-first', False),
+                        help="process the project versions longest first, by the runtimes of their previous compiles "
+                             "and detector runs on this machine, keeping versions of the same project together. "
+                             "Applies to the order only, not to the `--shard` parts")
+    parser.add_argument('--plan', dest='plan', action='store_true', default=get_default('plan', False),
+                        help="only print the predicted schedule of a `--longest-first` run on `--jobs` workers and "
+                             "its total time")
+    parser.add_argument('--pipeline', dest='pipeline', action='store_true', default=get_default('pipeline', False),
+                        help="run the tasks as pipeline stages, such that, e.g., checkout, compile, and detection of "
+                             "different project versions overlap")
+    parser.add_argument('--stage-workers', metavar='T=n', nargs='+', type=stage_workers, dest='stage_workers',
+                        default=get_default('stage-workers', []),
+                        help="use n worker threads for the pipeline stage of task T (example: "
+                             "`--stage-workers CheckoutTask=4 CompileTask=2`). Defaults to 1 per stage")
+
+    parser.add_argument('--async', dest='use_async', action='store_true', default=get_default('async', False),
+                        help="run the tasks on an asyncio event loop, such that network-bound tasks, like checkouts "
+                             "and uploads, overlap")
+    parser.add_argument('--concurrency', type=positive_number, default=get_default('concurrency', 16), metavar='n',
+                        dest='concurrency',
+                        help="run up to n network-bound tasks, like checkouts and uploads, concurrently, when "
+                             "running with `--async`. Defaults to 16")
+
+    def address(x):
+        host, _, port = x.rpartition(':')
+        if not port.isdigit():
+            raise ArgumentTypeError("invalid value: {}, must be [host:]port".format(x))
+        return host or "localhost", int(port)
+
+    parser.add_argument('--coordinate', metavar='[host:]port', type=address, dest='coordinate',
+                        default=get_default('coordinate', None),
+                        help="instead of processing the project versions, hand them out to `worker` processes that "
+                             "connect to the given address")
+    parser.add_argument('--lease-timeout', metavar='s', type=positive_number, dest='lease_timeout',
+                        default=get_default('lease-timeout', 300),
+                        help="hand a project version out again, if its worker does not report back for s seconds. "
+                             "Defaults to 300")
+
+
 def __setup_detector_arguments(parser: ArgumentParser, available_detectors: List[str]) -> None:
     parser.add_argument('detector', help="the detector whose findings to evaluate",
                         choices=available_detectors)
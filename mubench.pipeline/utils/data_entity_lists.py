@@ -1,41 +1,63 @@
+import logging
 from typing import List
 
+from yaml import YAMLError
+
+from data.misuse import Misuse
+from data.project import Project
+from data.project_version import ProjectVersion
+from utils.data_filter import EntityIdTrie
+from utils.misuse_predicate import MisusePredicate
+
 
 class DataEntityLists:
-    def __init__(self, white_list: List[str], black_list: List[str]):
-        self.__project_whitelist = DataEntityLists.__get_project_white_list(white_list)
-        self.__version_whitelist = DataEntityLists.__get_version_white_list(white_list)
-        self.__misuse_whitelist = DataEntityLists.__get_misuse_white_list(white_list)
-        self.__black_list = black_list
-
-    def get_project_white_list(self) -> List[str]:
-        return self.__project_whitelist
-
-    def get_version_white_list(self, project_id: str) -> List[str]:
-        return [version_id for version_id in self.__version_whitelist if version_id.split('.')[0] == project_id]
-
-    def get_misuse_white_list(self, version_id: str) -> List[str]:
-        return [misuse_id for misuse_id in self.__misuse_whitelist if misuse_id.rsplit('.', 1)[0] == version_id]
-
-    @property
-    def black_list(self) -> List[str]:
-        return self.__black_list
-
-    @staticmethod
-    def __get_project_white_list(ids: List[str]) -> List[str]:
-        return [id.partition('.')[0] for id in ids]
-
-    @staticmethod
-    def __get_version_white_list(ids: List[str]) -> List[str]:
-        result = []
-        for id in ids:
-            split = id.split('.')
-            if len(split) > 1:
-                project_id = split[0]
-                version_id = split[1]
-                result.append("{}.{}".format(project_id, version_id))
-        return result
-
-    @staticmethod
-    def __get_misuse_white_list(ids: List[str]) -> List[str]:
-        return [id for id in ids if len(id.split('.')) > 2]
+    """
+    The white and black lists of project, version, and misuse ids, e.g., from `--only`, `--skip`, and `--dataset`, and
+    the `--where` predicate over misuses. Ids may contain glob patterns, e.g., `project.*`. The lists are compiled into
+    tries, such that filtering an entity by its id costs time linear in the length of the id, independent of the
+    lengths of the lists.
+    """
+
+    def __init__(self, white_list: List[str], black_list: List[str], where: MisusePredicate = None):
+        self.__white_list = EntityIdTrie(white_list)
+        self.__black_list = EntityIdTrie(black_list)
+        self.__where = where
+
+    def is_filtered(self, entity_id: str) -> bool:
+        """
+        Whether to skip the project, version, or misuse with the given id. An entity is whitelisted, if the white list
+        is empty, contains the entity's id, or contains the id of one of its parents, but of none of that parent's
+        other children. An entity is blacklisted, if the black list contains its id or the id of one of its parents.
+        """
+        is_whitelisted = self.__white_list.selects(entity_id)
+        is_blacklisted = self.__black_list.contains_prefix_of(entity_id)
+        return is_blacklisted or not is_whitelisted
+
+    def is_project_filtered(self, project: Project) -> bool:
+        """Whether to skip the project by its id or, if there is a `--where` predicate, since no misuse matches it."""
+        if self.is_filtered(project.id):
+            return True
+        if self.__where is None:
+            return False
+        if not self.__where.may_match_project(project.id):
+            return True
+        return all(self.is_version_filtered(version) for version in project.versions)
+
+    def is_version_filtered(self, version: ProjectVersion) -> bool:
+        """Whether to skip the version by its id or, if there is a `--where` predicate, since no misuse matches it."""
+        if self.is_filtered(version.id):
+            return True
+        if self.__where is None:
+            return False
+        return all(self.is_misuse_filtered(misuse) for misuse in version.misuses)
+
+    def is_misuse_filtered(self, misuse: Misuse) -> bool:
+        if self.is_filtered(misuse.id):
+            return True
+        if self.__where is None:
+            return False
+        try:
+            return not self.__where.matches(misuse)
+        except (YAMLError, OSError) as error:
+            logging.getLogger("data_entity_lists").warning("Skipping %s, cannot read its fields: %s", misuse, error)
+            return True
@@ -1,10 +1,104 @@
-from typing import List
+import re
+from fnmatch import translate
+from typing import List, Dict, Tuple, Pattern, Iterable
+
+GLOB_CHARACTERS = re.compile(r"[*?\[]")
+
+
+class EntityIdTrie:
+    """
+    A trie of dot-separated entity ids, e.g., `project.version.misuse`, with one level per id segment. Segments may be
+    glob patterns, e.g., `project.*`. Plain segments are looked up in a hash map, such that a query costs time linear in
+    the length of the queried id, independent of the number of ids in the trie.
+    """
+
+    def __init__(self, ids: Iterable[str]):
+        self.__root = _Node()
+        for id_ in ids:
+            self.__root.add(id_.split('.'))
+
+    def is_empty(self) -> bool:
+        return not self.__root.has_children()
+
+    def contains_prefix_of(self, id_: str) -> bool:
+        """Whether the trie contains the id or one of its prefixes, e.g., the project of a version."""
+        nodes = [self.__root]
+        for segment in id_.split('.'):
+            nodes = [child for node in nodes for child in node.get_children(segment)]
+            if any(node.is_id for node in nodes):
+                return True
+            if not nodes:
+                return False
+        return False
+
+    def contains_extension_of(self, id_: str) -> bool:
+        """Whether the trie contains the id or an id it is a prefix of, e.g., a misuse of a version."""
+        return bool(self.__get_nodes(id_.split('.')))
+
+    def selects(self, id_: str) -> bool:
+        """
+        Whether the trie selects the id, i.e., whether, for every segment of the id, the trie either contains the
+        segment or contains no segments at this level, e.g., the trie `project.v1` selects `project`, `project.v1`, and
+        `project.v1.m1`, but not `project.v2` or `other`.
+        """
+        nodes = [self.__root]
+        for segment in id_.split('.'):
+            if any(not node.has_children() for node in nodes):
+                return True
+            nodes = [child for node in nodes for child in node.get_children(segment)]
+            if not nodes:
+                return False
+        return True
+
+    def __get_nodes(self, segments: List[str]) -> List['_Node']:
+        nodes = [self.__root]
+        for segment in segments:
+            nodes = [child for node in nodes for child in node.get_children(segment)]
+            if not nodes:
+                break
+        return nodes
+
+
+class _Node:
+    __slots__ = ["children", "patterns", "is_id"]
+
+    def __init__(self):
+        self.children = {}  # type: Dict[str, _Node]
+        self.patterns = []  # type: List[Tuple[Pattern, _Node]]
+        self.is_id = False
+
+    def add(self, segments: List[str]):
+        if not segments:
+            self.is_id = True
+            return
+
+        segment = segments[0]
+        if GLOB_CHARACTERS.search(segment):
+            regex = translate(segment)
+            child = next((node for pattern, node in self.patterns if pattern.pattern == regex), None)
+            if child is None:
+                child = _Node()
+                self.patterns.append((re.compile(regex), child))
+        else:
+            child = self.children.setdefault(segment, _Node())
+        child.add(segments[1:])
+
+    def has_children(self) -> bool:
+        return bool(self.children) or bool(self.patterns)
+
+    def get_children(self, segment: str) -> List['_Node']:
+        children = [node for pattern, node in self.patterns if pattern.match(segment)]
+        if segment in self.children:
+            children.append(self.children[segment])
+        return children
 
 
 class DataFilter:
     def __init__(self, white_list: List[str], black_list: List[str]):
         self.white_list = white_list
         self.black_list = black_list
+        self.__white_list = EntityIdTrie(white_list)
+        self.__black_list = EntityIdTrie(black_list)
 
     def is_filtered(self, id_: str):
         blacklisted = self._is_blacklisted(id_)
@@ -12,8 +106,7 @@ class DataFilter:
         return blacklisted or not whitelisted
 
     def _is_blacklisted(self, id_: str):
-        return any(id_.startswith(blacklisted) for blacklisted in self.black_list)
+        return self.__black_list.contains_prefix_of(id_)
 
     def _is_whitelisted(self, id_: str):
-        return any(id_.startswith(whitelisted) for whitelisted in self.white_list) or \
-               any(whitelisted.startswith(id_) for whitelisted in self.white_list)
+        return self.__white_list.contains_prefix_of(id_) or self.__white_list.contains_extension_of(id_)
@@ -1,8 +1,14 @@
-from os import makedirs, chmod, remove, listdir, readlink, symlink, stat
-from os.path import dirname, exists, isfile, join, isdir, basename, islink
+import fcntl
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import cpu_count
+from os import makedirs, chmod, remove, listdir, readlink, symlink, stat, sep
+from os.path import dirname, exists, isfile, join, isdir, basename, islink, normpath, isabs
 from shutil import rmtree, copy
 from stat import S_IWRITE
 from typing import Dict, List
+from zipfile import ZipFile
+
 from utils.shell import Shell
 
 import yaml
@@ -11,6 +17,7 @@ try:
 except ImportError:
     from yaml import Loader, Dumper
 
+_YAML_PARSES = 0
 
 def safe_write(content: str, file_path: str, append: bool) -> None:
     mode = 'a+' if append else 'w+'
@@ -38,6 +45,20 @@ def create_file(file_path: str, truncate: bool = False) -> None:
     open(file_path, mode, encoding="utf-8").close()
 
 
+@contextmanager
+def lock_file(file_path: str):
+    """
+    Holds an exclusive lock on the file, which we create, if necessary, while in the context. The lock excludes other
+    threads and other processes alike.
+    """
+    with safe_open(file_path, 'a') as file:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+
 def is_empty(file_path: str) -> bool:
     return exists(file_path) and stat(file_path).st_size == 0
 
@@ -74,6 +95,38 @@ def copy_tree(src: str, dst: str) -> None:
             raise UserWarning("unknown file type: {}".format(content))
 
 
+def extract_zip(zip_file_path: str, dst: str, jobs: int = None) -> None:
+    """
+    Extracts the archive's entries on up to `jobs` threads, which defaults to the number of CPUs. Each thread reads
+    the archive through its own handle, since decompression runs without the GIL.
+    """
+    with ZipFile(zip_file_path) as zip_file:
+        members = zip_file.infolist()
+        for member in members:
+            # like ZipFile.extract(), we never write outside of dst
+            name = normpath(member.filename)
+            if isabs(name) or name.split(sep)[0] == "..":
+                raise ValueError("invalid archive {}: contains {}".format(zip_file_path, member.filename))
+            # we create all directories upfront, such that no two threads race to create a directory
+            path = join(dst, name)
+            makedirs(path if member.filename.endswith('/') else dirname(path), exist_ok=True)
+
+    files = sorted((member for member in members if not member.filename.endswith('/')),
+                   key=lambda member: member.file_size, reverse=True)
+    jobs = max(1, min(jobs or cpu_count() or 1, len(files)))
+    # distribute the large entries evenly
+    partitions = [files[i::jobs] for i in range(jobs)]
+
+    def extract(partition):
+        with ZipFile(zip_file_path) as partition_zip_file:
+            for partition_member in partition:
+                partition_zip_file.extract(partition_member, dst)
+
+    with ThreadPoolExecutor(jobs) as executor:
+        for future in [executor.submit(extract, partition) for partition in partitions]:
+            future.result()
+
+
 class __MultilineString(str):
     pass
 
@@ -119,10 +172,17 @@ def __escape_str(data):
 
 
 def read_yaml(file: str):
+    global _YAML_PARSES
+    _YAML_PARSES += 1
     with open(file, 'rU', encoding="utf-8") as stream:
         return yaml.load(stream, Loader=Loader)
 
 
+def get_number_of_yaml_parses() -> int:
+    """Returns how many YAML files `read_yaml()` parsed in this process."""
+    return _YAML_PARSES
+
+
 def read_yaml_if_exists(file: str):
     return read_yaml(file) if exists(file) else {}
 
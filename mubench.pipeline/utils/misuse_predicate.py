@@ -0,0 +1,174 @@
+import re
+from fnmatch import fnmatchcase
+from typing import List, Optional, Callable, Dict
+
+from data.misuse import Misuse
+
+TOKEN = re.compile(r"\s*(?:(?P<operator>==|!=|\(|\))|\"(?P<double_quoted>[^\"]*)\"|'(?P<single_quoted>[^']*)'|"
+                   r"(?P<word>[^\s()=!\"']+))")
+
+
+def _get_apis(misuse: Misuse) -> List[str]:
+    return [str(api) for api in misuse.apis]
+
+
+def _get_characteristics(misuse: Misuse) -> List[str]:
+    return [str(characteristic) for characteristic in misuse.characteristics]
+
+
+def _get_source(misuse: Misuse) -> List[str]:
+    return [str(misuse.source)] if misuse.source is not None else []
+
+
+def _get_is_crash(misuse: Misuse) -> List[str]:
+    try:
+        return [str(bool(misuse.is_crash)).lower()]
+    except KeyError:
+        return []
+
+
+FIELDS = {
+    "project": lambda misuse: [misuse.project_id],
+    "apis": _get_apis,
+    "characteristics": _get_characteristics,
+    "source": _get_source,
+    "is_crash": _get_is_crash,
+}  # type: Dict[str, Callable[[Misuse], List[str]]]
+
+
+class MisusePredicate:
+    """
+    A `--where` expression over misuse fields, e.g., `apis == java.util.Iterator and not is_crash == true`. A
+    comparison `field == value` holds, if any of the field's values matches the glob pattern `value`, `!=` holds, if
+    none does. Comparisons combine with `and`, `or`, `not`, and parentheses. Values with spaces or operators must be
+    quoted.
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        self.__evaluate = _Parser(expression).parse()
+
+    def matches(self, misuse: Misuse) -> bool:
+        return bool(self.__evaluate(lambda field: FIELDS[field](misuse)))
+
+    def may_match_project(self, project_id: str) -> bool:
+        """
+        Whether the expression may hold for a misuse of the project, i.e., whether it does not fail for the project
+        regardless of the misuse's other fields.
+        """
+        return self.__evaluate(lambda field: [project_id] if field == "project" else None) is not False
+
+    def __str__(self):
+        return self.expression
+
+
+class _Parser:
+    # Expressions evaluate to a function of a field-value lookup. A lookup returns None for an unknown field, which
+    # makes comparisons with the field unknown (None), such that we can evaluate an expression partially, e.g., on a
+    # project, before we read its misuses.
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        self.tokens = self.__tokenize(expression)
+        self.position = 0
+
+    def __tokenize(self, expression: str) -> List[tuple]:
+        tokens = []
+        position = 0
+        expression = expression.rstrip()
+        while position < len(expression):
+            match = TOKEN.match(expression, position)
+            if not match:
+                raise ValueError("invalid --where expression '{}' at '{}'".format(expression, expression[position:]))
+            kind = match.lastgroup
+            value = match.group(kind)
+            if kind in ("double_quoted", "single_quoted"):
+                kind = "value"
+            tokens.append((kind, value))
+            position = match.end()
+        return tokens
+
+    def parse(self):
+        if not self.tokens:
+            raise ValueError("empty --where expression")
+        evaluate = self.__parse_or()
+        if self.position < len(self.tokens):
+            self.__fail("unexpected '{}'".format(self.tokens[self.position][1]))
+        return evaluate
+
+    def __parse_or(self):
+        operands = [self.__parse_and()]
+        while self.__accept("word", "or"):
+            operands.append(self.__parse_and())
+        if len(operands) == 1:
+            return operands[0]
+
+        def evaluate_or(lookup):
+            results = [operand(lookup) for operand in operands]
+            return True if True in results else (None if None in results else False)
+        return evaluate_or
+
+    def __parse_and(self):
+        operands = [self.__parse_not()]
+        while self.__accept("word", "and"):
+            operands.append(self.__parse_not())
+        if len(operands) == 1:
+            return operands[0]
+
+        def evaluate_and(lookup):
+            results = [operand(lookup) for operand in operands]
+            return False if False in results else (None if None in results else True)
+        return evaluate_and
+
+    def __parse_not(self):
+        if self.__accept("word", "not"):
+            operand = self.__parse_not()
+
+            def evaluate_not(lookup):
+                result = operand(lookup)
+                return None if result is None else not result
+            return evaluate_not
+        if self.__accept("operator", "("):
+            evaluate = self.__parse_or()
+            if not self.__accept("operator", ")"):
+                self.__fail("missing ')'")
+            return evaluate
+        return self.__parse_comparison()
+
+    def __parse_comparison(self):
+        field = self.__next("word", "a field")
+        if field not in FIELDS:
+            self.__fail("unknown field '{}', must be one of {}".format(field, ", ".join(sorted(FIELDS))))
+        operator = self.__next("operator", "'==' or '!='")
+        if operator not in ("==", "!="):
+            self.__fail("expected '==' or '!=', found '{}'".format(operator))
+        pattern = self.__next_value()
+
+        def evaluate_comparison(lookup) -> Optional[bool]:
+            values = lookup(field)
+            if values is None:
+                return None
+            is_match = any(fnmatchcase(value, pattern) for value in values)
+            return is_match if operator == "==" else not is_match
+        return evaluate_comparison
+
+    def __accept(self, kind: str, value: str) -> bool:
+        if self.position < len(self.tokens) and self.tokens[self.position] == (kind, value):
+            self.position += 1
+            return True
+        return False
+
+    def __next(self, kind: str, description: str) -> str:
+        if self.position >= len(self.tokens) or self.tokens[self.position][0] != kind:
+            self.__fail("expected {}".format(description))
+        self.position += 1
+        return self.tokens[self.position - 1][1]
+
+    def __next_value(self) -> str:
+        if self.position >= len(self.tokens) or self.tokens[self.position][0] not in ("word", "value"):
+            self.__fail("expected a value")
+        self.position += 1
+        return self.tokens[self.position - 1][1]
+
+    def __fail(self, message: str):
+        raise ValueError("invalid --where expression '{}': {}".format(self.expression, message))
@@ -0,0 +1,155 @@
+"""
+Profiles a run's tasks. Every task invocation runs under cProfile and the profiles are aggregated per task. In addition,
+a sampling profiler records the stacks of all threads every few milliseconds, where the interpreter provides them, for
+a flame graph of the entire run. Profiling is off until `start()` is called. While it is off, `profile()` costs next to
+nothing.
+"""
+import cProfile
+import logging
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from os import makedirs
+from os.path import join
+from typing import Dict, Optional, Tuple
+
+SAMPLING_INTERVAL = 0.005
+
+_STATS = None  # type: Optional[Dict[str, pstats.Stats]]
+_SAMPLES = Counter()  # type: Counter
+_SAMPLER = None  # type: Optional[_Sampler]
+
+
+def start():
+    global _STATS
+    _STATS = {}
+    _SAMPLES.clear()
+    _ensure_sampler()
+
+
+def stop(output_path: str):
+    """
+    Writes the aggregated profile of every task to `<task>.pstats`, their combination to `combined.pstats`, and the
+    sampled stacks to `combined.folded`, in the collapsed-stack format of flamegraph.pl and speedscope.
+    """
+    global _STATS
+    logger = logging.getLogger("profiling")
+    stats, _STATS = _STATS or {}, None
+    _stop_sampler()
+
+    makedirs(output_path, exist_ok=True)
+    combined = pstats.Stats()
+    for name, task_stats in sorted(stats.items()):
+        task_stats.dump_stats(join(output_path, name + ".pstats"))
+        combined.add(task_stats)
+    combined.dump_stats(join(output_path, "combined.pstats"))
+
+    if _SAMPLES:
+        with open(join(output_path, "combined.folded"), "w", encoding="utf-8") as file:
+            for stack, count in sorted(_SAMPLES.items()):
+                file.write("{} {}\n".format(stack, count))
+    else:
+        logger.warning("No stack samples recorded, since this interpreter does not provide the threads' stacks.")
+    _SAMPLES.clear()
+
+
+def is_profiling() -> bool:
+    return _STATS is not None
+
+
+@contextmanager
+def profile(name: str):
+    if _STATS is None:
+        yield
+        return
+
+    _ensure_sampler()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        if name in _STATS:
+            _STATS[name].add(profiler)
+        else:
+            _STATS[name] = pstats.Stats(profiler)
+
+
+def take_profiles() -> Tuple[Dict[str, Dict], Counter]:
+    """
+    Removes and returns the profiles recorded so far, in a picklable form, e.g., to pass them from a worker process to
+    its parent.
+    """
+    global _STATS
+    if _STATS is None:
+        return {}, Counter()
+    stats, _STATS = _STATS, {}
+    samples = Counter(_SAMPLES)
+    _SAMPLES.clear()
+    return {name: task_stats.stats for name, task_stats in stats.items()}, samples
+
+
+def add_profiles(stats: Dict[str, Dict], samples: Counter):
+    if _STATS is None:
+        return
+    for name, raw_stats in stats.items():
+        task_stats = pstats.Stats(_RecordedStats(raw_stats))
+        if name in _STATS:
+            _STATS[name].add(task_stats)
+        else:
+            _STATS[name] = task_stats
+    _SAMPLES.update(samples)
+
+
+class _RecordedStats:
+    # pstats.Stats loads the stats of any object that provides them through create_stats()
+    def __init__(self, stats: Dict):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def _ensure_sampler():
+    # forked worker processes inherit the sampler's state, but not its thread
+    global _SAMPLER
+    if hasattr(sys, "_current_frames") and (_SAMPLER is None or _SAMPLER.pid != os.getpid()):
+        _SAMPLER = _Sampler()
+        _SAMPLER.start()
+
+
+def _stop_sampler():
+    global _SAMPLER
+    if _SAMPLER and _SAMPLER.pid == os.getpid():
+        _SAMPLER.stop()
+    _SAMPLER = None
+
+
+class _Sampler(threading.Thread):
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.pid = os.getpid()
+        self.__stopped = threading.Event()
+
+    def run(self):
+        while not self.__stopped.wait(SAMPLING_INTERVAL):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != self.ident:
+                    _SAMPLES[_Sampler.__collapse(frame)] += 1
+
+    def stop(self):
+        self.__stopped.set()
+        self.join()
+
+    @staticmethod
+    def __collapse(frame) -> str:
+        stack = []
+        while frame:
+            code = frame.f_code
+            stack.append("{}:{}".format(code.co_filename.rsplit(os.sep, 1)[-1], code.co_name))
+            frame = frame.f_back
+        return ";".join(reversed(stack))
@@ -0,0 +1,89 @@
+from glob import glob
+from os import walk
+from os.path import join
+from typing import List, Callable, Optional, Dict, Tuple
+
+from data.detector_execution import DetectorExecution
+from data.project import Project
+from data.project_version import ProjectVersion
+from utils.io import read_yaml
+
+
+class Schedule:
+    """
+    Orders project versions longest first, by their estimated runtimes. Versions of the same project stay together,
+    such that their shared checkout is reused while it is hot: projects are ordered by their total runtime and versions
+    by their own runtime within their project. Versions without an estimate are assumed to take the mean estimated
+    runtime. The estimates come from this machine's own findings and compiles, hence, a schedule orders this machine's
+    work only. Sharding, which all machines of a distributed run must agree on, never uses it.
+    """
+
+    def __init__(self, versions: List[ProjectVersion],
+                 get_runtime: Callable[[ProjectVersion], Optional[float]]):
+        runtimes = {version.id: get_runtime(version) for version in versions}
+        estimated_runtimes = [runtime for runtime in runtimes.values() if runtime is not None]
+        default_runtime = sum(estimated_runtimes) / len(estimated_runtimes) if estimated_runtimes else 1.0
+
+        self.__runtimes = {version_id: default_runtime if runtime is None else runtime
+                           for version_id, runtime in runtimes.items()}  # type: Dict[str, float]
+        self.__project_runtimes = {}  # type: Dict[str, float]
+        for version in versions:
+            self.__project_runtimes[version.project_id] = \
+                self.__project_runtimes.get(version.project_id, 0.0) + self.__runtimes[version.id]
+
+        self.versions = self.sort_versions(sorted(versions, key=self.__get_project_key))
+
+    def get_runtime(self, version: ProjectVersion) -> float:
+        return self.__runtimes.get(version.id, 0.0)
+
+    def sort_projects(self, projects: List[Project]) -> List[Project]:
+        return sorted(projects, key=lambda project: (-self.__project_runtimes.get(project.id, 0.0), project.id))
+
+    def sort_versions(self, versions: List[ProjectVersion]) -> List[ProjectVersion]:
+        return sorted(versions, key=lambda version: (self.__get_project_key(version), -self.get_runtime(version),
+                                                     version.id))
+
+    def __get_project_key(self, version: ProjectVersion) -> Tuple[float, str]:
+        return -self.__project_runtimes.get(version.project_id, 0.0), version.project_id
+
+    def plan(self, workers: int) -> List[Tuple[ProjectVersion, int, float, float]]:
+        """
+        Predicts when which worker processes which version, if every version goes to the next free worker in order.
+        Returns tuples of the version, the worker's index, and the predicted start and end time.
+        """
+        free_at = [0.0] * workers
+        plan = []
+        for version in self.versions:
+            worker = free_at.index(min(free_at))
+            start = free_at[worker]
+            free_at[worker] = start + self.get_runtime(version)
+            plan.append((version, worker, start, free_at[worker]))
+        return plan
+
+
+def get_estimated_runtime(version: ProjectVersion, findings_path: str, compiles_path: str,
+                          detector_id: str = None) -> Optional[float]:
+    """
+    Returns the sum of the version's recorded compile and detector runtimes, or None, if neither is recorded.
+    """
+    detector_runtime = get_recorded_runtime(findings_path, version, detector_id)
+    compile_runtime = version.get_compile(compiles_path).runtime
+    if detector_runtime is None and compile_runtime is None:
+        return None
+    return (detector_runtime or 0.0) + (compile_runtime or 0.0)
+
+
+def get_recorded_runtime(findings_path: str, version: ProjectVersion, detector_id: str = None) -> Optional[float]:
+    """
+    Returns the total runtime recorded in the run files of the version's previous detector runs, in any experiment,
+    or None, if there are no such runs.
+    """
+    run_file_paths = []
+    for findings_path in glob(join(findings_path, "*", detector_id or "*", version.project_id, version.version_id)):
+        for path, _, files in walk(findings_path):
+            if DetectorExecution.RUN_FILE in files:
+                run_file_paths.append(join(path, DetectorExecution.RUN_FILE))
+
+    if not run_file_paths:
+        return None
+    return sum(float((read_yaml(run_file_path) or {}).get("runtime", 0)) for run_file_path in run_file_paths)
@@ -0,0 +1,72 @@
+from os import walk
+from os.path import join, relpath, sep
+from typing import List, Dict
+
+from data.detector_execution import DetectorExecution
+from data.project_version import ProjectVersion
+from utils.io import read_yaml, write_yaml
+
+RUNTIMES_FILE = "runtimes.yml"
+
+
+class Shard:
+    def __init__(self, index: int, count: int):
+        if count < 1 or not 1 <= index <= count:
+            raise ValueError("invalid shard {}/{}".format(index, count))
+        self.index = index
+        self.count = count
+
+    def get_versions(self, versions: List[ProjectVersion],
+                     runtimes: Dict[str, float] = None) -> List[ProjectVersion]:
+        """
+        Partitions the versions into `count` shards of about equal total runtime and returns those of this shard.
+        Versions are assigned longest first, each to the shard with the least total runtime so far, by the `runtimes`
+        of the version ids. Versions without a runtime are assumed to take the mean runtime, or all the same time, if
+        there are no runtimes. Every machine must compute the same partition, hence, the runtimes must be the same on
+        every machine, e.g., read from a shared runtimes file, never from a machine's own findings.
+        """
+        runtimes = runtimes or {}
+        known_runtimes = [runtimes[version.id] for version in versions if version.id in runtimes]
+        default_runtime = sum(known_runtimes) / len(known_runtimes) if known_runtimes else 1.0
+
+        def get_weight(version: ProjectVersion) -> float:
+            return runtimes.get(version.id, default_runtime)
+
+        shard_runtimes = [0.0] * self.count
+        shard_versions = [[] for _ in range(self.count)]
+        for version in sorted(versions, key=lambda v: (-get_weight(v), v.id)):
+            shard = shard_runtimes.index(min(shard_runtimes))
+            shard_runtimes[shard] += get_weight(version)
+            shard_versions[shard].append(version)
+
+        return sorted(shard_versions[self.index - 1], key=lambda v: v.id)
+
+    def __str__(self):
+        return "{}/{}".format(self.index, self.count)
+
+
+def get_recorded_runtimes(findings_path: str) -> Dict[str, float]:
+    """
+    Returns the total runtimes recorded in the run files of all detector runs, in any experiment, by version id. The
+    findings tree is `<experiment>/<detector>/<project>/<version>/...`.
+    """
+    runtimes = {}  # type: Dict[str, float]
+    for path, _, files in walk(findings_path):
+        if DetectorExecution.RUN_FILE not in files:
+            continue
+        segments = relpath(path, findings_path).split(sep)
+        if len(segments) < 4:
+            continue
+        version_id = "{}.{}".format(segments[2], segments[3])
+        run = read_yaml(join(path, DetectorExecution.RUN_FILE))
+        runtime = float(run.get("runtime", 0)) if isinstance(run, dict) else 0.0
+        runtimes[version_id] = runtimes.get(version_id, 0.0) + runtime
+    return runtimes
+
+
+def read_runtimes(runtimes_file: str) -> Dict[str, float]:
+    return {str(version_id): float(runtime) for version_id, runtime in (read_yaml(runtimes_file) or {}).items()}
+
+
+def write_runtimes(runtimes: Dict[str, float], runtimes_file: str):
+    write_yaml(runtimes, runtimes_file)
@@ -1,3 +1,4 @@
+import asyncio
 import locale
 import logging
 import os
@@ -5,6 +6,8 @@ from platform import platform
 from subprocess import PIPE, STDOUT, CalledProcessError, run, TimeoutExpired
 from typing import Optional
 
+from utils import tracing
+
 
 class Shell:
     @staticmethod
@@ -18,7 +21,8 @@ class Shell:
             if "Linux" in platform() and timeout is not None:
                 command = "timeout {} {}".format(timeout + 60, command)
 
-            output = Shell.__exec(command, cwd, timeout, encoding)
+            with tracing.span("exec", "shell", command=command, cwd=cwd):
+                output = Shell.__exec(command, cwd, timeout, encoding)
             logger.debug(output)
             return output
         except CalledProcessError as e:
@@ -26,6 +30,32 @@ class Shell:
         except TimeoutExpired as e:
             raise TimeoutError(e.cmd, e.output.decode(encoding))
 
+    @staticmethod
+    async def exec_async(command: str, cwd: str = os.getcwd(), logger=logging.getLogger(__name__),
+                         timeout: Optional[int] = None):
+        logger.debug("Execute '%s' in '%s'", command, cwd)
+        encoding = Shell.__get_encoding()
+        if "Linux" in platform() and timeout is not None:
+            command = "timeout {} {}".format(timeout + 60, command)
+
+        with tracing.span("exec", "shell", tid=tracing.get_task_track(), command=command, cwd=cwd):
+            process = await asyncio.create_subprocess_shell(command, cwd=cwd, stdout=PIPE, stderr=PIPE)
+            try:
+                stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                raise TimeoutError(command, "")
+
+        stdout = stdout.decode(encoding)
+        stderr = stderr.decode(encoding)
+        if process.returncode != 0:
+            raise CommandFailedError(command, stdout, stderr)
+
+        output = _combined_output(stdout, stderr)
+        logger.debug(output)
+        return output
+
     @staticmethod
     def __get_encoding():
         return locale.getpreferredencoding()
@@ -51,6 +81,16 @@ class Shell:
             logger.debug(e)
             return False
 
+    @staticmethod
+    async def try_exec_async(command: str, cwd: str = os.getcwd(), logger=logging.getLogger(__name__),
+                             timeout: Optional[int] = None) -> bool:
+        try:
+            await Shell.exec_async(command, cwd=cwd, logger=logger, timeout=timeout)
+            return True
+        except CommandFailedError as e:
+            logger.debug(e)
+            return False
+
 
 class CommandFailedError(Exception):
     def __init__(self, command: str, output: str, error: str = ""):
@@ -0,0 +1,105 @@
+"""
+Records spans of a run in the Chrome trace-event format, which trace viewers, like chrome://tracing or Perfetto, open.
+Tracing is off until `start()` is called. While it is off, `span()` costs next to nothing.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Optional
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+_EVENTS = None  # type: Optional[List[Dict]]
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def start():
+    global _EVENTS
+    _EVENTS = []
+
+
+def stop(path: str):
+    global _EVENTS
+    events, _EVENTS = _EVENTS, None
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"traceEvents": events or [], "displayTimeUnit": "ms"}, file)
+
+
+def is_tracing() -> bool:
+    return _EVENTS is not None
+
+
+def take_events() -> List[Dict]:
+    """Removes and returns the events recorded so far, e.g., to pass them from a worker process to its parent."""
+    global _EVENTS
+    events, _EVENTS = _EVENTS, ([] if _EVENTS is not None else None)
+    return events or []
+
+
+def add_events(events: List[Dict]):
+    if _EVENTS is not None:
+        _EVENTS.extend(events)
+
+
+def get_task_track() -> int:
+    """The track of the current asyncio task, such that concurrent coroutines on one thread trace apart."""
+    # asyncio.current_task() replaces asyncio.Task.current_task() since Python 3.7
+    current_task = getattr(asyncio, "current_task", None) or asyncio.Task.current_task
+    return id(current_task())
+
+
+@contextmanager
+def span(name: str, category: str, tid: int = None, **args):
+    """
+    Records a complete event with the wall time, CPU time, CPU time of child processes, and change of the resident
+    set size during the block.
+    """
+    if _EVENTS is None:
+        yield
+        return
+
+    start_time = time.time()
+    start_cpu = time.process_time()
+    start_children_cpu = _get_children_cpu_time()
+    start_rss = _get_rss()
+    try:
+        yield
+    finally:
+        end_time = time.time()
+        args.update({
+            "cpu_ms": round((time.process_time() - start_cpu) * 1000, 3),
+            "children_cpu_ms": round((_get_children_cpu_time() - start_children_cpu) * 1000, 3),
+            "rss_delta_kb": (_get_rss() - start_rss) // 1024
+        })
+        _EVENTS.append({
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": int(start_time * 1000000),
+            "dur": int((end_time - start_time) * 1000000),
+            "pid": os.getpid(),
+            "tid": threading.get_ident() if tid is None else tid,
+            "args": args
+        })
+
+
+def _get_children_cpu_time() -> float:
+    if not resource:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _get_rss() -> int:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        # the peak resident set size, in KB on Linux, is the best we get without procfs
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 if resource else 0
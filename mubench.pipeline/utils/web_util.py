@@ -1,35 +1,85 @@
+import asyncio
 import getpass
 import hashlib
 import json
 import mimetypes
-import shutil
 from contextlib import ExitStack
+from functools import partial
+from http.client import HTTPException
 from numbers import Number
-from os import remove
-from os.path import exists, basename
-from urllib.request import urlopen
+from os import remove, replace
+from os.path import exists, basename, getsize
+from urllib.error import HTTPError
+from urllib.request import urlopen, Request
 
 import requests
 from typing import List, Dict, Union
 from utils.json_float_encoder import JSONFloatEncoder
 
 
-def download_file(url: str, file: str, md5_checksum: str = None):
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+def download_file(url: str, file: str, md5_checksum: str = None, retries: int = 3):
     """
-    Downloads a file from a give URL.
+    Downloads a file from a give URL. The download goes to `<file>.part`, from where it resumes, by an HTTP range
+    request, after an interruption, be it in this or in an earlier call. The checksum is computed while downloading.
     :param url: the URL to download from, must yield a file
     :param file: the destination to save the file to
     :param md5_checksum: a checksum to validate the file with
+    :param retries: how often to resume a download that was interrupted after receiving data
     """
-    with urlopen(url) as response, open(file, 'wb') as out_file:
-        shutil.copyfileobj(response, out_file)
+    partial_file = file + ".part"
+    while True:
+        received = getsize(partial_file) if exists(partial_file) else 0
+        try:
+            file_checksum = __download(url, partial_file)
+            break
+        except (OSError, HTTPException):
+            if retries < 1 or not exists(partial_file) or getsize(partial_file) <= received:
+                raise
+            retries -= 1
+
+    if md5_checksum and __read_md5_checksum(md5_checksum) != file_checksum:
+        remove(partial_file)
+        raise ValueError("invalid MD5 checksum '{}', expected '{}'".format(
+            file_checksum, __read_md5_checksum(md5_checksum)))
+    replace(partial_file, file)
+
+
+def __download(url: str, partial_file: str) -> str:
+    hash_md5 = hashlib.md5()
+    offset = 0
+    if exists(partial_file):
+        offset = getsize(partial_file)
+        __update_md5(hash_md5, partial_file)
 
+    request = Request(url, headers={"Range": "bytes={}-".format(offset)} if offset else {})
     try:
-        validate_file(file, md5_checksum)
-    except:
-        remove(file)
+        response = urlopen(request)
+    except HTTPError as error:
+        if error.code == 416:
+            # the partial file is complete
+            return hash_md5.hexdigest()
         raise
 
+    with response:
+        if offset and response.getcode() != 206:
+            # the server ignored the range, hence, we start over
+            hash_md5 = hashlib.md5()
+            offset = 0
+        expected_size = response.headers.get("Content-Length") if response.headers else None
+        received = 0
+        with open(partial_file, 'ab' if offset else 'wb') as out_file:
+            for chunk in iter(lambda: response.read(DOWNLOAD_CHUNK_SIZE), b""):
+                out_file.write(chunk)
+                hash_md5.update(chunk)
+                received += len(chunk)
+        if expected_size is not None and received < int(expected_size):
+            raise ConnectionError("download of {} interrupted after {} of {} bytes".format(
+                url, offset + received, offset + int(expected_size)))
+    return hash_md5.hexdigest()
+
 
 def is_valid_file(file_path: str, md5_checksum: str = None):
     """
@@ -59,11 +109,7 @@ def validate_file(file_path: str, md5_checksum: str = None):
 
 
 def __check_md5(file, md5_checksum):
-    if exists(md5_checksum):
-        # assume we are provided an md5 file
-        with open(md5_checksum, 'r') as md5_file:
-            md5_checksum = md5_file.read().rstrip("\n")
-
+    md5_checksum = __read_md5_checksum(md5_checksum)
     file_checksum = __compute_md5(file)
     if not md5_checksum == file_checksum:
         raise ValueError("invalid MD5 checksum '{}', expected '{}'".format(file_checksum, md5_checksum))
@@ -71,13 +117,25 @@ def __check_md5(file, md5_checksum):
         return True
 
 
+def __read_md5_checksum(md5_checksum: str) -> str:
+    if exists(md5_checksum):
+        # assume we are provided an md5 file
+        with open(md5_checksum, 'r') as md5_file:
+            return md5_file.read().rstrip("\n")
+    return md5_checksum
+
+
 # source: http://stackoverflow.com/a/3431838
 def __compute_md5(file: str):
     hash_md5 = hashlib.md5()
+    __update_md5(hash_md5, file)
+    return hash_md5.hexdigest()
+
+
+def __update_md5(hash_md5, file: str):
     with open(file, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b""):
             hash_md5.update(chunk)
-    return hash_md5.hexdigest()
 
 
 def post(url: str, data: object, file_paths: List[str] = None, username: str="", password: str=""):
@@ -100,6 +158,15 @@ def post(url: str, data: object, file_paths: List[str] = None, username: str="",
         response.raise_for_status()
 
 
+async def post_async(url: str, data: object, file_paths: List[str] = None, username: str="", password: str=""):
+    """
+    Posts like `post`, but waits for the upload in the loop's default executor, such that the event loop may run other
+    uploads or subprocesses in the meantime. The AsyncTaskRunner sizes that executor to its concurrency.
+    """
+    loop = asyncio.get_event_loop()
+    await loop.run_in_executor(None, partial(post, url, data, file_paths, username, password))
+
+
 def as_markdown(value: Union[List[str], Dict[str, str], str]) -> Union[str, Number]:
     if isinstance(value, list):
         return __as_markdown_list(value)